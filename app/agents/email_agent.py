@@ -1,9 +1,8 @@
 from datetime import datetime
-from app.utils.helpers import load_json
+from app.core.candidate_store import candidate_store
 
 def send_email(candidate_id, template="default"):
-    candidates = load_json("data/candidates.json")
-    candidate = next((c for c in candidates if c["id"] == candidate_id), None)
+    candidate = candidate_store.get(candidate_id)
     
     if candidate:
         name = candidate.get("name", "Candidate")
@@ -17,4 +16,19 @@ def send_rejection_email(candidate_id):
     return send_email(candidate_id, "rejection")
 
 def send_interview_email(candidate_id):
-    return send_email(candidate_id, "interview")
\ No newline at end of file
+    return send_email(candidate_id, "interview")
+
+def send_emails(candidate_ids, template="default"):
+    # One provider call per batch; candidates are resolved from the store in one pass
+    sent_at = datetime.now().isoformat()
+    results = {}
+    names = []
+    for candidate_id in candidate_ids:
+        candidate = candidate_store.get(candidate_id)
+        if candidate:
+            names.append(candidate.get("name", "Candidate"))
+            results[candidate_id] = {"status": "sent", "recipient": names[-1], "timestamp": sent_at}
+        else:
+            results[candidate_id] = {"status": "failed", "reason": "candidate_not_found"}
+    print(f"[Email] Batch of {len(names)} sent ({template}) at {sent_at}")
+    return results
\ No newline at end of file
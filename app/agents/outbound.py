@@ -0,0 +1,152 @@
+import queue
+import random
+import threading
+import time
+from config import (OUTBOUND_QUEUE_PATH, OUTBOUND_WORKERS, OUTBOUND_MAX_ATTEMPTS, OUTBOUND_BACKOFF_BASE,
+                    OUTBOUND_BACKOFF_MAX, OUTBOUND_LEASE_SECONDS, OUTBOUND_TRANSPORT, OUTBOUND_STUB_LATENCY,
+                    OUTBOUND_STUB_FAILURE_RATE, OUTBOUND_BATCH_SIZES, OUTBOUND_RATE_LIMITS)
+from app.agents import email_agent, whatsapp_agent, voice_agent
+from app.agents.stub_transport import StubTransport
+from app.core.job_queue import JobQueue
+from app.core.rate_limit import TokenBucket
+from app.core.telemetry import gauge, histogram
+
+CHANNELS = ("email", "whatsapp", "voice")
+
+# event_type -> (channel, action, payload) jobs to send
+EVENT_ACTIONS = {
+    "shortlisted": [("email", "email_sent", {}), ("whatsapp", "whatsapp_sent", {})],
+    "rejected": [("email", "rejection_email_sent", {})],
+    "onboarding_completed": [("voice", "voice_call_triggered", {})],
+    "interview_scheduled": [("email", "interview_notification_sent", {}),
+                            ("whatsapp", "interview_notification_sent", {})],
+}
+
+SEND_SECONDS = histogram("hr_ai_outbound_send_seconds", "Provider call latency per channel.",
+                         ("channel", "mode", "outcome"))
+
+def timed(channel, mode, send):
+    # Times each provider call; outcome is error (raised), failed (reported
+    # failure) or ok
+    def timed_send(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = send(*args, **kwargs)
+            outcome = "failed" if isinstance(result, dict) and result.get("status") == "failed" else "ok"
+            return result
+        finally:
+            SEND_SECONDS.observe(time.perf_counter() - start, channel, mode, outcome)
+    return timed_send
+
+def build_transports(kind=OUTBOUND_TRANSPORT):
+    # Returns (single-send, batch-send) callables per channel
+    if kind == "stub":
+        stubs = {channel: StubTransport(channel, OUTBOUND_STUB_LATENCY, failure_rate=OUTBOUND_STUB_FAILURE_RATE)
+                 for channel in CHANNELS}
+        single, batch = stubs, {channel: stub.send_batch for channel, stub in stubs.items()}
+    else:
+        single = {
+            "email": email_agent.send_email,
+            "whatsapp": whatsapp_agent.send_whatsapp,
+            "voice": voice_agent.trigger_voice_call,
+        }
+        batch = {
+            "email": email_agent.send_emails,
+            "whatsapp": whatsapp_agent.send_whatsapps,
+            "voice": voice_agent.trigger_voice_calls,
+        }
+    return ({channel: timed(channel, "single", send) for channel, send in single.items()},
+            {channel: timed(channel, "batch", send) for channel, send in batch.items()})
+
+def enqueue_event(candidate_id, event_type, idempotency_key=None, queue=None):
+    # One job per channel action; keys are derived per action so a retried
+    # trigger with the same key maps back onto the jobs it created the first time
+    queue = queue or outbound_queue
+    jobs = []
+    for channel, action, payload in EVENT_ACTIONS.get(event_type, []):
+        key = f"{idempotency_key}:{channel}:{action}" if idempotency_key else None
+        job, created = queue.enqueue(channel, action, candidate_id, payload, key)
+        jobs.append((job, created))
+    return jobs
+
+def _send_with_retry(send, batch, payload, attempts):
+    for attempt in range(1, attempts + 1):
+        try:
+            return send(batch, **payload)
+        except Exception as e:
+            if attempt == attempts:
+                return {candidate_id: {"status": "failed", "reason": repr(e)} for candidate_id in batch}
+            time.sleep(random.uniform(0, min(OUTBOUND_BACKOFF_MAX, OUTBOUND_BACKOFF_BASE * 2 ** (attempt - 1))))
+
+def run_campaign(event_type, candidate_ids, batch_transports=None, batch_sizes=None, buckets=None,
+                 max_attempts=None, on_batch=None):
+    # Sends one event to many candidates. Each channel action runs in its own
+    # thread, in provider-sized batches paced by that channel's token bucket;
+    # progress records are yielded as batches complete. on_batch(channel,
+    # action, delivered_ids) is called from the sending thread after each
+    # batch, so it keeps running if the consumer stops iterating.
+    batch_transports = batch_transports or outbound_batch_transports
+    batch_sizes = batch_sizes or OUTBOUND_BATCH_SIZES
+    buckets = buckets or rate_limits
+    max_attempts = max_attempts or OUTBOUND_MAX_ATTEMPTS
+    actions = EVENT_ACTIONS[event_type]
+    started = time.perf_counter()
+    events = queue.Queue()
+    failed = {}
+
+    def send_channel(channel, action, payload):
+        send = batch_transports[channel]
+        size = max(1, batch_sizes.get(channel, 100))
+        bucket = buckets.get(channel)
+        sent = errors = waited = 0
+        failed_ids = set()
+        for start in range(0, len(candidate_ids), size):
+            batch = candidate_ids[start:start + size]
+            if bucket is not None:
+                waited += bucket.acquire(len(batch))
+            results = _send_with_retry(send, batch, payload, max_attempts)
+            delivered = []
+            for candidate_id in batch:
+                if results.get(candidate_id, {}).get("status") in ("sent", "triggered"):
+                    delivered.append(candidate_id)
+                else:
+                    failed_ids.add(candidate_id)
+            sent += len(delivered)
+            errors += len(batch) - len(delivered)
+            if on_batch is not None and delivered:
+                on_batch(channel, action, delivered)
+            events.put({"type": "progress", "channel": channel, "action": action, "sent": sent, "failed": errors,
+                        "total": len(candidate_ids), "rate_limited_seconds": round(waited, 3),
+                        "elapsed": round(time.perf_counter() - started, 3)})
+        failed[(channel, action)] = failed_ids
+        events.put(None)
+
+    threads = [threading.Thread(target=send_channel, args=action, name=f"campaign-{action[0]}", daemon=True)
+               for action in actions]
+    for thread in threads:
+        thread.start()
+    remaining = len(threads)
+    while remaining:
+        event = events.get()
+        if event is None:
+            remaining -= 1
+        else:
+            yield event
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    messages = sum(len(candidate_ids) - len(ids) for ids in failed.values())
+    yield {"type": "done", "messages_sent": messages,
+           "messages_failed": sum(len(ids) for ids in failed.values()), "elapsed": round(elapsed, 3),
+           "messages_per_sec": round(messages / elapsed, 1) if elapsed > 0 else 0.0}
+
+outbound_transports, outbound_batch_transports = build_transports()
+# Shared across requests so concurrent campaigns stay within one provider limit
+rate_limits = {channel: TokenBucket(rate) for channel, rate in OUTBOUND_RATE_LIMITS.items()}
+outbound_queue = JobQueue(OUTBOUND_QUEUE_PATH, outbound_transports, OUTBOUND_WORKERS, OUTBOUND_MAX_ATTEMPTS,
+                          OUTBOUND_BACKOFF_BASE, OUTBOUND_BACKOFF_MAX, OUTBOUND_LEASE_SECONDS)
+gauge("hr_ai_outbound_jobs", "Outbound jobs by channel and status (shared by all workers).", ("channel", "status"),
+      fn=lambda: {(channel, status): count for channel, statuses in outbound_queue.counts().items()
+                  for status, count in statuses.items()})
@@ -0,0 +1,48 @@
+import random
+import threading
+import time
+
+# Offline stand-in for a messaging provider: sleeps for a simulated network
+# round trip and fails a configurable share of sends, so the outbound queue
+# can be load-tested without touching real providers.
+class StubTransport:
+    def __init__(self, channel, latency=0.05, jitter=0.5, failure_rate=0.0, seed=None):
+        self.channel = channel
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.sent = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        with self._lock:
+            delay = self.latency * (1 + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.failure_rate
+        time.sleep(max(delay, 0.0))
+        return fail
+
+    def __call__(self, candidate_id, **payload):
+        fail = self._roll()
+        with self._lock:
+            if fail:
+                self.failed += 1
+            else:
+                self.sent += 1
+        if fail:
+            raise ConnectionError(f"stub {self.channel} provider unavailable")
+        return {"status": "sent", "channel": self.channel, "candidate_id": candidate_id, **payload}
+
+    def send_batch(self, candidate_ids, **payload):
+        # One simulated round trip per batch; a failure fails the whole batch
+        candidate_ids = list(candidate_ids)
+        fail = self._roll()
+        with self._lock:
+            if fail:
+                self.failed += len(candidate_ids)
+            else:
+                self.sent += len(candidate_ids)
+        if fail:
+            raise ConnectionError(f"stub {self.channel} provider unavailable")
+        return {candidate_id: {"status": "sent", "channel": self.channel, **payload} for candidate_id in candidate_ids}
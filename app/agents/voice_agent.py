@@ -1,9 +1,8 @@
 from datetime import datetime
-from app.utils.helpers import load_json
+from app.core.candidate_store import candidate_store
 
 def trigger_voice_call(candidate_id, call_type="onboarding"):
-    candidates = load_json("data/candidates.json")
-    candidate = next((c for c in candidates if c["id"] == candidate_id), None)
+    candidate = candidate_store.get(candidate_id)
     
     if candidate:
         name = candidate.get("name", "Candidate")
@@ -14,4 +13,17 @@ def trigger_voice_call(candidate_id, call_type="onboarding"):
         return {"status": "failed", "reason": "candidate_not_found"}
 
 def schedule_interview_call(candidate_id):
-    return trigger_voice_call(candidate_id, "interview_reminder")
\ No newline at end of file
+    return trigger_voice_call(candidate_id, "interview_reminder")
+
+def trigger_voice_calls(candidate_ids, call_type="onboarding"):
+    results = {}
+    triggered = 0
+    for candidate_id in candidate_ids:
+        candidate = candidate_store.get(candidate_id)
+        if candidate:
+            triggered += 1
+            results[candidate_id] = {"status": "triggered", "recipient": candidate.get("name", "Candidate"), "call_type": call_type}
+        else:
+            results[candidate_id] = {"status": "failed", "reason": "candidate_not_found"}
+    print(f"[Voice] Batch of {triggered} {call_type} calls triggered")
+    return results
\ No newline at end of file
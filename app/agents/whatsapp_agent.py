@@ -1,9 +1,8 @@
 from datetime import datetime
-from app.utils.helpers import load_json
+from app.core.candidate_store import candidate_store
 
 def send_whatsapp(candidate_id, message_type="notification"):
-    candidates = load_json("data/candidates.json")
-    candidate = next((c for c in candidates if c["id"] == candidate_id), None)
+    candidate = candidate_store.get(candidate_id)
     
     if candidate:
         name = candidate.get("name", "Candidate")
@@ -11,4 +10,17 @@ def send_whatsapp(candidate_id, message_type="notification"):
         return {"status": "sent", "recipient": name, "type": message_type}
     else:
         print(f"[WhatsApp] Failed - Candidate {candidate_id} not found")
-        return {"status": "failed", "reason": "candidate_not_found"}
\ No newline at end of file
+        return {"status": "failed", "reason": "candidate_not_found"}
+
+def send_whatsapps(candidate_ids, message_type="notification"):
+    results = {}
+    sent = 0
+    for candidate_id in candidate_ids:
+        candidate = candidate_store.get(candidate_id)
+        if candidate:
+            sent += 1
+            results[candidate_id] = {"status": "sent", "recipient": candidate.get("name", "Candidate"), "type": message_type}
+        else:
+            results[candidate_id] = {"status": "failed", "reason": "candidate_not_found"}
+    print(f"[WhatsApp] Batch of {sent} {message_type} messages sent")
+    return results
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Bulk candidate import from CSV or NDJSON, streamed in chunks.
+
+    python -m app.core.candidate_import                  # feedback/cvs.csv
+    python -m app.core.candidate_import candidates.ndjson --chunk-size 100000
+
+CSV files need id, name and skills columns (skills separated by ";", "|" or
+","); match_score is optional. NDJSON rows carry the same fields, skills as a
+list or a string. Later rows win over earlier ones with the same id.
+Near-duplicates of existing or earlier rows (same person, new id) are
+flagged, rejected or merged per --on-duplicate (default DEDUPE_POLICY).
+"""
+
+import argparse
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+import numpy as np
+from config import CVS_PATH, DEDUPE_POLICY
+from app.core.candidate_store import candidate_store
+from app.core.dedupe import POLICIES, resolve_duplicates
+from app.utils.helpers import validate_candidates
+
+# Near-duplicates listed in the import stats, beyond the counts
+EXAMPLES = 20
+
+def _split_skills(text):
+    # Skills are separated by ";", "|" or ","; str methods beat a regex split here
+    return [s for s in map(str.strip, text.replace("|", ";").replace(",", ";").split(";")) if s]
+
+def _skills(value):
+    if isinstance(value, str):
+        return _split_skills(value)
+    if not isinstance(value, list):
+        return []
+    return [s.strip() for s in value if isinstance(s, str) and s.strip()]
+
+def _score(value):
+    if value is None or value == "":
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+def _scores(values):
+    # Whole column through numpy when every value parses, row by row otherwise
+    try:
+        return np.asarray(values, dtype=np.float64).tolist()
+    except ValueError:
+        return [_score(value) for value in values]
+
+def detect_format(path):
+    return "ndjson" if Path(path).suffix.lower() in (".ndjson", ".jsonl", ".json") else "csv"
+
+def iter_chunks(lines, fmt, chunk_size):
+    # Yields (ids, names, skills, match_scores, malformed) column lists of at
+    # most chunk_size rows; `lines` is any iterable of text lines
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        header = [h.strip().lower() for h in next(reader, [])]
+        try:
+            id_col, name_col, skills_col = header.index("id"), header.index("name"), header.index("skills")
+        except ValueError:
+            raise ValueError(f"CSV header must include id, name and skills, got {header}")
+        score_col = header.index("match_score") if "match_score" in header else None
+        width = max(id_col, name_col, skills_col, score_col or 0) + 1
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            complete = [row for row in rows if len(row) >= width]
+            malformed = sum(1 for row in rows if 0 < len(row) < width)
+            yield ([row[id_col] for row in complete], [row[name_col] for row in complete],
+                   [_split_skills(row[skills_col]) for row in complete],
+                   _scores([row[score_col] for row in complete]) if score_col is not None else [0.0] * len(complete),
+                   malformed)
+
+    ids, names, skills, scores = [], [], [], []
+    malformed = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            malformed += 1
+            continue
+        if not isinstance(row, dict):
+            malformed += 1
+            continue
+        ids.append(row.get("id"))
+        names.append(row.get("name"))
+        skills.append(_skills(row.get("skills")))
+        scores.append(_score(row.get("match_score")))
+        if len(ids) >= chunk_size:
+            yield ids, names, skills, scores, malformed
+            ids, names, skills, scores, malformed = [], [], [], [], 0
+    if ids or malformed:
+        yield ids, names, skills, scores, malformed
+
+def import_candidates(lines, fmt="csv", store=None, chunk_size=50_000, report=print, on_duplicate=DEDUPE_POLICY,
+                      index=None):
+    # Validates each chunk column-wise, drops in-chunk duplicate ids (last
+    # row wins) and rows identical to what the store already holds, applies
+    # the near-duplicate policy and writes the rest as one journal batch;
+    # store subscribers such as the match index are updated per batch. Only
+    # one chunk is held at a time.
+    store = store or candidate_store
+    stats = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "rejected": 0,
+             "rejected_by_reason": {"malformed": 0}, "near_duplicates": {"flagged": 0, "rejected": 0, "merged": 0},
+             "near_duplicate_examples": [], "seconds": 0.0}
+    start = time.perf_counter()
+    for ids, names, skills, scores, malformed in iter_chunks(lines, fmt, chunk_size):
+        stats["rows"] += len(ids) + malformed
+        stats["rejected_by_reason"]["malformed"] += malformed
+        valid, parsed_ids, reasons = validate_candidates(ids, names, skills, scores)
+        for reason, failed in reasons.items():
+            stats["rejected_by_reason"][reason] = stats["rejected_by_reason"].get(reason, 0) + int(failed.sum())
+        rows = np.flatnonzero(valid)
+        # Last occurrence of each id within the chunk
+        _, last = np.unique(parsed_ids[rows][::-1], return_index=True)
+        keep = np.sort(rows[::-1][last])
+        stats["duplicates"] += len(rows) - len(keep)
+        keep = keep.tolist()
+        chunk_ids = parsed_ids[keep].tolist()
+        changed = []
+        for row, candidate_id, current in zip(keep, chunk_ids, store.get_many(chunk_ids)):
+            candidate = {"id": candidate_id, "name": names[row].strip(), "skills": skills[row],
+                         "match_score": scores[row]}
+            if current == candidate:
+                stats["unchanged"] += 1
+                continue
+            changed.append(candidate)
+        batch, outcomes = resolve_duplicates(changed, on_duplicate, index, store)
+        for candidate, outcome in zip(changed, outcomes):
+            if outcome is None:
+                continue
+            stats["near_duplicates"][outcome["action"]] += 1
+            if len(stats["near_duplicate_examples"]) < EXAMPLES:
+                stats["near_duplicate_examples"].append({"id": candidate["id"], **outcome})
+        for candidate in batch:
+            stats["updated" if candidate["id"] in store else "created"] += 1
+        if batch:
+            store.add_many(batch, compact=False)
+        elapsed = time.perf_counter() - start
+        if report:
+            report(f"[Import] {stats['rows']:,} rows, {stats['created']:,} created, {stats['updated']:,} updated, "
+                   f"{sum(stats['rejected_by_reason'].values()):,} rejected ({stats['rows'] / elapsed:,.0f} rows/sec)")
+    stats["rejected"] = sum(stats["rejected_by_reason"].values())
+    stats["seconds"] = time.perf_counter() - start
+    # Folds the imported journal into the snapshot in the background
+    store.maybe_compact()
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+def import_file(path, fmt=None, store=None, chunk_size=50_000, report=print, on_duplicate=DEDUPE_POLICY):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return import_candidates(f, fmt or detect_format(path), store, chunk_size, report, on_duplicate)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=str(CVS_PATH))
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--on-duplicate", choices=POLICIES, default=DEDUPE_POLICY,
+                        help="What to do with near-duplicates of existing or earlier rows")
+    args = parser.parse_args()
+
+    stats = import_file(args.path, args.format, chunk_size=args.chunk_size, on_duplicate=args.on_duplicate)
+    candidate_store.close()
+    print(f"[Import] done: {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec), "
+          f"{stats['created']:,} created, {stats['updated']:,} updated, {stats['unchanged']:,} unchanged, "
+          f"{stats['duplicates']:,} duplicates, {stats['rejected']:,} rejected {stats['rejected_by_reason']}, "
+          f"near-duplicates {stats['near_duplicates']}")
+
+if __name__ == "__main__":
+    main()
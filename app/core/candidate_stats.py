@@ -0,0 +1,41 @@
+import threading
+from app.core.candidate_store import candidate_store
+
+# Candidate counts for the metrics summary, kept current as a store
+# subscriber so a summary never walks the candidate list
+class CandidateStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._skills = {}
+        self.skill_counts = {}
+
+    def rebuild(self, candidates):
+        with self._lock:
+            self._skills = {}
+            self.skill_counts = {}
+            for candidate in candidates:
+                self._add(candidate)
+
+    def add_many(self, candidates):
+        with self._lock:
+            for candidate in candidates:
+                self._add(candidate)
+
+    def _add(self, candidate):
+        # Re-adding a candidate replaces its skills rather than counting twice
+        for skill in self._skills.pop(candidate["id"], ()):
+            self.skill_counts[skill] -= 1
+            if not self.skill_counts[skill]:
+                del self.skill_counts[skill]
+        skills = tuple(dict.fromkeys(s.strip().lower() for s in candidate.get("skills", []) if s.strip()))
+        self._skills[candidate["id"]] = skills
+        for skill in skills:
+            self.skill_counts[skill] = self.skill_counts.get(skill, 0) + 1
+
+    def summary(self, top=20):
+        with self._lock:
+            top_skills = sorted(self.skill_counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+            return {"total": len(self._skills), "distinct_skills": len(self.skill_counts),
+                    "top_skills": dict(top_skills)}
+
+candidate_stats = candidate_store.subscribe(CandidateStats())
@@ -0,0 +1,462 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from app.core import file_lock
+from app.core.telemetry import counter, gauge, histogram
+from app.utils.helpers import load_json, save_json
+
+# Byte-range locks on the lock file. fcntl locks are per process, so they
+# coordinate worker processes (see file_lock); the RLock coordinates threads within one.
+JOURNAL_LOCK, COMPACTION_LOCK = 0, 1
+# The lock file also holds a journal generation counter, bumped on every
+# rotation, so a reader can tell whether it missed a whole journal
+GENERATION_OFFSET = 8
+
+STORE_SECONDS = histogram("hr_ai_candidate_store_seconds",
+                          "Candidate snapshot parse, full load, index rebuild and compaction time.", ("operation",))
+CORRUPT_RECORDS = counter("hr_ai_candidate_journal_corrupt_total",
+                          "Journal lines skipped because they did not parse (e.g. torn by a crashed writer).")
+log = logging.getLogger(__name__)
+
+def _skip_corrupt(path, line):
+    CORRUPT_RECORDS.inc()
+    log.warning("Skipping corrupt candidate journal record in %s: %r", path, line[:200])
+
+class CandidateStore:
+    def __init__(self, file_path="data/candidates.json", compact_min_records=1000, compact_ratio=0.5,
+                 sync_interval=1.0):
+        self.file_path = file_path
+        # Appends go to an NDJSON journal next to the snapshot and are folded
+        # back into the snapshot once the journal grows past the threshold
+        self.journal_path = Path(file_path).with_suffix(".journal")
+        self.compacting_path = Path(file_path).with_suffix(".journal.compacting")
+        self.lock_path = Path(file_path).with_suffix(".lock")
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio
+        # How often reads pick up records other worker processes appended
+        self.sync_interval = sync_interval
+        self._candidates = []
+        self._by_id = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._journal = None
+        self._journal_records = 0
+        self._tail = None
+        self._tail_pid = None
+        self._tail_generation = 0
+        self._synced_at = 0.0
+        self._snapshot_stamp = 0
+        self._lock_fd = None
+        self._compaction = None
+        self._subscribers = []
+
+    def subscribe(self, subscriber):
+        # Subscribers keep derived indexes in sync: rebuild(candidates) runs
+        # after every load and add_many(candidates) after every batch of inserts
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._loaded:
+                subscriber.rebuild(self._candidates)
+        return subscriber
+
+    def _flock(self, start, cmd):
+        if self._lock_fd is None:
+            self.lock_path.parent.mkdir(exist_ok=True)
+            self._lock_fd = file_lock.open_fd(self.lock_path)
+        file_lock.lockf(self._lock_fd, cmd, 1, start)
+
+    def _generation(self):
+        data = file_lock.pread(self._lock_fd, 8, GENERATION_OFFSET)
+        return int.from_bytes(data, "little") if len(data) == 8 else 0
+
+    def load(self):
+        with self._lock:
+            self._read_disk()
+            with STORE_SECONDS.time("index"):
+                for subscriber in self._subscribers:
+                    subscriber.rebuild(self._candidates)
+        return self
+
+    def _read_disk(self):
+        started = time.perf_counter()
+        with self._lock:
+            self._wait_for_compaction()
+            # Holding the compaction lock keeps another process from swapping
+            # the snapshot between our reading it and replaying the journals
+            self._flock(COMPACTION_LOCK, file_lock.LOCK_EX)
+            try:
+                candidates = load_json(self.file_path)
+                STORE_SECONDS.observe(time.perf_counter() - started, "parse")
+                try:
+                    self._snapshot_stamp = os.stat(self.file_path).st_mtime_ns
+                except FileNotFoundError:
+                    self._snapshot_stamp = 0
+                self._candidates = []
+                self._by_id = {}
+                for candidate in candidates:
+                    self._insert(candidate)
+                # A leftover compacting journal means a compaction was interrupted
+                interrupted = self._replay_file(self.compacting_path)
+                self._flock(JOURNAL_LOCK, file_lock.LOCK_EX)
+                try:
+                    self._open_tail(truncate_torn=True)
+                finally:
+                    self._flock(JOURNAL_LOCK, file_lock.LOCK_UN)
+                self._loaded = True
+                if interrupted:
+                    self._write_snapshot()
+            finally:
+                self._flock(COMPACTION_LOCK, file_lock.LOCK_UN)
+            self._synced_at = time.monotonic()
+            STORE_SECONDS.observe(time.perf_counter() - started, "load")
+
+    def _catch_up(self):
+        # Re-reads the snapshot and journals after missing a rotation, but
+        # hands subscribers only the records that changed, rather than
+        # rebuilding their indexes from scratch
+        candidates, by_id = self._candidates, self._by_id
+        self._read_disk()
+        added = []
+        for candidate in self._candidates:
+            idx = by_id.get(candidate["id"])
+            if idx is None or candidates[idx] != candidate:
+                added.append(candidate)
+        self._notify(added)
+        return len(added)
+
+    def _replay_file(self, path):
+        count = 0
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        self._insert(json.loads(line))
+                    except json.JSONDecodeError:
+                        _skip_corrupt(path, line)
+                        continue
+                    count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    def _open_tail(self, truncate_torn=False):
+        # The tail handle follows the journal's inode, so records appended by
+        # other processes are read exactly once even across a rotation
+        if self._tail is not None:
+            self._tail.close()
+            self._tail = None
+        self._journal_records = 0
+        self._tail_generation = self._generation()
+        try:
+            self._tail = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return []
+        self._tail_pid = os.getpid()
+        added = self._read_tail()
+        if truncate_torn:
+            # Torn trailing record from a crash mid-append: it is the only
+            # thing past the tail's position (appenders are locked out), so
+            # drop it and let the next append start on a clean line
+            valid_bytes = self._tail.tell()
+            if valid_bytes < os.fstat(self._tail.fileno()).st_size:
+                os.truncate(self.journal_path, valid_bytes)
+        return added
+
+    def _read_tail(self):
+        added = []
+        start = self._tail.tell()
+        data = self._tail.read()
+        # A trailing line without its newline is still being written; read it next time
+        complete = data.rfind(b"\n") + 1
+        offset = 0
+        while offset < complete:
+            end = data.index(b"\n", offset) + 1
+            line, offset = data[offset:end], end
+            try:
+                candidate = json.loads(line)
+            except json.JSONDecodeError:
+                # A record torn by a writer that died, with later records
+                # appended after it: skip just that line
+                _skip_corrupt(self.journal_path, line)
+                continue
+            self._journal_records += 1
+            if self._current(candidate["id"]) != candidate:
+                self._insert(candidate)
+                added.append(candidate)
+        self._tail.seek(start + offset)
+        return added
+
+    def _current(self, candidate_id):
+        idx = self._by_id.get(candidate_id)
+        return self._candidates[idx] if idx is not None else None
+
+    def sync(self):
+        # Picks up records appended by other processes since the last sync
+        with self._lock:
+            if self._tail is not None and self._tail_pid != os.getpid():
+                # A forked worker must not share the file offset with its siblings
+                position = self._tail.tell()
+                inode = os.fstat(self._tail.fileno()).st_ino
+                self._tail.close()
+                self._tail = None
+                try:
+                    tail = open(self.journal_path, 'rb')
+                except FileNotFoundError:
+                    tail = None
+                if tail is None or os.fstat(tail.fileno()).st_ino != inode:
+                    # Rotated since the fork
+                    if tail is not None:
+                        tail.close()
+                    return self._catch_up()
+                tail.seek(position)
+                self._tail, self._tail_pid = tail, os.getpid()
+            added = self._read_tail() if self._tail is not None else []
+            try:
+                current = os.stat(self.journal_path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current is not None and (self._tail is None or current != os.fstat(self._tail.fileno()).st_ino):
+                self._flock(JOURNAL_LOCK, file_lock.LOCK_SH)
+                try:
+                    missed = self._generation() - self._tail_generation > (1 if self._tail is not None else 0)
+                    if not missed:
+                        added += self._open_tail()
+                finally:
+                    self._flock(JOURNAL_LOCK, file_lock.LOCK_UN)
+                if missed:
+                    # More than one rotation since we last looked; the
+                    # records in between now live only in the snapshot
+                    self._notify(added)
+                    return len(added) + self._catch_up()
+            self._synced_at = time.monotonic()
+            self._notify(added)
+        return len(added)
+
+    def _notify(self, added):
+        if added:
+            for subscriber in self._subscribers:
+                subscriber.add_many(added)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+        elif self.sync_interval and time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def _insert(self, candidate):
+        candidate_id = candidate["id"]
+        if candidate_id in self._by_id:
+            self._candidates[self._by_id[candidate_id]] = candidate
+        else:
+            self._by_id[candidate_id] = len(self._candidates)
+            self._candidates.append(candidate)
+
+    def get(self, candidate_id):
+        self._ensure_loaded()
+        idx = self._by_id.get(candidate_id)
+        return self._candidates[idx] if idx is not None else None
+
+    def get_many(self, candidate_ids):
+        self._ensure_loaded()
+        with self._lock:
+            return [self._current(candidate_id) for candidate_id in candidate_ids]
+
+    def all(self):
+        self._ensure_loaded()
+        return list(self._candidates)
+
+    @property
+    def version(self):
+        # Changes whenever a record is applied. Derived from the snapshot
+        # loaded, the journal generation and the read offset rather than a
+        # local counter, so worker processes agree on it and it survives restarts.
+        self._ensure_loaded()
+        with self._lock:
+            offset = self._tail.tell() if self._tail is not None else 0
+            return f"{self._snapshot_stamp:x}-{self._tail_generation}-{offset}"
+
+    def page(self, after=None, limit=None):
+        # Candidates in insertion order following the one with id `after`;
+        # returns (page, next_cursor), next_cursor None on the last page
+        self._ensure_loaded()
+        with self._lock:
+            start = 0
+            if after is not None:
+                idx = self._by_id.get(after)
+                if idx is None:
+                    raise KeyError(after)
+                start = idx + 1
+            end = len(self._candidates) if limit is None else min(len(self._candidates), start + limit)
+            page = self._candidates[start:end]
+            return page, (page[-1]["id"] if page and end < len(self._candidates) else None)
+
+    def versioned_page(self, after=None, limit=None):
+        # page() with the version it was read at, taken together so an ETag
+        # built from the version describes exactly these records. Records
+        # are replaced rather than changed in place, so the page stays as
+        # read while a response is streamed from it.
+        with self._lock:
+            page, next_cursor = self.page(after, limit)
+            return self.version, page, next_cursor
+
+    def add(self, candidate):
+        self.add_many([candidate])
+        return candidate
+
+    def add_many(self, candidates, compact=True):
+        # One locked journal write and one fsync for the whole batch. Bulk
+        # loaders pass compact=False and call maybe_compact() once at the end,
+        # rather than compacting a growing snapshot over and over.
+        self._ensure_loaded()
+        with self._lock:
+            if self._append_journal(candidates):
+                # Our records landed right after everything the tail has read,
+                # so they are applied directly rather than parsed back
+                added = []
+                for candidate in candidates:
+                    self._journal_records += 1
+                    if self._current(candidate["id"]) != candidate:
+                        self._insert(candidate)
+                        added.append(candidate)
+                self._notify(added)
+            else:
+                # Reading our own records back through the tail also applies
+                # anything other processes appended before them, in journal order
+                self.sync()
+            if compact:
+                self.maybe_compact()
+        return len(candidates)
+
+    def _append_journal(self, candidates):
+        # Returns True if the tail was caught up to the end of the journal
+        # just before our write and has been moved past it
+        self._flock(JOURNAL_LOCK, file_lock.LOCK_EX)
+        try:
+            if self._journal is not None:
+                # Another process may have rotated the journal for compaction
+                try:
+                    rotated = os.stat(self.journal_path).st_ino != os.fstat(self._journal.fileno()).st_ino
+                except FileNotFoundError:
+                    rotated = True
+                if rotated:
+                    self._journal.close()
+                    self._journal = None
+            if self._journal is None:
+                self.journal_path.parent.mkdir(exist_ok=True)
+                self._journal = open(self.journal_path, 'a')
+            journal_stat = os.fstat(self._journal.fileno())
+            if journal_stat.st_size and self._ends_torn(journal_stat.st_size):
+                # Another writer died mid-record; end its line so ours parse
+                self._journal.write("\n")
+                self._journal.flush()
+                journal_stat = os.fstat(self._journal.fileno())
+            direct = (self._tail is not None and self._tail_pid == os.getpid()
+                      and os.fstat(self._tail.fileno()).st_ino == journal_stat.st_ino)
+            if direct:
+                # Apply what other processes appended first; appenders are locked out
+                self._notify(self._read_tail())
+                direct = self._tail.tell() == journal_stat.st_size
+            self._journal.write("".join(json.dumps(candidate) + "\n" for candidate in candidates))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            if direct:
+                self._tail.seek(os.fstat(self._journal.fileno()).st_size)
+            return direct
+        finally:
+            self._flock(JOURNAL_LOCK, file_lock.LOCK_UN)
+
+    def _ends_torn(self, size):
+        with open(self.journal_path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) != b"\n"
+
+    def maybe_compact(self):
+        with self._lock:
+            threshold = max(self.compact_min_records, int(len(self._candidates) * self.compact_ratio))
+            if self._journal_records < threshold:
+                return
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._start_compaction()
+
+    def _start_compaction(self):
+        # Rotate the journal under the locks so later appends (from any
+        # process) land in a fresh file, then fold it into the snapshot in
+        # the background. The compaction lock is held until that finishes.
+        try:
+            self._flock(COMPACTION_LOCK, file_lock.LOCK_EX | file_lock.LOCK_NB)
+        except OSError:
+            # Another process is compacting
+            return False
+        self._flock(JOURNAL_LOCK, file_lock.LOCK_EX)
+        try:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self.journal_path.exists() and not self.compacting_path.exists():
+                os.replace(self.journal_path, self.compacting_path)
+                file_lock.pwrite(self._lock_fd, (self._generation() + 1).to_bytes(8, "little"), GENERATION_OFFSET)
+        finally:
+            self._flock(JOURNAL_LOCK, file_lock.LOCK_UN)
+        self._journal_records = 0
+        self._compaction = threading.Thread(target=self._compact_in_background, daemon=True)
+        self._compaction.start()
+        return True
+
+    def _compact_in_background(self):
+        try:
+            self._write_snapshot()
+        finally:
+            self._flock(COMPACTION_LOCK, file_lock.LOCK_UN)
+
+    def _write_snapshot(self):
+        # Built from disk rather than from memory, so records appended by
+        # other worker processes are never dropped from the snapshot
+        started = time.perf_counter()
+        merged = CandidateStore(self.file_path, sync_interval=0)
+        for candidate in load_json(self.file_path):
+            merged._insert(candidate)
+        merged._replay_file(self.compacting_path)
+        save_json(merged._candidates, self.file_path, one_per_line=True)
+        try:
+            os.remove(self.compacting_path)
+        except FileNotFoundError:
+            pass
+        STORE_SECONDS.observe(time.perf_counter() - started, "compact")
+
+    def _wait_for_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def compact(self):
+        self._ensure_loaded()
+        with self._lock:
+            self._wait_for_compaction()
+            self._start_compaction()
+            self._wait_for_compaction()
+
+    def close(self):
+        with self._lock:
+            self._wait_for_compaction()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._tail is not None:
+                self._tail.close()
+                self._tail = None
+
+    def __contains__(self, candidate_id):
+        self._ensure_loaded()
+        return candidate_id in self._by_id
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._candidates)
+
+# Shared instance used by routers and agents
+candidate_store = CandidateStore()
+gauge("hr_ai_candidates", "Candidates in the store.", fn=lambda: len(candidate_store))
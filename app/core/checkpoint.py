@@ -0,0 +1,187 @@
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from app.core.q_table import QTable
+from app.core.telemetry import counter
+
+# Binary layout: 64-byte header, then int64 keys[capacity], then
+# float32 values[capacity x n_actions], so both arrays can be memory-mapped
+MAGIC = b"HRQT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQIQQd")
+HEADER_SIZE = 64
+CHECKPOINT_RE = re.compile(r"^checkpoint-(\d+)\.bin$")
+
+SUPERSEDED = counter("hr_ai_rl_checkpoints_superseded_total",
+                     "Checkpoints withdrawn because another process published a newer one first.")
+log = logging.getLogger(__name__)
+
+def checkpoint_path(directory, version):
+    return Path(directory) / f"checkpoint-{version:08d}.bin"
+
+def write_checkpoint(q_table, path, version):
+    # Never replaces an existing file: the finished file is hard-linked into
+    # place, so a second writer that picked the same version gets
+    # FileExistsError instead of silently overwriting the first
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, version, q_table.n_actions,
+                         q_table.capacity, q_table.size, time.time())
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(np.ascontiguousarray(q_table.keys, dtype=np.int64).tobytes())
+            f.write(np.ascontiguousarray(q_table.values, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp_path, path)
+    finally:
+        os.remove(tmp_path)
+    return path
+
+def read_checkpoint(path, mmap=True):
+    with open(path, 'rb') as f:
+        magic, fmt, version, n_actions, capacity, size, created = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint file: {path}")
+    values_offset = HEADER_SIZE + capacity * 8
+    if mmap:
+        # Copy-on-write mapping: startup cost is independent of table size and
+        # later updates stay private to this process
+        keys = np.memmap(path, dtype=np.int64, mode='c', offset=HEADER_SIZE, shape=(capacity,))
+        values = np.memmap(path, dtype=np.float32, mode='c', offset=values_offset, shape=(capacity, n_actions))
+    else:
+        keys = np.fromfile(path, dtype=np.int64, count=capacity, offset=HEADER_SIZE)
+        values = np.fromfile(path, dtype=np.float32, count=capacity * n_actions, offset=values_offset)
+        values = values.reshape(capacity, n_actions)
+    return QTable.from_arrays(keys, values, size), version
+
+def list_checkpoints(directory):
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    found = []
+    for path in directory.iterdir():
+        match = CHECKPOINT_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+class RLCheckpointer:
+    # The version of the table being served is kept on the model
+    # (rl_model.checkpoint_version). Periodic and shutdown checkpoints never
+    # supersede a newer checkpoint written by another process (e.g. the replay
+    # trainer): that one stays the latest until it is promoted or the API restarts.
+    def __init__(self, rl_model, directory, interval=60.0, keep=3):
+        self.rl_model = rl_model
+        self.directory = Path(directory)
+        self.interval = interval
+        self.keep = keep
+        self.superseded_by = None
+        self._saved_updates = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.rl_model.checkpoint_version
+
+    def latest_version(self):
+        checkpoints = list_checkpoints(self.directory)
+        return checkpoints[-1][0] if checkpoints else 0
+
+    def promote(self, version=None, mmap=True):
+        # Loads a checkpoint (the latest by default) into the running model
+        with self._write_lock:
+            checkpoints = dict(list_checkpoints(self.directory))
+            if version is None:
+                version = max(checkpoints, default=None)
+            if version not in checkpoints:
+                raise FileNotFoundError(f"No checkpoint {version} in {self.directory}")
+            path = checkpoints[version]
+            q_table, _ = read_checkpoint(path, mmap=mmap)
+            self.rl_model.load_q_table(q_table)
+            self.rl_model.checkpoint_version = version
+            self._saved_updates = self.rl_model.update_count
+            self.superseded_by = None
+            return path
+
+    def restore_latest(self, mmap=True):
+        try:
+            return self.promote(mmap=mmap)
+        except FileNotFoundError:
+            return None
+
+    def checkpoint(self, force=False):
+        # force: write even without new updates, and even over a newer table
+        # from another process (used by the replay trainer)
+        with self._write_lock:
+            q_table, update_count = self.rl_model.snapshot()
+            if not force and update_count == self._saved_updates:
+                return None
+            base = self.rl_model.checkpoint_version
+            version = self.latest_version()
+            while True:
+                if not force and version > base:
+                    return self._superseded(version)
+                version += 1
+                try:
+                    path = write_checkpoint(q_table, checkpoint_path(self.directory, version), version)
+                    break
+                except FileExistsError:
+                    version = max(version, self.latest_version())
+            if not force:
+                # Another writer may have published between our listing and our
+                # link; if so, its table is the newer one and ours is withdrawn
+                foreign = [v for v, _ in list_checkpoints(self.directory) if base < v < version]
+                if foreign:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    return self._superseded(foreign[-1])
+            self.rl_model.checkpoint_version = version
+            self._saved_updates = update_count
+            self.superseded_by = None
+            self._prune()
+            return path
+
+    def _superseded(self, version):
+        if self.superseded_by != version:
+            SUPERSEDED.inc()
+            log.warning("Checkpoint %s was written by another process; not overwriting it "
+                        "(POST /rl/checkpoints/promote to serve it)", version)
+        self.superseded_by = version
+        return None
+
+    def _prune(self):
+        for _, path in list_checkpoints(self.directory)[:-self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Still mapped by another process on platforms that forbid this
+                pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.checkpoint()
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rl-checkpointer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.checkpoint()
@@ -0,0 +1,416 @@
+"""
+Near-duplicate candidate detection with MinHash and LSH.
+
+    python -m app.core.dedupe                              # cluster the whole pool
+    python -m app.core.dedupe --threshold 0.7 --out data/duplicates.json
+
+A candidate's features are the character trigrams of each word of its name
+plus its skills. Two candidates are near-duplicates when the Jaccard
+similarity of their features reaches the threshold (DEDUPE_THRESHOLD).
+/candidate/add and the bulk import check new rows against the shared index.
+This job clusters the existing pool instead, checking every candidate
+against the ones it shares the most LSH buckets with, and reports every
+cluster with its oldest (lowest) id as the canonical record.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from itertools import chain
+import numpy as np
+from config import DEDUPE_BANDS, DEDUPE_POLICY, DEDUPE_ROWS, DEDUPE_THRESHOLD
+from app.core.candidate_store import candidate_store
+from app.core.telemetry import counter, gauge, histogram
+
+POLICIES = ("off", "flag", "reject", "merge")
+HASH_MASK = 0xFFFFFFFF
+# Single-row inserts are buffered and merged into the sorted key array in
+# batches of this many rows
+PENDING_MAX = 4096
+# Buckets bigger than this (a very common name or skill set) are skipped;
+# true duplicates still share most of their other bands
+BUCKET_LIMIT = 256
+# Most-colliding rows whose similarity is actually computed, per lookup
+MAX_VERIFY = 20
+# Features hashed per vectorized MinHash block, and candidates indexed per batch
+BLOCK_FEATURES = 1 << 16
+INSERT_BATCH = 1 << 14
+NON_WORD = re.compile(r"\W+")
+TRIGRAMS = [slice(i, i + 3) for i in range(256)]
+
+DUPLICATES = counter("hr_ai_dedupe_duplicates_total", "Near-duplicate candidates found on add/import, by action.",
+                     ("action",))
+LOOKUP_SECONDS = histogram("hr_ai_dedupe_lookup_seconds", "Near-duplicate lookup time per add/import batch.")
+
+def _fold(text):
+    # Lowercase with accents stripped, so "José" and "jose" agree
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+# Names and skills repeat across a pool, so their features are cached
+@lru_cache(maxsize=1 << 16)
+def _name_features(name):
+    features = []
+    for word in NON_WORD.sub(" ", _fold(name)).split():
+        word = f"<{word[:250]}>"
+        features += [word[s] for s in TRIGRAMS[:len(word) - 2]]
+    return frozenset(features)
+
+@lru_cache(maxsize=1 << 16)
+def _skill_feature(skill):
+    return "skill:" + _fold(skill.strip())
+
+def candidate_features(candidate):
+    name = candidate.get("name")
+    features = set(_name_features(name)) if isinstance(name, str) else set()
+    features.update(_skill_feature(s) for s in candidate.get("skills", ()) if isinstance(s, str) and s.strip())
+    return features
+
+def jaccard(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if a and b else 0.0
+
+class MinHasher:
+    # bands x rows MinHash functions from the multiply-shift family,
+    # (a * x + b) >> 32 in wrapping 64-bit arithmetic with odd a, applied
+    # to 32-bit feature hashes; the shift is taken after the minimum, which
+    # it does not change. Each band's rows are folded into one
+    # 32-bit bucket key. Features are hashed with hash(), so keys are only
+    # comparable within a process and the processes forked from it.
+    def __init__(self, bands=DEDUPE_BANDS, rows=DEDUPE_ROWS, seed=0x5EED):
+        rng = np.random.default_rng(seed)
+        self.bands, self.rows = bands, rows
+        size = bands * rows
+        self._a = (rng.integers(0, 2**64, size, dtype=np.uint64, endpoint=False) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, 2**64, size, dtype=np.uint64, endpoint=False)[:, None]
+        self._mix = rng.integers(0, 2**64, rows, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._tags = np.arange(bands, dtype=np.uint64) << np.uint64(32)
+
+    def band_keys(self, feature_sets):
+        # (len(feature_sets), bands) bucket keys, each tagged with its band in
+        # the high 32 bits so all bands share one key space; every feature
+        # set must be non-empty
+        n = len(feature_sets)
+        lengths = np.fromiter(map(len, feature_sets), dtype=np.int64, count=n)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        flat = np.fromiter(map(hash, chain.from_iterable(feature_sets)), dtype=np.int64, count=int(ends[-1]))
+        flat = flat.view(np.uint64) & np.uint64(HASH_MASK)
+        signatures = np.empty((n, self.bands * self.rows), dtype=np.uint32)
+        i = 0
+        while i < n:
+            # Whole candidates, about BLOCK_FEATURES features at a time
+            j = max(i + 1, int(np.searchsorted(ends, starts[i] + BLOCK_FEATURES, "right")))
+            values = self._a * flat[starts[i]:ends[j - 1]] + self._b
+            signatures[i:j] = (np.minimum.reduceat(values, starts[i:j] - starts[i], axis=1) >> np.uint64(32)).T
+            i = j
+        folded = (signatures.reshape(n, self.bands, self.rows).astype(np.uint64) * self._mix).sum(axis=2)
+        return (folded >> np.uint64(32)) | self._tags
+
+def _probe(keys, values, queries):
+    # (query index, value) for every entry of the sorted `keys` equal to a
+    # query key, skipping buckets over BUCKET_LIMIT
+    lo = np.searchsorted(keys, queries, "left")
+    counts = np.searchsorted(keys, queries, "right") - lo
+    counts[counts > BUCKET_LIMIT] = 0
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64), values[:0]
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+    return np.repeat(np.arange(len(queries)), counts), values[offsets]
+
+def _bucket_pairs(keys, rows):
+    # Every pair of rows sharing a sorted band key, in buckets of at most
+    # BUCKET_LIMIT rows, as unique (low row << 32 | high row) with the
+    # number of bands they share
+    rows = rows.astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    position = np.arange(len(rows)) - np.repeat(starts, sizes)
+    size = np.repeat(np.where(sizes > BUCKET_LIMIT, 1, sizes), sizes)
+    pairs = [np.empty(0, dtype=np.int64)]
+    first = np.flatnonzero(size > 1)
+    for gap in range(1, int(size.max(initial=1))):
+        first = first[position[first] + gap < size[first]]
+        a, b = rows[first], rows[first + gap]
+        pairs.append(np.minimum(a, b) << 32 | np.maximum(a, b))
+    return np.unique(np.concatenate(pairs), return_counts=True)
+
+def _most_colliding(pairs, shared, k):
+    # Indices of the pairs among either row's k most-shared pairs, most
+    # shared first
+    ends = np.concatenate([pairs >> 32, pairs & HASH_MASK])
+    order = np.lexsort((-np.tile(shared, 2), ends))
+    ends = ends[order]
+    starts = np.flatnonzero(np.r_[True, ends[1:] != ends[:-1]])
+    rank = np.empty(len(ends), dtype=np.int64)
+    rank[order] = np.arange(len(ends)) - np.repeat(starts, np.diff(np.r_[starts, len(ends)]))
+    kept = np.flatnonzero((rank < k).reshape(2, -1).any(axis=0))
+    return kept[np.argsort(-shared[kept], kind="stable")]
+
+# MinHash/LSH index over the candidate pool, kept current as a store
+# subscriber. Rows are append-only like the match engine's: a re-added
+# candidate gets a new row and its old one is ignored from then on. The
+# band-tagged bucket keys of every row sit in one sorted array alongside
+# their rows, so a lookup is one vectorized binary search; inserts are
+# buffered and merged in batches.
+class DuplicateIndex:
+    def __init__(self, threshold=DEDUPE_THRESHOLD, bands=DEDUPE_BANDS, rows=DEDUPE_ROWS):
+        self.threshold = threshold
+        self.hasher = MinHasher(bands, rows)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        bands = self.hasher.bands
+        self._records = []
+        self._rows = {}
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._key_rows = np.empty(0, dtype=np.int32)
+        self._pending = np.empty((PENDING_MAX, bands), dtype=np.uint64)
+        self._pending_rows = np.empty(PENDING_MAX, dtype=np.int32)
+        self._n_pending = 0
+
+    def rebuild(self, candidates):
+        with self._lock:
+            self._reset()
+            for i in range(0, len(candidates), INSERT_BATCH):
+                self._insert(candidates[i:i + INSERT_BATCH])
+
+    def add_many(self, candidates):
+        with self._lock:
+            for i in range(0, len(candidates), INSERT_BATCH):
+                self._insert(candidates[i:i + INSERT_BATCH])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _insert(self, candidates):
+        indexed, feature_sets = [], []
+        for candidate in candidates:
+            features = candidate_features(candidate)
+            if features:
+                indexed.append(candidate)
+                feature_sets.append(features)
+            else:
+                self._rows.pop(candidate["id"], None)
+        if not indexed:
+            return
+        keys = self.hasher.band_keys(feature_sets)
+        first = len(self._records)
+        for row, candidate in enumerate(indexed, first):
+            self._rows[candidate["id"]] = row
+        self._records.extend(indexed)
+        rows = np.arange(first, first + len(indexed), dtype=np.int32)
+        if self._n_pending + len(indexed) > PENDING_MAX:
+            self._merge(keys, rows)
+        else:
+            self._pending[self._n_pending:self._n_pending + len(indexed)] = keys
+            self._pending_rows[self._n_pending:self._n_pending + len(indexed)] = rows
+            self._n_pending += len(indexed)
+
+    def _merge(self, keys=None, rows=None):
+        # Folds the pending rows (and keys/rows, if given) into the sorted keys
+        n = self._n_pending
+        if keys is not None:
+            keys = np.concatenate([self._pending[:n], keys])
+            rows = np.concatenate([self._pending_rows[:n], rows])
+        else:
+            keys, rows = self._pending[:n], self._pending_rows[:n]
+        keys, rows = keys.ravel(), np.repeat(rows, self.hasher.bands)
+        order = np.argsort(keys, kind="stable")
+        at = np.searchsorted(self._keys, keys[order], "right")
+        self._keys = np.insert(self._keys, at, keys[order])
+        self._key_rows = np.insert(self._key_rows, at, rows[order])
+        self._n_pending = 0
+
+    def _colliding(self, keys):
+        # (query index, row, bands shared) for indexed rows sharing a bucket with each query
+        q, r = _probe(self._keys, self._key_rows, keys.ravel())
+        queries, rows = [q // self.hasher.bands], [r]
+        n = self._n_pending
+        if n:
+            shared = (self._pending[None, :n, :] == keys[:, None, :]).sum(axis=2)
+            q, p = np.nonzero(shared)
+            # Repeated once per shared band, like the sorted bands' hits
+            counts = shared[q, p]
+            queries.append(np.repeat(q, counts))
+            rows.append(np.repeat(self._pending_rows[p], counts))
+        queries, rows = np.concatenate(queries), np.concatenate(rows).astype(np.int64)
+        pairs, shared = np.unique(queries << 32 | rows, return_counts=True)
+        return pairs >> 32, pairs & HASH_MASK, shared
+
+    def find_many(self, candidates):
+        # For each candidate, [(id, similarity)] of indexed candidates, and of
+        # earlier candidates in the same list, at or above the threshold;
+        # most similar first. A candidate never matches its own id.
+        start = time.perf_counter()
+        features = [candidate_features(c) for c in candidates]
+        found = [[] for _ in candidates]
+        live = [i for i, f in enumerate(features) if f]
+        if not live:
+            return found
+        keys = self.hasher.band_keys([features[i] for i in live])
+        with self._lock:
+            if len(live) > 16 and self._n_pending:
+                # One merge beats comparing a big batch against the buffer
+                self._merge()
+            queries, rows, shared = self._colliding(keys)
+            checks = self._shortlist(queries, rows, shared, lambda row: self._records[row]
+                                     if self._rows.get(self._records[row]["id"]) == row else None)
+        if len(live) > 1:
+            # Earlier rows of the same batch: probe the batch's own sorted keys
+            flat = keys.ravel()
+            order = np.argsort(flat, kind="stable")
+            q, r = _probe(flat[order], order // self.hasher.bands, flat)
+            q //= self.hasher.bands
+            pairs, shared = np.unique((q << 32 | r)[r < q], return_counts=True)
+            checks += self._shortlist(pairs >> 32, pairs & HASH_MASK, shared, lambda row: candidates[live[row]])
+        for query, record in checks:
+            i = live[query]
+            if record["id"] == candidates[i]["id"]:
+                continue
+            similarity = jaccard(features[i], candidate_features(record))
+            if similarity >= self.threshold:
+                found[i].append((record["id"], round(similarity, 4)))
+        for matches in found:
+            # One entry per id, e.g. if a batch row also exists in the index
+            matches[:] = sorted(dict(sorted(matches, key=lambda m: m[1])).items(), key=lambda m: (-m[1], m[0]))
+        LOOKUP_SECONDS.observe(time.perf_counter() - start)
+        return found
+
+    @staticmethod
+    def _shortlist(queries, rows, shared, record_of):
+        # (query, record) for the MAX_VERIFY rows sharing the most bands with each query
+        order = np.lexsort((-shared, queries))
+        queries, rows = queries[order], rows[order]
+        rank = np.arange(len(queries)) - np.searchsorted(queries, queries, "left")
+        checks = []
+        for query, row in zip(queries[rank < MAX_VERIFY].tolist(), rows[rank < MAX_VERIFY].tolist()):
+            record = record_of(row)
+            if record is not None:
+                checks.append((query, record))
+        return checks
+
+    def find(self, candidate):
+        return self.find_many([candidate])[0]
+
+    def clusters(self, threshold=None):
+        # Groups of near-duplicate ids across the whole index, as
+        # [{"canonical": lowest id, "members": [ids]}]. As in find(), each
+        # row is checked against its MAX_VERIFY most-colliding partners in
+        # buckets of at most BUCKET_LIMIT rows, and linked (single linkage).
+        # This scans the whole pool (about 40s for 200k candidates on one
+        # core), so it runs in the batch job, never in a request.
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            if self._n_pending:
+                self._merge()
+            keys, rows = self._keys, self._key_rows
+            records = self._records
+            alive = np.zeros(len(records), dtype=bool)
+            alive[np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))] = True
+        # Rows of re-added candidates are dropped before pairing
+        pairs, shared = _bucket_pairs(keys[alive[rows]], rows[alive[rows]])
+        pairs = pairs[_most_colliding(pairs, shared, MAX_VERIFY)]
+        features = lru_cache(maxsize=65536)(lambda row: candidate_features(records[row]))
+        parent = {}
+
+        def root(row):
+            parent.setdefault(row, row)
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        for a, b in zip((pairs >> 32).tolist(), (pairs & HASH_MASK).tolist()):
+            ra, rb = root(a), root(b)
+            if ra != rb and jaccard(features(a), features(b)) >= threshold:
+                parent[max(ra, rb)] = min(ra, rb)
+        groups = {}
+        for row in parent:
+            groups.setdefault(root(row), []).append(records[row]["id"])
+        clusters = [sorted(ids) for ids in groups.values() if len(ids) > 1]
+        return sorted(({"canonical": ids[0], "members": ids} for ids in clusters), key=lambda c: c["canonical"])
+
+def merge_records(target, duplicate):
+    # The older record keeps its id and name; skills are unioned in order,
+    # ignoring case and accents
+    skills = {}
+    for skill in [*target.get("skills", []), *duplicate.get("skills", [])]:
+        skills.setdefault(_skill_feature(skill), skill)
+    return {**target, "skills": list(skills.values()),
+            "match_score": max(target.get("match_score", 0.0), duplicate.get("match_score", 0.0))}
+
+def resolve_duplicates(candidates, policy=DEDUPE_POLICY, index=None, store=None):
+    # Applies a duplicate policy to candidates about to be written. Returns
+    # (records to write, outcome per candidate); an outcome is None or
+    # {"action", "duplicates"[, "merged_into"]}. "flag" writes everything,
+    # "reject" drops candidates that duplicate an existing or earlier one,
+    # "merge" folds them into the most similar one instead of adding an id.
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown duplicate policy {policy!r}, expected one of {', '.join(POLICIES)}")
+    if policy == "off":
+        return list(candidates), [None] * len(candidates)
+    index = index or duplicate_index
+    store = store or candidate_store
+    writes, redirect, outcomes = {}, {}, []
+    for candidate, matches in zip(candidates, index.find_many(candidates)):
+        if not matches:
+            writes[candidate["id"]] = candidate
+            outcomes.append(None)
+            continue
+        duplicates = [{"id": candidate_id, "similarity": similarity} for candidate_id, similarity in matches]
+        outcome = {"action": {"flag": "flagged", "reject": "rejected", "merge": "merged"}[policy],
+                   "duplicates": duplicates}
+        if policy == "flag":
+            writes[candidate["id"]] = candidate
+        elif policy == "merge":
+            # An earlier batch row may itself have been merged away
+            target_id = redirect.get(matches[0][0], matches[0][0])
+            target = writes.get(target_id) or store.get(target_id)
+            if target is None:
+                writes[candidate["id"]] = candidate
+                outcome["action"] = "flagged"
+            else:
+                writes[target_id] = merge_records(target, candidate)
+                redirect[candidate["id"]] = target_id
+                outcome["merged_into"] = target_id
+        DUPLICATES.inc(outcome["action"])
+        outcomes.append(outcome)
+    return list(writes.values()), outcomes
+
+# Shared index over the store's candidates
+duplicate_index = candidate_store.subscribe(DuplicateIndex())
+gauge("hr_ai_dedupe_indexed_candidates", "Candidates in the near-duplicate index.", fn=lambda: len(duplicate_index))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=DEDUPE_THRESHOLD, help="Minimum Jaccard similarity")
+    parser.add_argument("--out", help="Write the clusters here as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    candidate_store.load()
+    loaded = time.perf_counter()
+    clusters = duplicate_index.clusters(args.threshold)
+    elapsed = time.perf_counter() - loaded
+    candidate_store.close()
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(clusters, f, indent=2)
+    duplicates = sum(len(c["members"]) - 1 for c in clusters)
+    for cluster in clusters[:20]:
+        print(f"[Dedupe] {cluster['canonical']}: {cluster['members']}")
+    print(f"[Dedupe] {len(duplicate_index):,} candidates indexed in {loaded - start:.2f}s, clustered in {elapsed:.2f}s: "
+          f"{len(clusters):,} clusters, {duplicates:,} redundant records"
+          f"{f', written to {args.out}' if args.out else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Byte-range file locks and positioned reads/writes for state shared between
+# worker processes. Without fcntl (Windows) the locks are no-ops and the data
+# directory must be used by a single process, which is how run_fastapi.py
+# runs there (no forked workers); thread-level locks still apply.
+CROSS_PROCESS = fcntl is not None
+if fcntl is not None:
+    LOCK_SH, LOCK_EX, LOCK_NB, LOCK_UN = fcntl.LOCK_SH, fcntl.LOCK_EX, fcntl.LOCK_NB, fcntl.LOCK_UN
+else:
+    LOCK_SH, LOCK_EX, LOCK_NB, LOCK_UN = 1, 2, 4, 8
+
+_seek_lock = threading.Lock()
+
+def open_fd(path, mode=0o644):
+    return os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), mode)
+
+def lockf(fd, cmd, length=0, start=0):
+    if fcntl is not None:
+        fcntl.lockf(fd, cmd, length, start)
+
+def pread(fd, size, offset):
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+def pwrite(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        return os.pwrite(fd, data, offset)
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
@@ -0,0 +1,230 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    channel TEXT NOT NULL,
+    action TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (channel, status, next_attempt_at);
+"""
+
+class PermanentError(Exception):
+    # Raised by a transport when retrying cannot help; the job is dead-lettered at once
+    pass
+
+def _row_to_job(row):
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+# Durable outbound job queue on SQLite. Each channel is drained by its own
+# pool of worker threads, so a slow provider only holds up its own channel.
+# Jobs move queued -> running -> done, or back to queued with exponential
+# backoff on failure, and to dead once max_attempts is used up.
+class JobQueue:
+    def __init__(self, db_path="data/outbound_jobs.db", transports=None, workers=None,
+                 max_attempts=5, backoff_base=1.0, backoff_max=60.0, lease_seconds=300.0):
+        self.db_path = Path(db_path)
+        self.transports = transports or {}
+        self.workers = workers or {}
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # A running job not finished within its lease is assumed lost with
+        # its worker process and handed out again
+        self.lease_seconds = lease_seconds
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._wake = {}
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def _db(self):
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, channel, action, candidate_id, payload=None, idempotency_key=None):
+        # Returns (job, created); a repeated idempotency key returns the original job
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._db_lock:
+            db = self._db()
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO jobs (id, idempotency_key, channel, action, candidate_id, payload, status,"
+                " max_attempts, next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, idempotency_key, channel, action, candidate_id, json.dumps(payload or {}),
+                 self.max_attempts, now, now, now))
+            created = cursor.rowcount == 1
+            if created:
+                row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            else:
+                row = db.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        if created:
+            self._notify(channel)
+        return _row_to_job(row), created
+
+    def get(self, job_id):
+        with self._db_lock:
+            row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list(self, status=None, channel=None, limit=100):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if channel:
+            clauses.append("channel = ?")
+            params.append(channel)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._db_lock:
+            rows = self._db().execute(f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+                                      (*params, limit)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def counts(self):
+        with self._db_lock:
+            rows = self._db().execute("SELECT channel, status, COUNT(*) FROM jobs GROUP BY channel, status").fetchall()
+        counts = {}
+        for channel, status, count in rows:
+            counts.setdefault(channel, {})[status] = count
+        return counts
+
+    def retry(self, job_id):
+        # Puts a dead-lettered job back on the queue with a fresh attempt budget
+        now = time.time()
+        with self._db_lock:
+            db = self._db()
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_attempt_at = ?, updated_at = ?"
+                " WHERE id = ? AND status = 'dead'", (now, now, job_id))
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if cursor.rowcount:
+            self._notify(row["channel"])
+        return _row_to_job(row) if row else None
+
+    def _claim(self, channel):
+        # Returns the next due job (now marked running) or the seconds until one is due
+        now = time.time()
+        with self._db_lock:
+            db = self._db()
+            # BEGIN IMMEDIATE takes the write lock up front, so workers in
+            # other processes cannot claim the same row between the SELECT
+            # and the UPDATE (no UPDATE ... RETURNING before SQLite 3.35)
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE channel = ? AND ((status = 'queued' AND next_attempt_at <= ?)"
+                    " OR (status = 'running' AND updated_at < ?)) ORDER BY next_attempt_at LIMIT 1",
+                    (channel, now, now - self.lease_seconds)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                               (now, row["id"]))
+                    row = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if row is not None:
+                return _row_to_job(row), None
+            due = db.execute("SELECT MIN(next_attempt_at) FROM jobs WHERE channel = ? AND status = 'queued'",
+                             (channel,)).fetchone()[0]
+        return None, (due - now if due is not None else None)
+
+    def _finish(self, job, status, error=None, result=None, next_attempt_at=None):
+        now = time.time()
+        with self._db_lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, last_error = ?, result = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (status, error, json.dumps(result) if result is not None else None,
+                 next_attempt_at or job["next_attempt_at"], now, job["id"]))
+
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        # Full jitter keeps retries from a provider outage from arriving in lockstep
+        return random.uniform(0, delay)
+
+    def process(self, job):
+        transport = self.transports[job["channel"]]
+        try:
+            result = transport(job["candidate_id"], **job["payload"])
+            if isinstance(result, dict) and result.get("status") == "failed":
+                raise PermanentError(result.get("reason", "failed"))
+        except PermanentError as e:
+            self._finish(job, "dead", error=str(e))
+        except Exception as e:
+            if job["attempts"] >= job["max_attempts"]:
+                self._finish(job, "dead", error=repr(e))
+            else:
+                self._finish(job, "queued", error=repr(e),
+                             next_attempt_at=time.time() + self._backoff(job["attempts"]))
+        else:
+            self._finish(job, "done", result=result)
+
+    def _notify(self, channel):
+        wake = self._wake.get(channel)
+        if wake is not None:
+            with wake:
+                wake.notify()
+
+    def _worker(self, channel):
+        wake = self._wake[channel]
+        while not self._stopping.is_set():
+            job, wait = self._claim(channel)
+            if job is not None:
+                self.process(job)
+                continue
+            with wake:
+                wake.wait(timeout=min(wait, 1.0) if wait is not None else 1.0)
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for channel in self.transports:
+            self._wake[channel] = threading.Condition()
+            for n in range(self.workers.get(channel, 1)):
+                thread = threading.Thread(target=self._worker, args=(channel,), name=f"outbound-{channel}-{n}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        for channel in self._wake:
+            wake = self._wake[channel]
+            with wake:
+                wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
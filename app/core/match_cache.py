@@ -0,0 +1,250 @@
+import csv
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from config import (JDS_PATH, MATCH_CACHE_MAX_BYTES, MATCH_CACHE_METHODS, MATCH_CACHE_PROMOTE_MISSES,
+                    MATCH_CACHE_REFRESH_INTERVAL, MATCH_CACHE_WORKERS)
+from app.core.match_engine import match_engine, tokenize
+from app.core.telemetry import counter, gauge
+
+# Requirement columns looked for in the job-descriptions CSV, in order
+JD_COLUMNS = ("requirements", "job_requirements", "skills", "description")
+# Ad-hoc JDs whose misses are counted towards promotion
+MISS_TRACKING_LIMIT = 10_000
+
+@lru_cache(maxsize=4096)
+def jd_hash(job_requirements):
+    # Scores depend only on the requirement token set, so JDs that differ in
+    # case, order or spacing share a column
+    key = "\x1f".join(sorted(tokenize(job_requirements)))
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+def load_job_descriptions(path=JDS_PATH):
+    # {jd_hash: requirements} from a CSV with a requirements, skills or
+    # description column; a missing file means no known JDs
+    try:
+        f = open(path, newline='', encoding='utf-8')
+    except FileNotFoundError:
+        return {}
+    with f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+        column = next((fields[c] for c in JD_COLUMNS if c in fields), None)
+        if column is None:
+            raise ValueError(f"{path} needs one of the columns {JD_COLUMNS}, got {reader.fieldnames}")
+        return {jd_hash(row[column]): row[column] for row in reader if tokenize(row[column] or "")}
+
+class _Column:
+    __slots__ = ("job", "scores", "generation", "layout")
+
+    def __init__(self, job, scores, generation, layout):
+        self.job = job
+        self.scores = scores
+        self.generation = generation
+        self.layout = layout
+
+# Materialized candidate x job-description scores, one column per
+# (jd_hash, method) indexed by match-engine row and evicted LRU by size.
+# Rows are append-only in the engine and a changed candidate moves to a new
+# row, so a cached row is never stale: updates land past the end of every
+# column and miss until the builder extends it with just the new rows.
+# tfidf scores move with the idf of the whole pool, so tfidf columns are
+# only used at the engine generation they were built for, and a store
+# rebuild renumbers rows, which the layout check catches. Columns of JDs
+# removed from or changed in JDS_PATH are dropped.
+class MatchCache:
+    def __init__(self, engine=match_engine, jds_path=JDS_PATH, max_bytes=MATCH_CACHE_MAX_BYTES,
+                 workers=MATCH_CACHE_WORKERS, methods=MATCH_CACHE_METHODS,
+                 refresh_interval=MATCH_CACHE_REFRESH_INTERVAL, promote_misses=MATCH_CACHE_PROMOTE_MISSES):
+        self.engine = engine
+        self.jds_path = Path(jds_path)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.methods = tuple(methods)
+        self.refresh_interval = refresh_interval
+        self.promote_misses = promote_misses
+        self._lock = threading.Lock()
+        self._columns = OrderedDict()
+        self._bytes = 0
+        self._jds = {}
+        self._jds_mtime = None
+        self._misses = {}
+        self._promoted = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def _usable(self, column, generation, layout, method):
+        return column.layout == layout and (method != "tfidf" or column.generation == generation)
+
+    def score(self, candidate_id, job_requirements, method="overlap"):
+        key = (jd_hash(job_requirements), method)
+        row, _, generation, layout = self.engine.row_state(candidate_id)
+        with self._lock:
+            column = self._columns.get(key)
+            if column is not None and row is not None and row < len(column.scores) \
+                    and self._usable(column, generation, layout, method):
+                self._columns.move_to_end(key)
+                self.hits += 1
+                return float(column.scores[row])
+            self.misses += 1
+            self._note_miss(key, job_requirements)
+        return self.engine.score_candidate(candidate_id, job_requirements, method)
+
+    def top_k(self, job_requirements, k=10, method="overlap"):
+        key = (jd_hash(job_requirements), method)
+        n_rows, generation, layout = self.engine.state()
+        with self._lock:
+            column = self._columns.get(key)
+            usable = column is not None and len(column.scores) == n_rows \
+                and self._usable(column, generation, layout, method)
+            if usable:
+                self._columns.move_to_end(key)
+        if usable:
+            try:
+                ranked = self.engine.rank(column.scores, k)
+            except ValueError:
+                # Candidates were added in between
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                return ranked
+        with self._lock:
+            self.misses += 1
+            self._note_miss(key, job_requirements)
+        return self.engine.top_k(job_requirements, k, method)
+
+    def _note_miss(self, key, job_requirements):
+        # JDs outside JDS_PATH that keep missing get a column built for them
+        if key in self._promoted or (key[0] in self._jds and key[1] in self.methods):
+            return
+        if len(self._misses) >= MISS_TRACKING_LIMIT:
+            self._misses.clear()
+        count = self._misses[key] = self._misses.get(key, 0) + 1
+        if count >= self.promote_misses:
+            del self._misses[key]
+            self._promoted[key] = job_requirements
+            self._wake.set()
+
+    def _drop(self, keys):
+        for key in keys:
+            column = self._columns.pop(key, None)
+            if column is not None:
+                self._bytes -= column.scores.nbytes
+                self.invalidations += 1
+
+    def _put(self, key, column):
+        if column.scores.nbytes > self.max_bytes:
+            return
+        replaced = self._columns.pop(key, None)
+        if replaced is not None:
+            self._bytes -= replaced.scores.nbytes
+        self._columns[key] = column
+        self._bytes += column.scores.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._columns.popitem(last=False)
+            self._bytes -= evicted.scores.nbytes
+            self.evictions += 1
+
+    def set_job_descriptions(self, jds):
+        # Drops the columns of JDs that are gone (a changed JD hashes anew)
+        with self._lock:
+            removed = self._jds.keys() - jds.keys()
+            self._jds = dict(jds)
+            self._drop([key for key in self._columns if key[0] in removed])
+        self._wake.set()
+
+    def _reload_job_descriptions(self):
+        try:
+            mtime = self.jds_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._jds_mtime:
+            self._jds_mtime = mtime
+            self.set_job_descriptions(load_job_descriptions(self.jds_path) if mtime is not None else {})
+
+    def refresh(self):
+        # One builder pass: extend overlap columns with rows added since they
+        # were built, drop stale ones, then build the missing columns of known
+        # and promoted JDs in the process pool
+        self._reload_job_descriptions()
+        n_rows, generation, layout = self.engine.state()
+        with self._lock:
+            self._drop([key for key, column in self._columns.items()
+                        if not self._usable(column, generation, layout, key[1])])
+            extend = [(key, column) for key, column in self._columns.items() if len(column.scores) < n_rows]
+            jobs = {key: self._jds[key[0]] for key in ((h, m) for h in self._jds for m in self.methods)
+                    if key not in self._columns}
+            jobs.update((key, job) for key, job in self._promoted.items() if key not in self._columns)
+            self._promoted.clear()
+        for key, column in extend:
+            scores, (_, _, extended_layout) = self.engine.score_rows(column.job, key[1], len(column.scores))
+            with self._lock:
+                if self._columns.get(key) is column and extended_layout == column.layout:
+                    column.scores = np.concatenate([column.scores, scores])
+                    self._bytes += scores.nbytes
+        if not jobs:
+            return
+        # Build no more columns than fit in the budget, so a pass never evicts
+        # what it just built
+        room = max(1, self.max_bytes // max(1, n_rows * 8))
+        keys = list(jobs)[:room]
+        start = time.perf_counter()
+        columns, (_, generation, layout) = self.engine.score_columns([(jobs[key], key[1]) for key in keys],
+                                                                      self.workers)
+        with self._lock:
+            for key, scores in zip(keys, columns):
+                self._put(key, _Column(jobs[key], scores, generation, layout))
+            self.builds += len(keys)
+            self.build_seconds += time.perf_counter() - start
+            for key in list(jobs)[room:]:
+                if key[0] not in self._jds:
+                    self._promoted[key] = jobs[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "columns": len(self._columns), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "evictions": self.evictions, "invalidations": self.invalidations,
+                    "known_jds": len(self._jds), "pending_promotions": len(self._promoted),
+                    "builds": self.builds, "build_seconds": round(self.build_seconds, 3)}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="match-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[MatchCache] refresh failed: {e}")
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+# Shared instance in front of the shared match engine
+match_cache = MatchCache()
+counter("hr_ai_match_cache_lookups_total", "Match cache lookups by result.", ("result",),
+        fn=lambda: {"hit": match_cache.hits, "miss": match_cache.misses})
+gauge("hr_ai_match_cache_bytes", "Bytes held by cached score columns.", fn=lambda: match_cache.stats()["bytes"])
@@ -0,0 +1,320 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from config import TFIDF_MODEL_PATH
+from app.core.candidate_store import candidate_store
+
+MODEL_FORMAT_VERSION = 1
+FINGERPRINT_MASK = (1 << 64) - 1
+
+# Index arrays handed to each score_columns pool worker
+_pool_index = None
+
+@lru_cache(maxsize=4096)
+def tokenize(text):
+    return frozenset(text.lower().split())
+
+def candidate_tokens(candidate):
+    return tokenize(" ".join(candidate.get("skills", [])))
+
+def candidate_hash(candidate):
+    key = f"{candidate['id']}\x1f" + "\x1f".join(candidate.get("skills", []))
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+# Sparse candidate x token matrix kept in both CSC form (per-token postings,
+# for scoring) and CSR form (per-row columns, for norms and single lookups).
+# Rows are append-only; re-adding a candidate retires its old row.
+# `generation` changes with every add and `layout` whenever rows are
+# renumbered, so row-indexed scores computed earlier can be checked.
+class MatchEngine:
+    def __init__(self, model_path=TFIDF_MODEL_PATH):
+        self.model_path = Path(model_path)
+        self._lock = threading.Lock()
+        self.generation = self.layout = 0
+        self._reset()
+
+    def _reset(self):
+        self.generation += 1
+        self.layout += 1
+        self._vocab = {}
+        self._postings = []
+        self._df = array('q')
+        self._row_ids = array('q')
+        self._row_ptr = array('q', [0])
+        self._row_cols = array('q')
+        self._alive = bytearray()
+        self._rows = {}
+        self._hashes = {}
+        self._fingerprint = 0
+        self._norms = None
+        self._dirty = False
+
+    def rebuild(self, candidates):
+        hashes = {c["id"]: candidate_hash(c) for c in candidates}
+        fingerprint = sum(hashes.values()) & FINGERPRINT_MASK
+        with self._lock:
+            if self._load(fingerprint, hashes):
+                return
+            self._reset()
+            for candidate in candidates:
+                self._add(candidate, hashes[candidate["id"]])
+            self._save()
+
+    def add(self, candidate):
+        with self._lock:
+            self._add(candidate)
+
+    def add_many(self, candidates):
+        with self._lock:
+            for candidate in candidates:
+                self._add(candidate)
+
+    def _add(self, candidate, digest=None):
+        candidate_id = candidate["id"]
+        self._retire(candidate_id)
+        row = len(self._row_ids)
+        for token in candidate_tokens(candidate):
+            col = self._vocab.get(token)
+            if col is None:
+                col = self._vocab[token] = len(self._postings)
+                self._postings.append(array('q'))
+                self._df.append(0)
+            self._postings[col].append(row)
+            self._df[col] += 1
+            self._row_cols.append(col)
+        self._row_ptr.append(len(self._row_cols))
+        self._row_ids.append(candidate_id)
+        self._alive.append(1)
+        self._rows[candidate_id] = row
+        if digest is None:
+            digest = candidate_hash(candidate)
+        self._hashes[candidate_id] = digest
+        self._fingerprint = (self._fingerprint + digest) & FINGERPRINT_MASK
+        self._norms = None
+        self._dirty = True
+        self.generation += 1
+
+    def _retire(self, candidate_id):
+        row = self._rows.pop(candidate_id, None)
+        if row is None:
+            return
+        self._alive[row] = 0
+        for col in self._row_cols[self._row_ptr[row]:self._row_ptr[row + 1]]:
+            self._df[col] -= 1
+        self._fingerprint = (self._fingerprint - self._hashes.pop(candidate_id)) & FINGERPRINT_MASK
+
+    def _idf(self):
+        # Smoothed idf, recomputed from live document frequencies
+        df = np.frombuffer(self._df, dtype=np.int64).astype(np.float64)
+        return np.log((1.0 + len(self._rows)) / (1.0 + df)) + 1.0
+
+    def _unseen_idf(self):
+        return np.log(1.0 + len(self._rows)) + 1.0
+
+    def _row_norms(self, idf):
+        if self._norms is None or len(self._norms) != len(self._row_ids):
+            counts = np.diff(np.frombuffer(self._row_ptr, dtype=np.int64))
+            entry_rows = np.repeat(np.arange(len(self._row_ids)), counts)
+            cols = np.frombuffer(self._row_cols, dtype=np.int64)
+            self._norms = np.sqrt(np.bincount(entry_rows, weights=idf[cols] ** 2, minlength=len(self._row_ids)))
+        return self._norms
+
+    def _query_norm(self, requirements, idf):
+        weights = [idf[self._vocab[t]] if t in self._vocab else self._unseen_idf() for t in requirements]
+        return float(np.sqrt(np.sum(np.square(weights))))
+
+    def _score_rows(self, requirements, method, start=0):
+        # Scores of rows start.. (postings are sorted, so older rows are
+        # skipped per token); the caller holds the lock or owns the engine
+        n_rows = len(self._row_ids)
+        cols = [self._vocab[t] for t in requirements if t in self._vocab]
+        if not cols:
+            return np.zeros(n_rows - start)
+        postings = [np.frombuffer(self._postings[c], dtype=np.int64) for c in cols]
+        if start:
+            postings = [p[np.searchsorted(p, start):] for p in postings]
+        if method == "tfidf":
+            idf = self._idf()
+            return _score_postings(postings, n_rows - start, method, len(requirements), start, idf[cols],
+                                   self._row_norms(idf)[start:], self._query_norm(requirements, idf))
+        return _score_postings(postings, n_rows - start, method, len(requirements), start)
+
+    def state(self):
+        # (rows, generation, layout) for checking scores computed earlier
+        with self._lock:
+            return len(self._row_ids), self.generation, self.layout
+
+    def row_state(self, candidate_id):
+        with self._lock:
+            return self._rows.get(candidate_id), len(self._row_ids), self.generation, self.layout
+
+    def score_all(self, job_requirements, method="overlap"):
+        requirements = tokenize(job_requirements)
+        with self._lock:
+            scores = self._score_rows(requirements, method)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        return scores, alive & (scores > 0)
+
+    def score_rows(self, job_requirements, method="overlap", start=0):
+        # Scores of the rows appended since `start`, with the state they match
+        with self._lock:
+            return self._score_rows(tokenize(job_requirements), method, start), \
+                (len(self._row_ids), self.generation, self.layout)
+
+    def score_columns(self, jobs, workers=0):
+        # Full score columns for many (job_requirements, method) pairs, plus the
+        # state they match. With workers they are scored in a spawned process
+        # pool (forking a threaded server is not safe) that is handed a copy
+        # of the postings, idf and row norms taken under the lock.
+        with self._lock:
+            state = (len(self._row_ids), self.generation, self.layout)
+            if not workers or len(jobs) < 2:
+                return [self._score_rows(tokenize(job), method) for job, method in jobs], state
+            idf = self._idf()
+            lengths = np.fromiter((len(p) for p in self._postings), dtype=np.int64, count=len(self._postings))
+            index = (np.concatenate([[0], np.cumsum(lengths)]),
+                     np.concatenate([np.frombuffer(p, dtype=np.int64) for p in self._postings] or [np.zeros(0, np.int64)]),
+                     idf, self._row_norms(idf).copy())
+            tasks = []
+            for job, method in jobs:
+                requirements = tokenize(job)
+                cols = [self._vocab[t] for t in requirements if t in self._vocab]
+                query_norm = self._query_norm(requirements, idf) if method == "tfidf" and cols else 0.0
+                tasks.append((cols, method, len(requirements), query_norm))
+        with ProcessPoolExecutor(min(workers, len(jobs)), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_set_pool_index, initargs=(index,)) as pool:
+            return list(pool.map(_score_pooled, *zip(*tasks))), state
+
+    def top_k(self, job_requirements, k=10, method="overlap"):
+        scores, mask = self.score_all(job_requirements, method)
+        return self._top(scores, mask, k)
+
+    def rank(self, scores, k=10):
+        # Top k live candidates from a full score column, e.g. a cached one;
+        # ValueError if rows were added since it was computed
+        with self._lock:
+            if len(scores) != len(self._row_ids):
+                raise ValueError("score column does not match the index")
+            mask = np.frombuffer(self._alive, dtype=np.uint8).astype(bool) & (scores > 0)
+            return self._top(scores, mask, k)
+
+    def _top(self, scores, mask, k):
+        # Top-k selection for /candidate/rank: a partial sort over the
+        # candidates that share a token with the job (mask), rather than a heap
+        # of Python tuples, since the scores are already one NumPy column
+        rows = np.flatnonzero(mask)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.lexsort((rows, -scores[rows]))]
+        return [(self._row_ids[row], float(scores[row])) for row in rows]
+
+    def score_candidate(self, candidate_id, job_requirements, method="overlap"):
+        requirements = tokenize(job_requirements)
+        with self._lock:
+            row = self._rows.get(candidate_id)
+            if row is None or not requirements:
+                return 0.0
+            row_cols = self._row_cols[self._row_ptr[row]:self._row_ptr[row + 1]]
+            req_cols = {self._vocab[t] for t in requirements if t in self._vocab}
+            shared = [c for c in row_cols if c in req_cols]
+            if method != "tfidf":
+                return len(shared) / len(requirements)
+            idf = self._idf()
+            row_norm = float(np.sqrt(np.sum(idf[list(row_cols)] ** 2)))
+            denom = row_norm * self._query_norm(requirements, idf)
+            return float(np.sum(idf[shared] ** 2) / denom) if denom > 0 else 0.0
+
+    def score(self, candidate_skills, job_requirements, method="overlap"):
+        skills = tokenize(candidate_skills)
+        requirements = tokenize(job_requirements)
+        if not requirements:
+            return 0.0
+        shared = skills & requirements
+        if method != "tfidf":
+            return len(shared) / len(requirements)
+        with self._lock:
+            idf = self._idf()
+            weight = lambda t: idf[self._vocab[t]] if t in self._vocab else self._unseen_idf()
+            dot = sum(weight(t) ** 2 for t in shared)
+            denom = np.sqrt(sum(weight(t) ** 2 for t in skills)) * np.sqrt(sum(weight(t) ** 2 for t in requirements))
+        return float(dot / denom) if denom > 0 else 0.0
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        state = {
+            "format": MODEL_FORMAT_VERSION,
+            "fingerprint": self._fingerprint,
+            "vocab": list(self._vocab),
+            "postings": self._postings,
+            "df": self._df,
+            "row_ids": self._row_ids,
+            "row_ptr": self._row_ptr,
+            "row_cols": self._row_cols,
+            "alive": bytes(self._alive),
+        }
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.model_path.with_name(self.model_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.model_path)
+        self._dirty = False
+
+    def _load(self, fingerprint, hashes):
+        # Reuse the persisted model only if it was fitted on the same pool
+        try:
+            with open(self.model_path, 'rb') as f:
+                state = pickle.load(f)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            return False
+        if state.get("format") != MODEL_FORMAT_VERSION or state.get("fingerprint") != fingerprint:
+            return False
+        self._reset()
+        self._vocab = {token: col for col, token in enumerate(state["vocab"])}
+        self._postings = state["postings"]
+        self._df = state["df"]
+        self._row_ids = state["row_ids"]
+        self._row_ptr = state["row_ptr"]
+        self._row_cols = state["row_cols"]
+        self._alive = bytearray(state["alive"])
+        self._rows = {self._row_ids[row]: row for row in np.flatnonzero(np.frombuffer(self._alive, dtype=np.uint8)).tolist()}
+        self._hashes = hashes
+        self._fingerprint = fingerprint
+        return True
+
+    def __len__(self):
+        return len(self._rows)
+
+def _score_postings(postings, n_rows, method, n_requirements, start=0, col_idf=None, norms=None, query_norm=0.0):
+    # postings: sorted row arrays of the requirement tokens found in the index
+    rows = np.concatenate(postings) - start
+    if method == "tfidf":
+        weights = np.repeat(col_idf ** 2, [len(p) for p in postings])
+        dots = np.bincount(rows, weights=weights, minlength=n_rows)
+        denom = norms * query_norm
+        return np.divide(dots, denom, out=np.zeros(n_rows), where=denom > 0)
+    return np.bincount(rows, minlength=n_rows) / n_requirements
+
+def _set_pool_index(index):
+    global _pool_index
+    _pool_index = index
+
+def _score_pooled(cols, method, n_requirements, query_norm):
+    indptr, indices, idf, norms = _pool_index
+    if not cols:
+        return np.zeros(len(norms))
+    postings = [indices[indptr[c]:indptr[c + 1]] for c in cols]
+    return _score_postings(postings, len(norms), method, n_requirements, 0, idf[cols], norms, query_norm)
+
+# Shared instance kept in sync with the candidate store
+match_engine = candidate_store.subscribe(MatchEngine())
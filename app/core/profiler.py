@@ -0,0 +1,96 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from config import PROFILER_DIR, PROFILER_ENABLED, PROFILER_INTERVAL, PROFILER_MAX_SECONDS
+
+# Seconds profiled when a worker is sent the profile signal
+SIGNAL_SECONDS = 10.0
+# Not available on Windows, where only GET /metrics/profile works
+PROFILE_SIGNAL = getattr(signal, "SIGUSR2", None)
+
+def _frame_name(code):
+    # ";" separates frames in the collapsed format, so keep it out of names
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+# Statistical profiler for a running worker: a thread samples every other
+# thread's stack via sys._current_frames() each interval, so nothing is
+# traced and the cost is one stack walk per sample. Results are collapsed
+# stacks ("thread;outer;...;inner count" per line), which flamegraph.pl,
+# speedscope and inferno read directly.
+class SamplingProfiler:
+    def __init__(self, interval=PROFILER_INTERVAL, max_seconds=PROFILER_MAX_SECONDS, out_dir=PROFILER_DIR):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.out_dir = Path(out_dir)
+        self._busy = threading.Lock()
+
+    def profile(self, seconds, interval=None):
+        # Blocks for `seconds`; returns {collapsed stack: samples}. Raises
+        # RuntimeError if a profile is already running in this process.
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("a profile is already running in this worker")
+        try:
+            return self._sample(min(seconds, self.max_seconds), interval or self.interval)
+        finally:
+            self._busy.release()
+
+    def _sample(self, seconds, interval):
+        me = threading.get_ident()
+        counts = Counter()
+        names = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            threads = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = names.get(code)
+                    if name is None:
+                        name = names[code] = _frame_name(code)
+                    stack.append(name)
+                    frame = frame.f_back
+                stack.append(threads.get(ident, f"thread-{ident}").replace(";", ":"))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return counts
+
+    @staticmethod
+    def collapsed(counts):
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def dump(self, seconds=SIGNAL_SECONDS):
+        # Profiles and writes profile-<pid>-<time>.collapsed; returns its path
+        text = self.collapsed(self.profile(seconds))
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+        path.write_text(text)
+        return path
+
+    def install_signal_handler(self):
+        # `kill -USR2 <worker pid>` profiles that worker in the background.
+        # Only the main thread can install handlers; elsewhere this is a no-op.
+        def handler(signum, frame):
+            threading.Thread(target=self._dump_logged, name="profiler", daemon=True).start()
+        if PROFILE_SIGNAL is None:
+            return False
+        try:
+            signal.signal(PROFILE_SIGNAL, handler)
+        except ValueError:
+            return False
+        return True
+
+    def _dump_logged(self):
+        try:
+            print(f"[Profiler] wrote {self.dump()}", flush=True)
+        except RuntimeError as e:
+            print(f"[Profiler] {e}", flush=True)
+
+# Shared instance; the endpoint and signal hook exist only when PROFILER_ENABLED
+profiler = SamplingProfiler() if PROFILER_ENABLED else None
@@ -0,0 +1,208 @@
+from typing import NamedTuple
+import numpy as np
+
+EMPTY_KEY = -1
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+UINT64_MASK = (1 << 64) - 1
+# Key layout: candidate id in the high bits, then one byte each for
+# skills_match and experience_level. Keys are int64 and EMPTY_KEY is -1, so
+# ids must be non-negative and fit in the remaining 47 bits.
+STATE_SHIFT = 16
+MAX_CANDIDATE_ID = (1 << (63 - STATE_SHIFT)) - 1
+
+class State(NamedTuple):
+    candidate_id: int
+    skills_match: int
+    experience_level: int
+
+    def __str__(self):
+        # Same text form as the old string states, so log rows are unchanged
+        return f"{self.candidate_id}_{self.skills_match}_{self.experience_level}"
+
+def encode_state(candidate_id, skills_match, experience_level):
+    # Scalars or int64 arrays; raises ValueError for ids outside 0..MAX_CANDIDATE_ID
+    if isinstance(candidate_id, np.ndarray):
+        if candidate_id.size and (candidate_id.min() < 0 or candidate_id.max() > MAX_CANDIDATE_ID):
+            raise ValueError(f"candidate ids must be between 0 and {MAX_CANDIDATE_ID}")
+    elif not 0 <= candidate_id <= MAX_CANDIDATE_ID:
+        raise ValueError(f"candidate id {candidate_id} is outside 0..{MAX_CANDIDATE_ID}")
+    return (candidate_id << STATE_SHIFT) | ((skills_match & 0xFF) << 8) | (experience_level & 0xFF)
+
+def state_key(state):
+    if type(state) is not State:
+        state = parse_state(state)
+    return encode_state(state[0], state[1], state[2])
+
+def decode_state(key):
+    return State(key >> STATE_SHIFT, (key >> 8) & 0xFF, key & 0xFF)
+
+def parse_state(state):
+    if isinstance(state, str):
+        return State(*(int(part) for part in state.rsplit("_", 2)))
+    return State(*(int(part) for part in state))
+
+# Open-addressed hash table: int64 keys with linear probing and a dense
+# float32 (capacity x n_actions) value block. Slots are never deleted.
+class QTable:
+    def __init__(self, n_actions, capacity=1024, max_load=0.7):
+        self.n_actions = n_actions
+        self.max_load = max_load
+        self.size = 0
+        self._allocate(max(16, 1 << (int(capacity) - 1).bit_length()))
+
+    @classmethod
+    def from_arrays(cls, keys, values, size, max_load=0.7):
+        # Wrap existing (possibly memory-mapped) arrays without copying
+        table = cls.__new__(cls)
+        table.n_actions = values.shape[1]
+        table.max_load = max_load
+        table.size = size
+        table._attach(keys, values)
+        return table
+
+    def _allocate(self, capacity):
+        self._attach(
+            np.full(capacity, EMPTY_KEY, dtype=np.int64),
+            np.zeros((capacity, self.n_actions), dtype=np.float32)
+        )
+
+    def _attach(self, keys, values):
+        capacity = len(keys)
+        self.capacity = capacity
+        self._grow_at = int(capacity * self.max_load)
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self.keys = keys
+        self.values = values
+        self._bind_views()
+
+    def _bind_views(self):
+        # memoryview indexing returns plain Python scalars, which keeps the
+        # single-key probe loop cheap compared to numpy scalar access
+        self._key_view = memoryview(self.keys).cast('B').cast('q')
+        self._value_view = memoryview(self.values.reshape(-1)).cast('B').cast('f')
+
+    def _home_many(self, keys):
+        return ((keys.astype(np.uint64) * np.uint64(HASH_MULTIPLIER)) >> np.uint64(self._shift)).astype(np.int64)
+
+    def find(self, key):
+        mask = self.capacity - 1
+        keys = self._key_view
+        slot = ((key * HASH_MULTIPLIER) & UINT64_MASK) >> self._shift
+        while True:
+            current = keys[slot]
+            if current == key:
+                return slot
+            if current == EMPTY_KEY:
+                return -1
+            slot = (slot + 1) & mask
+
+    def slot(self, key):
+        # find() and insert share one probe sequence
+        mask = self.capacity - 1
+        keys = self._key_view
+        slot = ((key * HASH_MULTIPLIER) & UINT64_MASK) >> self._shift
+        while True:
+            current = keys[slot]
+            if current == key:
+                return slot
+            if current == EMPTY_KEY:
+                break
+            slot = (slot + 1) & mask
+        if self.size >= self._grow_at:
+            self._resize(self.capacity * 2)
+            return self.slot(key)
+        keys[slot] = key
+        self.size += 1
+        return slot
+
+    def get(self, key):
+        slot = self.find(key)
+        if slot < 0:
+            return None
+        start = slot * self.n_actions
+        return self._value_view[start:start + self.n_actions].tolist()
+
+    def row(self, slot):
+        start = slot * self.n_actions
+        return self._value_view[start:start + self.n_actions].tolist()
+
+    def get_value(self, slot, action):
+        return self._value_view[slot * self.n_actions + action]
+
+    def set_value(self, slot, action, value):
+        self._value_view[slot * self.n_actions + action] = value
+
+    def find_many(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        mask = self.capacity - 1
+        slots = self._home_many(keys)
+        found = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.arange(len(keys))
+        while pending.size:
+            current = self.keys[slots[pending]]
+            hit = current == keys[pending]
+            found[pending[hit]] = slots[pending[hit]]
+            pending = pending[~hit & (current != EMPTY_KEY)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return found
+
+    def slot_many(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        found = self.find_many(keys)
+        missing = np.unique(keys[found < 0])
+        if missing.size:
+            needed = self.size + missing.size
+            capacity = self.capacity
+            while needed >= capacity * self.max_load:
+                capacity *= 2
+            if capacity != self.capacity:
+                self._resize(capacity)
+            self._place(missing, np.zeros((missing.size, self.n_actions), dtype=np.float32))
+            found = self.find_many(keys)
+        return found
+
+    def _place(self, keys, values):
+        # Vectorised linear-probe insert of keys known to be absent: each
+        # round, the first pending key aimed at a free slot claims it
+        mask = self.capacity - 1
+        slots = self._home_many(keys)
+        pending = np.arange(len(keys))
+        while pending.size:
+            target = slots[pending]
+            free = self.keys[target] == EMPTY_KEY
+            claim_slots, first = np.unique(target[free], return_index=True)
+            winners = pending[free][first]
+            self.keys[claim_slots] = keys[winners]
+            self.values[claim_slots] = values[winners]
+            placed = np.zeros(len(keys), dtype=bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            slots[pending] = (slots[pending] + 1) & mask
+        self.size += len(keys)
+
+    def _resize(self, capacity):
+        occupied = self.keys != EMPTY_KEY
+        keys = self.keys[occupied]
+        values = self.values[occupied]
+        self._key_view = self._value_view = None
+        self._allocate(capacity)
+        self.size = 0
+        self._place(keys, values)
+
+    def copy(self):
+        return QTable.from_arrays(self.keys.copy(), self.values.copy(), self.size, self.max_load)
+
+    def items(self):
+        occupied = np.flatnonzero(self.keys != EMPTY_KEY)
+        for slot in occupied.tolist():
+            yield decode_state(int(self.keys[slot])), self.row(slot)
+
+    def __contains__(self, state):
+        return self.find(encode_state(*parse_state(state))) >= 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
@@ -0,0 +1,34 @@
+import threading
+import time
+
+# Token bucket: refills at `rate` tokens/sec up to `capacity`. acquire(n)
+# blocks until the bucket can cover the request; a request larger than the
+# bucket waits for a full bucket and leaves it in debt for the remainder.
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n=1):
+        # Returns the seconds spent waiting
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        needed = min(n, self.capacity)
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= needed:
+                    self.tokens -= n
+                    return waited
+                delay = (needed - self.tokens) / self.rate
+                time.sleep(delay)
+                waited += delay
@@ -0,0 +1,147 @@
+"""
+Offline replay trainer: streams reward logs into the Q-table in bulk.
+
+    python -m app.core.replay_trainer data/reward_log.csv --epochs 3
+    python -m app.core.replay_trainer logs/ --resume --chunk-size 200000
+"""
+
+import argparse
+import csv
+import time
+from pathlib import Path
+import numpy as np
+from config import RL_CHECKPOINT_DIR
+from app.core.q_table import encode_state
+from app.core.rl_model import RLModel
+from app.core.checkpoint import RLCheckpointer
+
+def iter_log_files(paths):
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            yield from sorted(path.glob("*.csv"))
+        else:
+            yield path
+
+def iter_chunks(paths, actions, chunk_size):
+    # Yields (keys, actions, rewards) arrays of at most chunk_size rows plus
+    # the number of rows skipped (automation events, malformed rows)
+    action_index = {name: idx for idx, name in enumerate(actions)}
+    keys, acts, rewards = [], [], []
+    skipped = 0
+    for path in iter_log_files(paths):
+        with open(path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            state_col, action_col, reward_col = header.index("state"), header.index("action"), header.index("reward")
+            for row in reader:
+                try:
+                    candidate_id, skills_match, experience_level = row[state_col].rsplit("_", 2)
+                    key = encode_state(int(candidate_id), int(skills_match), int(experience_level))
+                    action = action_index[row[action_col]]
+                    reward = float(row[reward_col])
+                except (ValueError, KeyError, IndexError):
+                    skipped += 1
+                    continue
+                keys.append(key)
+                acts.append(action)
+                rewards.append(reward)
+                if len(keys) >= chunk_size:
+                    yield np.array(keys, dtype=np.int64), np.array(acts, dtype=np.int64), np.array(rewards), skipped
+                    keys, acts, rewards = [], [], []
+                    skipped = 0
+    if keys or skipped:
+        yield np.array(keys, dtype=np.int64), np.array(acts, dtype=np.int64), np.array(rewards), skipped
+
+class ReplayBuffer:
+    # Fixed-size reservoir sample of past transitions, so memory stays
+    # constant however long the log is
+    def __init__(self, capacity, seed=None):
+        self.capacity = capacity
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.size = 0
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, keys, actions, rewards):
+        n = len(keys)
+        if n == 0 or self.capacity == 0:
+            return
+        fill = min(self.capacity - self.size, n)
+        if fill > 0:
+            self.keys[self.size:self.size + fill] = keys[:fill]
+            self.actions[self.size:self.size + fill] = actions[:fill]
+            self.rewards[self.size:self.size + fill] = rewards[:fill]
+            self.size += fill
+        rest = np.arange(fill, n)
+        if rest.size:
+            # Algorithm R: item i replaces a random slot with probability capacity/(seen+i+1)
+            slots = self.rng.integers(0, self.seen + rest + 1)
+            keep = slots < self.capacity
+            self.keys[slots[keep]] = keys[rest[keep]]
+            self.actions[slots[keep]] = actions[rest[keep]]
+            self.rewards[slots[keep]] = rewards[rest[keep]]
+        self.seen += n
+
+    def sample(self, batch_size):
+        idx = self.rng.integers(0, self.size, size=min(batch_size, self.size))
+        return self.keys[idx], self.actions[idx], self.rewards[idx]
+
+def train(rl_model, paths, epochs=1, chunk_size=100_000, replay_size=100_000,
+          replay_batches=1, batch_size=10_000, seed=None, report=print):
+    buffer = ReplayBuffer(replay_size, seed)
+    stats = {"rows": 0, "skipped": 0, "replayed": 0, "seconds": 0.0}
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        epoch_rows = 0
+        for keys, actions, rewards, skipped in iter_chunks(paths, rl_model.actions, chunk_size):
+            stats["skipped"] += skipped
+            epoch_rows += rl_model.update_q_values_batch(keys, actions, rewards)
+            buffer.add(keys, actions, rewards)
+            for _ in range(replay_batches if buffer.size else 0):
+                stats["replayed"] += rl_model.update_q_values_batch(*buffer.sample(batch_size))
+        elapsed = time.perf_counter() - start
+        stats["rows"] += epoch_rows
+        stats["seconds"] += elapsed
+        if report:
+            rate = epoch_rows / elapsed if elapsed > 0 else 0.0
+            report(f"[Replay] epoch {epoch}/{epochs}: {epoch_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec), "
+                   f"{len(rl_model.q_table)} states")
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="reward log CSV files or directories of rotated segments")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--replay-size", type=int, default=100_000)
+    parser.add_argument("--replay-batches", type=int, default=1, help="replay minibatches per chunk")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--checkpoint-dir", default=str(RL_CHECKPOINT_DIR))
+    parser.add_argument("--resume", action="store_true", help="fine-tune the latest checkpoint instead of rebuilding")
+    parser.add_argument("--no-checkpoint", action="store_true", help="train without writing a checkpoint")
+    args = parser.parse_args()
+
+    rl_model = RLModel()
+    checkpointer = RLCheckpointer(rl_model, args.checkpoint_dir)
+    if args.resume:
+        restored = checkpointer.restore_latest(mmap=False)
+        print(f"[Replay] resuming from {restored}" if restored else "[Replay] no checkpoint found, starting fresh")
+
+    stats = train(rl_model, args.paths, args.epochs, args.chunk_size, args.replay_size,
+                  args.replay_batches, args.batch_size, args.seed)
+    print(f"[Replay] {stats['rows']} rows, {stats['skipped']} skipped, {stats['replayed']} replayed, "
+          f"{stats['rows_per_sec']:,.0f} rows/sec")
+
+    if not args.no_checkpoint:
+        print(f"[Replay] checkpoint written to {checkpointer.checkpoint(force=True)}; a running API serves it "
+              f"after POST /rl/checkpoints/promote or a restart")
+
+if __name__ == "__main__":
+    main()
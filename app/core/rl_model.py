@@ -1,38 +1,100 @@
-import json
-from pathlib import Path
 import random
+import threading
+import numpy as np
+from app.core.q_table import QTable, State, state_key
 
 class RLModel:
-    def __init__(self):
-        self.q_table = {}
+    def __init__(self, capacity=1024):
         self.learning_rate = 0.1
         self.discount_factor = 0.9
         self.epsilon = 0.1
         self.actions = ["accept", "reject", "reconsider"]
-        
+        self.q_table = QTable(len(self.actions), capacity)
+        self.update_count = 0
+        # Checkpoint the table was restored from or last saved as
+        self.checkpoint_version = 0
+        self._lock = threading.Lock()
+
     def get_state(self, candidate_id, skills_match, experience_level):
-        return f"{candidate_id}_{skills_match}_{experience_level}"
-    
+        return State(candidate_id, skills_match, experience_level)
+
     def choose_action(self, state):
-        if state not in self.q_table:
-            self.q_table[state] = [0.0] * len(self.actions)
-        
+        key = state_key(state)
+        with self._lock:
+            slot = self.q_table.slot(key)
+            values = self.q_table.row(slot)
+
         if random.random() < self.epsilon:
             return random.randint(0, len(self.actions) - 1)
-        return self.q_table[state].index(max(self.q_table[state]))
-    
+        return values.index(max(values))
+
     def update_q_value(self, state, action, reward, next_state):
-        if state not in self.q_table:
-            self.q_table[state] = [0.0] * len(self.actions)
-        if next_state not in self.q_table:
-            self.q_table[next_state] = [0.0] * len(self.actions)
-            
-        current_q = self.q_table[state][action]
-        max_next_q = max(self.q_table[next_state])
-        new_q = current_q + self.learning_rate * (reward + self.discount_factor * max_next_q - current_q)
-        self.q_table[state][action] = new_q
-    
+        key = state_key(state)
+        next_key = key if next_state is state else state_key(next_state)
+        with self._lock:
+            slot = self.q_table.slot(key)
+            if next_key == key:
+                values = self.q_table.row(slot)
+                current_q = values[action]
+                max_next_q = max(values)
+            else:
+                next_slot = self.q_table.slot(next_key)
+                # Inserting next_state may have grown the table and moved slots
+                slot = self.q_table.find(key)
+                current_q = self.q_table.get_value(slot, action)
+                max_next_q = max(self.q_table.row(next_slot))
+            new_q = current_q + self.learning_rate * (reward + self.discount_factor * max_next_q - current_q)
+            self.q_table.set_value(slot, action, new_q)
+            self.update_count += 1
+
+    def update_q_values_batch(self, keys, actions, rewards, next_keys=None):
+        # Vectorised counterpart of update_q_value, matching row-by-row
+        # updates: rows are applied in steps, step p taking the p-th row of
+        # every state, so each row sees the rows of its state before it. Only
+        # the order between rows of different states is not preserved.
+        keys = np.asarray(keys, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if keys.size == 0:
+            return 0
+        with self._lock:
+            if next_keys is None:
+                slots = next_slots = self.q_table.slot_many(keys)
+            else:
+                both = self.q_table.slot_many(np.concatenate([keys, np.asarray(next_keys, dtype=np.int64)]))
+                slots, next_slots = both[:keys.size], both[keys.size:]
+            values = self.q_table.values
+            # Position of each row among the rows of its state, in batch order
+            order = np.argsort(slots, kind="stable")
+            sorted_slots = slots[order]
+            starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+            positions = np.empty(keys.size, dtype=np.int64)
+            positions[order] = np.arange(keys.size) - np.repeat(starts, np.diff(np.r_[starts, keys.size]))
+            by_position = np.argsort(positions, kind="stable")
+            bounds = np.searchsorted(positions[by_position], np.arange(positions.max() + 2))
+            for step in range(bounds.size - 1):
+                rows = by_position[bounds[step]:bounds[step + 1]]
+                step_slots, step_actions = slots[rows], actions[rows]
+                current = values[step_slots, step_actions].astype(np.float64)
+                targets = rewards[rows] + self.discount_factor * values[next_slots[rows]].max(axis=1)
+                values[step_slots, step_actions] = current + self.learning_rate * (targets - current)
+            self.update_count += int(keys.size)
+        return int(keys.size)
+
+    def get_q_values(self, state):
+        with self._lock:
+            return self.q_table.get(state_key(state))
+
+    def snapshot(self):
+        # Point-in-time copy for checkpointing; the lock is held only for the copy
+        with self._lock:
+            return self.q_table.copy(), self.update_count
+
+    def load_q_table(self, q_table):
+        with self._lock:
+            self.q_table = q_table
+
     def get_recommendation(self, candidate_id, skills_match, experience_level):
         state = self.get_state(candidate_id, skills_match, experience_level)
         action_idx = self.choose_action(state)
-        return self.actions[action_idx]
\ No newline at end of file
+        return self.actions[action_idx]
@@ -1,25 +1,70 @@
 import re
+from functools import lru_cache
+from app.core.match_engine import tokenize
+
+WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+NEGATORS = frozenset(["not", "no", "never", "without", "hardly", "barely", "nor"])
+NEGATION_WINDOW = 3
 
 class SentimentModel:
-    def __init__(self):
+    def __init__(self, match_engine=None, cache_size=4096):
+        self.match_engine = match_engine
         self.positive_words = ["excellent", "great", "good", "outstanding", "skilled", "experienced"]
         self.negative_words = ["poor", "bad", "weak", "inexperienced", "lacking", "insufficient"]
-    
-    def analyze_feedback(self, text):
-        text = text.lower()
-        positive_count = sum(1 for word in self.positive_words if word in text)
-        negative_count = sum(1 for word in self.negative_words if word in text)
-        
+        self.cache_size = cache_size
+        self._compile()
+
+    def _compile(self):
+        # One dict lookup per token, so cost depends on text length only
+        self._polarity = {word.lower(): 1 for word in self.positive_words}
+        self._polarity.update({word.lower(): -1 for word in self.negative_words})
+        self._analyze_cached = lru_cache(maxsize=self.cache_size)(self._analyze)
+
+    def add_terms(self, positive=(), negative=()):
+        self.positive_words.extend(positive)
+        self.negative_words.extend(negative)
+        self._compile()
+
+    def _analyze(self, text):
+        positive_terms = set()
+        negative_terms = set()
+        negate_until = -1
+        for position, match in enumerate(WORD_RE.finditer(text.lower())):
+            word = match.group()
+            if word in NEGATORS or word.endswith("n't"):
+                negate_until = position + NEGATION_WINDOW
+                continue
+            polarity = self._polarity.get(word)
+            if polarity is None:
+                continue
+            if position <= negate_until:
+                polarity = -polarity
+            (positive_terms if polarity > 0 else negative_terms).add(word)
+
+        positive_count = len(positive_terms)
+        negative_count = len(negative_terms)
         if positive_count > negative_count:
-            return {"sentiment": "positive", "score": 0.8}
+            return ("positive", 0.8)
         elif negative_count > positive_count:
-            return {"sentiment": "negative", "score": 0.2}
+            return ("negative", 0.2)
         else:
-            return {"sentiment": "neutral", "score": 0.5}
-    
-    def calculate_match_score(self, candidate_skills, job_requirements):
-        skills = set(candidate_skills.lower().split())
-        requirements = set(job_requirements.lower().split())
-        overlap = len(skills.intersection(requirements))
+            return ("neutral", 0.5)
+
+    def analyze_feedback(self, text):
+        sentiment, score = self._analyze_cached(text)
+        return {"sentiment": sentiment, "score": score}
+
+    def analyze_batch(self, texts):
+        return [self.analyze_feedback(text) for text in texts]
+
+    def cache_info(self):
+        return self._analyze_cached.cache_info()
+
+    def calculate_match_score(self, candidate_skills, job_requirements, method="overlap"):
+        if method == "tfidf" and self.match_engine is not None:
+            return self.match_engine.score(candidate_skills, job_requirements, method)
+        skills = tokenize(candidate_skills)
+        requirements = tokenize(job_requirements)
+        overlap = len(skills & requirements)
         total = len(requirements)
-        return overlap / total if total > 0 else 0.0
\ No newline at end of file
+        return overlap / total if total > 0 else 0.0
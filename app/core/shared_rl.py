@@ -0,0 +1,267 @@
+import logging
+import mmap
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from app.core import file_lock
+from app.core.q_table import QTable, EMPTY_KEY, state_key
+from app.core.rl_model import RLModel
+from app.core.telemetry import counter
+
+# Shared file layout: 64-byte header (magic, version, n_actions, capacity,
+# then int64 counters), int64 keys[capacity], float32 values[capacity x n_actions].
+# The counters include the checkpoint version the table was restored from or
+# last saved as, so a restart can tell whether a newer checkpoint exists.
+MAGIC = b"HRQS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIIQ")
+HEADER_SIZE = 64
+COUNTERS_OFFSET = 24
+SIZE, UPDATES, GENERATION, CHECKPOINT = 0, 1, 2, 3
+# Byte-range locks (fcntl locks are per process, so each forked or spawned
+# worker takes them independently)
+WRITE_LOCK, LEADER_LOCK, INIT_LOCK = 0, 1, 2
+MAX_LOAD = 0.9
+READ_SPINS = 64
+
+DROPPED_UPDATES = counter("hr_ai_rl_dropped_updates_total",
+                          "Q-value updates dropped because the shared Q-table is full.")
+log = logging.getLogger(__name__)
+
+class SharedQTable(QTable):
+    # Entry count lives in the shared header so every process sees inserts
+    counters = None
+
+    @property
+    def size(self):
+        return self.counters[SIZE] if self.counters is not None else 0
+
+    @size.setter
+    def size(self, value):
+        if self.counters is not None:
+            self.counters[SIZE] = value
+
+# Q-table in a MAP_SHARED file so every worker process serves and learns
+# from one policy. Writes are queued per process and applied in batches by
+# a background thread under one cross-process lock; reads are lock-free and
+# use the generation counter as a seqlock to get a consistent row.
+class SharedRLModel(RLModel):
+    def __init__(self, path, capacity=1 << 20, flush_interval=0.01, batch_size=4096):
+        self._counters = None
+        super().__init__(capacity=16)
+        self.path = Path(path)
+        self.capacity = 1 << (int(capacity) - 1).bit_length()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._fd = None
+        self._mm = None
+        self._mutex = threading.Lock()
+        self._pending = queue.Queue()
+        self._applier = None
+        self._applier_pid = None
+
+    @property
+    def update_count(self):
+        return self._counters[UPDATES] if self._counters is not None else 0
+
+    @update_count.setter
+    def update_count(self, value):
+        if self._counters is not None:
+            self._counters[UPDATES] = value
+
+    @property
+    def checkpoint_version(self):
+        return self._counters[CHECKPOINT] if self._counters is not None else 0
+
+    @checkpoint_version.setter
+    def checkpoint_version(self, value):
+        if self._counters is not None:
+            self._counters[CHECKPOINT] = value
+
+    def _flock(self, start, cmd):
+        file_lock.lockf(self._fd, cmd, 1, start)
+
+    def open(self, initialize=None, latest_version=None):
+        # Maps the shared table, creating it if needed. `initialize` runs in
+        # whichever process creates the file, before anyone else attaches, and
+        # again when latest_version() reports a newer checkpoint than the one
+        # the existing table holds (the file outlives restarts).
+        # A mapping inherited across fork is reused as is.
+        if self._mm is not None:
+            return self
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = file_lock.open_fd(self.path, 0o600)
+        n_actions = len(self.actions)
+        length = HEADER_SIZE + self.capacity * 8 + self.capacity * n_actions * 4
+        self._flock(INIT_LOCK, file_lock.LOCK_EX)
+        try:
+            header = file_lock.pread(self._fd, HEADER.size, 0)
+            created = (len(header) < HEADER.size or os.fstat(self._fd).st_size != length
+                       or HEADER.unpack(header) != (MAGIC, FORMAT_VERSION, n_actions, self.capacity))
+            if created:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, length)
+                file_lock.pwrite(self._fd, HEADER.pack(MAGIC, FORMAT_VERSION, n_actions, self.capacity), 0)
+            self._mm = mmap.mmap(self._fd, length, access=mmap.ACCESS_WRITE)
+            self._counters = memoryview(self._mm)[COUNTERS_OFFSET:HEADER_SIZE].cast('q')
+            keys = np.ndarray((self.capacity,), dtype=np.int64, buffer=self._mm, offset=HEADER_SIZE)
+            values = np.ndarray((self.capacity, n_actions), dtype=np.float32, buffer=self._mm,
+                                offset=HEADER_SIZE + self.capacity * 8)
+            if created:
+                keys.fill(EMPTY_KEY)
+            self.q_table = SharedQTable.from_arrays(keys, values, 0, max_load=MAX_LOAD)
+            self.q_table.counters = self._counters
+            stale = created or (latest_version is not None and latest_version() > self.checkpoint_version)
+            if stale and initialize is not None:
+                initialize()
+        finally:
+            self._flock(INIT_LOCK, file_lock.LOCK_UN)
+        return self
+
+    def try_lead(self):
+        # True if this process holds the leader lock (and so writes checkpoints)
+        try:
+            self._flock(LEADER_LOCK, file_lock.LOCK_EX | file_lock.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    @contextmanager
+    def _write(self):
+        with self._mutex:
+            self._flock(WRITE_LOCK, file_lock.LOCK_EX)
+            counters = self._counters
+            try:
+                counters[GENERATION] += 1
+                yield self.q_table
+            finally:
+                counters[GENERATION] += 1
+                self._flock(WRITE_LOCK, file_lock.LOCK_UN)
+
+    @contextmanager
+    def _read_locked(self):
+        with self._mutex:
+            self._flock(WRITE_LOCK, file_lock.LOCK_SH)
+            try:
+                yield self.q_table
+            finally:
+                self._flock(WRITE_LOCK, file_lock.LOCK_UN)
+
+    def _read_row(self, key):
+        counters = self._counters
+        table = self.q_table
+        for _ in range(READ_SPINS):
+            generation = counters[GENERATION]
+            if generation & 1:
+                continue
+            slot = table.find(key)
+            values = table.row(slot) if slot >= 0 else None
+            if counters[GENERATION] == generation:
+                return values
+        # A long batch is being applied; wait for it instead of spinning
+        with self._read_locked():
+            slot = table.find(key)
+            return table.row(slot) if slot >= 0 else None
+
+    def choose_action(self, state):
+        values = self._read_row(state_key(state)) or [0.0] * len(self.actions)
+        if random.random() < self.epsilon:
+            return random.randint(0, len(self.actions) - 1)
+        return values.index(max(values))
+
+    def get_q_values(self, state):
+        return self._read_row(state_key(state))
+
+    def update_q_value(self, state, action, reward, next_state):
+        # Queued; visible to every worker once the applier's next batch lands
+        key = state_key(state)
+        next_key = key if next_state is state else state_key(next_state)
+        self._ensure_applier()
+        self._pending.put((key, action, reward, next_key))
+
+    def update_q_values_batch(self, keys, actions, rewards, next_keys=None):
+        keys = np.asarray(keys, dtype=np.int64)
+        next_keys = keys if next_keys is None else np.asarray(next_keys, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        with self._write() as table:
+            # The table is fixed-size; updates for states that no longer fit are dropped
+            all_keys = np.concatenate([keys, next_keys])
+            known = table.find_many(all_keys) >= 0
+            unseen = np.unique(all_keys[~known])
+            if table.size + unseen.size >= table.capacity * MAX_LOAD:
+                admitted = unseen[:max(0, int(table.capacity * MAX_LOAD) - table.size - 1)]
+                fits = known | np.isin(all_keys, admitted)
+                keep = fits[:keys.size] & fits[keys.size:]
+                dropped = int(keys.size - keep.sum())
+                if dropped and not self.dropped:
+                    log.warning("Shared Q-table %s is full (%d states); dropping updates for new states. "
+                                "Raise RL_SHARED_CAPACITY.", self.path, table.size)
+                self.dropped += dropped
+                DROPPED_UPDATES.inc(amount=dropped)
+                keys, actions, rewards, next_keys = keys[keep], actions[keep], rewards[keep], next_keys[keep]
+            return RLModel.update_q_values_batch(self, keys, actions, rewards, next_keys)
+
+    def _ensure_applier(self):
+        # Threads do not survive fork, so a child starts its own applier
+        if self._applier is None or self._applier_pid != os.getpid() or not self._applier.is_alive():
+            with self._mutex:
+                if self._applier is None or self._applier_pid != os.getpid() or not self._applier.is_alive():
+                    self._applier = threading.Thread(target=self._apply_loop, name="rl-applier", daemon=True)
+                    self._applier_pid = os.getpid()
+                    self._applier.start()
+
+    def _apply_loop(self):
+        while True:
+            try:
+                item = self._pending.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            batch = [item]
+            stop = item is None
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+                stop = batch[-1] is None
+            updates = [update for update in batch if update is not None]
+            if updates:
+                keys, actions, rewards, next_keys = zip(*updates)
+                self.update_q_values_batch(keys, actions, rewards, next_keys)
+            for _ in batch:
+                self._pending.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        if self._applier is not None and self._applier.is_alive():
+            self._pending.join()
+
+    def snapshot(self):
+        with self._read_locked() as table:
+            return QTable.from_arrays(table.keys.copy(), table.values.copy(), table.size), self.update_count
+
+    def load_q_table(self, q_table):
+        occupied = q_table.keys != EMPTY_KEY
+        if occupied.sum() >= self.capacity * MAX_LOAD:
+            raise ValueError(f"{int(occupied.sum())} states do not fit a shared table of capacity {self.capacity}")
+        with self._write() as table:
+            table.keys.fill(EMPTY_KEY)
+            table.values.fill(0.0)
+            table.size = 0
+            table._place(np.asarray(q_table.keys[occupied]), np.asarray(q_table.values[occupied]))
+
+    def close(self):
+        if self._applier is not None and self._applier_pid == os.getpid() and self._applier.is_alive():
+            self._pending.put(None)
+            self._applier.join()
+        self._applier = None
@@ -0,0 +1,190 @@
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds, finer than Prometheus' defaults at the low end
+# where most requests and component calls land
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "<unmatched>"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Minimal Prometheus-style metrics, kept per process. Each metric holds one
+# value per label tuple behind its own lock; updates are a dict lookup and
+# an add. A metric built with `fn` has no stored values: fn is called at
+# scrape time and returns a number, or {label tuple: number} for labelled
+# metrics, so state components already track costs nothing on the hot path.
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _collected(self):
+        if self.fn is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.fn()
+        if not isinstance(value, dict):
+            return {(): value}
+        return {key if isinstance(key, tuple) else (key,): v for key, v in value.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._collected().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = {labels: list(series) for labels, series in self._values.items()}
+        for labels, series in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering a name (e.g. a module reloaded in dev) replaces it
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken callback must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+def counter(name, documentation, labelnames=(), fn=None):
+    return registry.register(Counter(name, documentation, labelnames, fn))
+
+def gauge(name, documentation, labelnames=(), fn=None):
+    return registry.register(Gauge(name, documentation, labelnames, fn))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+# Shared registry rendered by GET /metrics; values are per worker process
+registry = Registry()
+
+# Scrapes reach one worker at a time; the pid tells them apart
+gauge("hr_ai_process_info", "Constant 1, labelled with the serving worker's pid.", ("pid",),
+      fn=lambda: {str(os.getpid()): 1})
+
+REQUEST_SECONDS = histogram("hr_ai_http_request_duration_seconds", "HTTP request latency by route template.",
+                            ("method", "route"))
+REQUESTS = counter("hr_ai_http_requests_total", "HTTP requests by route template and status.",
+                   ("method", "route", "status"))
+IN_FLIGHT = gauge("hr_ai_http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+
+# Pure ASGI middleware (no per-request task or body buffering). Routes are
+# labelled by their template, e.g. /trigger/jobs/{job_id}, once routing has
+# matched them, so ids never become label values.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(method)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            REQUESTS.inc(method, route, str(status))
@@ -0,0 +1,48 @@
+import time
+import numpy as np
+from app.core.q_table import encode_state, State
+from app.utils.helpers import calculate_reward
+
+# Same neutral state the single-event endpoints use
+SKILLS_MATCH = 5
+EXPERIENCE_LEVEL = 5
+
+def ingest_batch(feedback_rows, hr_rows, rl_model, sentiment_model, logger):
+    # feedback_rows / hr_rows: lists of (index, validated model). Sentiment runs
+    # over all HR comments in one call, the Q-updates go through one grouped
+    # update_q_values_batch and the log rows through one log_rewards call.
+    timings = {}
+    start = time.perf_counter()
+
+    sentiments = sentiment_model.analyze_batch([row.comment for _, row in hr_rows])
+    timings["sentiment"] = time.perf_counter() - start
+
+    candidate_ids, actions, rewards, log_rows, results = [], [], [], [], []
+    for index, row in feedback_rows:
+        action_idx = rl_model.actions.index(row.action)
+        candidate_ids.append(row.candidate_id)
+        actions.append(action_idx)
+        rewards.append(row.reward)
+        log_rows.append((row.candidate_id, State(row.candidate_id, SKILLS_MATCH, EXPERIENCE_LEVEL),
+                         row.action, row.reward, row.comment))
+        results.append({"index": index, "status": "ok", "reward": row.reward})
+    for (index, row), sentiment in zip(hr_rows, sentiments):
+        reward = calculate_reward(row.feedback_score, "accept", row.actual_outcome)
+        candidate_ids.append(row.candidate_id)
+        actions.append(0 if row.actual_outcome == "accept" else 1)
+        rewards.append(reward)
+        log_rows.append((row.candidate_id, State(row.candidate_id, SKILLS_MATCH, EXPERIENCE_LEVEL),
+                         row.actual_outcome, reward, row.comment))
+        results.append({"index": index, "status": "ok", "reward": reward, "sentiment": sentiment})
+
+    mark = time.perf_counter()
+    keys = encode_state(np.asarray(candidate_ids, dtype=np.int64), SKILLS_MATCH, EXPERIENCE_LEVEL)
+    updated = rl_model.update_q_values_batch(keys, actions, rewards)
+    timings["q_update"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    if log_rows:
+        logger.log_rewards(log_rows)
+    timings["log"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - start
+    return results, updated, timings
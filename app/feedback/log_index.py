@@ -0,0 +1,106 @@
+import csv
+import os
+import threading
+from array import array
+
+BLOCK_SIZE = 64 * 1024
+
+def read_tail_lines(path, limit, block_size=BLOCK_SIZE, end=None):
+    # Reads whole lines backwards from EOF (or from byte offset `end`), one
+    # block at a time, so the cost depends on how much is returned rather
+    # than on the file size
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell() if end is None else min(end, f.tell())
+        buffer = b""
+        lines = []
+        while position > 0 and len(lines) < limit + 2:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            lines = buffer.split(b"\n")
+        if position > 0:
+            # The first piece may be a partial line; drop it
+            lines = lines[1:]
+        lines = [line for line in lines if line.strip()]
+        if position == 0 and lines:
+            # Skip the CSV header
+            lines = lines[1:]
+        return lines[-limit:] if limit else []
+
+def read_lines(path, start, limit, end=None):
+    # Whole lines forward from byte offset `start` (the header is skipped when
+    # starting at 0); returns (lines, offset just past the last line returned)
+    lines = []
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        if start == 0:
+            offset += len(f.readline())
+        for line in f:
+            if len(lines) >= limit or not line.endswith(b"\n") or (end is not None and offset + len(line) > end):
+                break
+            lines.append(line)
+            offset += len(line)
+    return lines, offset
+
+def parse_lines(lines, fieldnames):
+    return [dict(zip(fieldnames, row)) for row in csv.reader(line.decode() for line in lines)]
+
+# candidate_id -> byte offsets of that candidate's rows. Built by scanning
+# the log once and then caught up incrementally from the last indexed offset.
+class CandidateLogIndex:
+    def __init__(self, path):
+        self.path = path
+        self._offsets = {}
+        self._indexed_upto = 0
+        self._lock = threading.Lock()
+
+    def catch_up(self):
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return
+            if size < self._indexed_upto:
+                # File was truncated or replaced; start over
+                self._offsets = {}
+                self._indexed_upto = 0
+            if size == self._indexed_upto:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self._indexed_upto)
+                offset = self._indexed_upto
+                if offset == 0:
+                    offset += len(f.readline())
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Row still being written; pick it up next time
+                        break
+                    parts = line.split(b",", 2)
+                    if len(parts) > 1:
+                        try:
+                            candidate_id = int(parts[1])
+                        except ValueError:
+                            candidate_id = None
+                        if candidate_id is not None:
+                            self._offsets.setdefault(candidate_id, array('q')).append(offset)
+                    offset += len(line)
+                self._indexed_upto = offset
+
+    def offsets(self, candidate_id):
+        self.catch_up()
+        with self._lock:
+            return list(self._offsets.get(candidate_id, ()))
+
+    def read_rows(self, candidate_id, fieldnames, limit=None):
+        offsets = self.offsets(candidate_id)
+        if limit:
+            offsets = offsets[-limit:]
+        lines = []
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                lines.append(f.readline())
+        return parse_lines(lines, fieldnames)
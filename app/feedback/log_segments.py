@@ -0,0 +1,475 @@
+import csv
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from app.feedback.log_index import CandidateLogIndex, read_tail_lines, read_lines, parse_lines
+
+SEGMENT_RE = re.compile(r"^segment-(\d+)\.csv$")
+# Summary time series granularity -> length of the timestamp prefix
+BUCKETS = {"hour": 13, "day": 10}
+
+def event_type_of(state):
+    state = str(state)
+    return state[len("automation_"):] if state.startswith("automation_") else "feedback"
+
+def _mean(total, count):
+    return total / count if count else 0.0
+
+# Per-segment summary, kept up to date for the active file while it is
+# written and stored as a small JSON footer next to each sealed segment
+class SegmentStats:
+    def __init__(self):
+        self.rows = 0
+        self.min_ts = None
+        self.max_ts = None
+        self.min_candidate = None
+        self.max_candidate = None
+        self.action_counts = {}
+        self.event_counts = {}
+        self.reward_sums = {}
+        # Rows whose reward was numeric, i.e. actually summed, per action
+        self.reward_counts = {}
+        # hour ("YYYY-MM-DDTHH") -> action -> [count, reward sum, rewarded count], and
+        # hour -> event type -> count, for the metrics time series
+        self.hourly_rewards = {}
+        self.hourly_events = {}
+
+    def add(self, row):
+        timestamp, candidate_id, state, action, reward = (str(row[0]), row[1], row[2], str(row[3]), row[4])
+        self.rows += 1
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+        try:
+            candidate_id = int(candidate_id)
+            if self.min_candidate is None or candidate_id < self.min_candidate:
+                self.min_candidate = candidate_id
+            if self.max_candidate is None or candidate_id > self.max_candidate:
+                self.max_candidate = candidate_id
+        except (TypeError, ValueError):
+            pass
+        self.action_counts[action] = self.action_counts.get(action, 0) + 1
+        event_type = event_type_of(state)
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+        hour = timestamp[:13]
+        events = self.hourly_events.setdefault(hour, {})
+        events[event_type] = events.get(event_type, 0) + 1
+        bucket = self.hourly_rewards.setdefault(hour, {}).setdefault(action, [0, 0.0, 0])
+        bucket[0] += 1
+        try:
+            reward = float(reward)
+        except (TypeError, ValueError):
+            return
+        self.reward_sums[action] = self.reward_sums.get(action, 0.0) + reward
+        self.reward_counts[action] = self.reward_counts.get(action, 0) + 1
+        bucket[1] += reward
+        bucket[2] += 1
+
+    def merge(self, other):
+        # Folds another segment's counts in (the min/max bounds are not merged)
+        self.rows += other.rows
+        for name in ("action_counts", "event_counts", "reward_sums", "reward_counts"):
+            merged = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                merged[key] = merged.get(key, 0) + value
+        for hour, actions in other.hourly_rewards.items():
+            merged = self.hourly_rewards.setdefault(hour, {})
+            for action, (count, total, rewarded) in actions.items():
+                bucket = merged.setdefault(action, [0, 0.0, 0])
+                bucket[0] += count
+                bucket[1] += total
+                bucket[2] += rewarded
+        for hour, events in other.hourly_events.items():
+            merged = self.hourly_events.setdefault(hour, {})
+            for event_type, count in events.items():
+                merged[event_type] = merged.get(event_type, 0) + count
+
+    def mean_rewards(self):
+        # Non-numeric rewards are counted as rows but left out of the mean
+        return {action: _mean(self.reward_sums.get(action, 0.0), self.reward_counts.get(action, 0))
+                for action in self.action_counts}
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.__dict__.update(data)
+        return stats
+
+    def may_match(self, start=None, end=None, candidate_id=None, action=None, event_type=None):
+        if self.rows == 0:
+            return False
+        if start is not None and self.max_ts < start:
+            return False
+        if end is not None and self.min_ts > end:
+            return False
+        if candidate_id is not None and (self.min_candidate is None or not
+                                         self.min_candidate <= candidate_id <= self.max_candidate):
+            return False
+        if action is not None and action not in self.action_counts:
+            return False
+        if event_type is not None and event_type not in self.event_counts:
+            return False
+        return True
+
+    def within(self, start=None, end=None):
+        return (start is None or self.min_ts >= start) and (end is None or self.max_ts <= end)
+
+def row_matches(row, start=None, end=None, candidate_id=None, action=None, event_type=None):
+    if start is not None and row["timestamp"] < start:
+        return False
+    if end is not None and row["timestamp"] > end:
+        return False
+    if candidate_id is not None and row["candidate_id"] != str(candidate_id):
+        return False
+    if action is not None and row["action"] != action:
+        return False
+    if event_type is not None and event_type_of(row["state"]) != event_type:
+        return False
+    return True
+
+class Segment:
+    def __init__(self, seq, path, stats):
+        self.seq = seq
+        self.path = Path(path)
+        self.stats = stats
+        self.index = None
+
+    def candidate_index(self):
+        if self.index is None:
+            self.index = CandidateLogIndex(self.path)
+        return self.index
+
+# The active log file plus the sealed segments rolled out of it. Sealed
+# segments live in data/reward_log/segment-NNNNNN.csv with a .meta.json footer.
+class LogSegments:
+    def __init__(self, active_path, fieldnames):
+        self.active_path = Path(active_path)
+        self.directory = self.active_path.with_suffix("")
+        self.fieldnames = fieldnames
+        self._lock = threading.RLock()
+        self.sealed = []
+        self._sealed_mtime = None
+        self._refresh_sealed()
+        self.active = Segment(None, self.active_path, SegmentStats())
+        # Active stats are built by tailing the file, so rows written by
+        # other worker processes are counted too
+        self._active_inode = None
+        self._active_upto = 0
+        self._catch_up_active()
+        # Merged footers of the sealed segments, keyed by their seqs
+        self._sealed_total = (None, None)
+
+    def _refresh_sealed(self):
+        # Picks up segments sealed by other processes; existing Segment
+        # objects (and their indexes) are kept
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._sealed_mtime:
+            return
+        known = {segment.seq: segment for segment in self.sealed}
+        segments = []
+        for path in self.directory.iterdir():
+            match = SEGMENT_RE.match(path.name)
+            if not match:
+                continue
+            seq = int(match.group(1))
+            if seq in known:
+                segments.append(known[seq])
+                continue
+            meta_path = path.with_suffix(".meta.json")
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except FileNotFoundError:
+                meta = None
+            if meta is not None and "reward_counts" in meta:
+                stats = SegmentStats.from_dict(meta)
+            else:
+                # Missing footer, or one written before the hourly series or
+                # the rewarded-row counts existed
+                stats = self._scan_stats(path)
+                self._write_meta(meta_path, stats)
+            segments.append(Segment(seq, path, stats))
+        self.sealed = sorted(segments, key=lambda s: s.seq)
+        self._sealed_mtime = mtime
+
+    def _scan_stats(self, path):
+        stats = SegmentStats()
+        try:
+            with open(path, 'r', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    if len(row) >= 5:
+                        stats.add(row)
+        except FileNotFoundError:
+            pass
+        return stats
+
+    def _write_meta(self, meta_path, stats):
+        tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(stats.to_dict(), f)
+        os.replace(tmp_path, meta_path)
+
+    def _catch_up_active(self):
+        try:
+            f = open(self.active_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._active_inode or st.st_size < self._active_upto:
+                # Rotated (possibly by another process): start on the new file
+                self.active = Segment(None, self.active_path, SegmentStats())
+                self._active_inode = st.st_ino
+                self._active_upto = 0
+            if st.st_size == self._active_upto:
+                return
+            f.seek(self._active_upto)
+            offset = self._active_upto
+            if offset == 0:
+                offset += len(f.readline())
+            lines = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                lines.append(line)
+                offset += len(line)
+            for row in csv.reader(line.decode() for line in lines):
+                if len(row) >= 5:
+                    self.active.stats.add(row)
+            self._active_upto = offset
+
+    def active_stats(self):
+        with self._lock:
+            self._catch_up_active()
+            return self.active.stats
+
+    def rotate(self):
+        # The caller holds the cross-process log lock and has flushed its writes
+        with self._lock:
+            self._refresh_sealed()
+            stats = self.active_stats()
+            if stats.rows == 0:
+                return None
+            self.directory.mkdir(parents=True, exist_ok=True)
+            seq = self.sealed[-1].seq + 1 if self.sealed else 1
+            path = self.directory / f"segment-{seq:06d}.csv"
+            self._write_meta(path.with_suffix(".meta.json"), stats)
+            os.replace(self.active_path, path)
+            sealed = Segment(seq, path, stats)
+            # Offsets are unchanged by the rename, so the index carries over
+            sealed.index = self.active.index
+            if sealed.index is not None:
+                sealed.index.path = path
+            self.sealed.append(sealed)
+            self._sealed_mtime = None
+            self.active = Segment(None, self.active_path, SegmentStats())
+            self._active_inode = None
+            self._active_upto = 0
+            return path
+
+    def segments(self):
+        with self._lock:
+            self._refresh_sealed()
+            self._catch_up_active()
+            return list(self.sealed) + [self.active]
+
+    def _next_seq(self):
+        return self.sealed[-1].seq + 1 if self.sealed else 1
+
+    def _active_unchanged(self, inode):
+        try:
+            return os.stat(self.active_path).st_ino == inode
+        except FileNotFoundError:
+            return inode is None
+
+    def version(self):
+        # Changes whenever a row is logged or a segment is sealed
+        with self._lock:
+            self._refresh_sealed()
+            self._catch_up_active()
+            return f"{self._next_seq()}-{self._active_upto}"
+
+    def recent(self, limit):
+        # The last `limit` rows plus a cursor positioned right after them, for
+        # read_since to continue from. Retried if the active file is sealed
+        # (by another process) while it is being read.
+        with self._lock:
+            while True:
+                segments = self.segments()
+                inode, upto = self._active_inode, self._active_upto
+                cursor = f"{self._next_seq()}:{upto}"
+                rows = []
+                for segment in reversed(segments):
+                    if len(rows) >= limit:
+                        break
+                    try:
+                        lines = read_tail_lines(segment.path, limit - len(rows),
+                                                end=upto if segment is self.active else None)
+                    except FileNotFoundError:
+                        continue
+                    rows = parse_lines(lines, self.fieldnames) + rows
+                if self._active_unchanged(inode):
+                    return rows, cursor
+
+    def tail(self, limit):
+        return self.recent(limit)[0]
+
+    def read_since(self, cursor, limit=1000):
+        # Rows logged after `cursor` ("<segment seq>:<byte offset>"; the active
+        # file has the seq it will be sealed under), oldest first, and the
+        # cursor to pass next time. Sealing keeps byte offsets, so a cursor
+        # stays valid across rotations.
+        try:
+            seq, offset = (int(part) for part in cursor.split(":"))
+        except (AttributeError, ValueError):
+            raise ValueError(f"Malformed cursor {cursor!r}")
+        with self._lock:
+            while True:
+                segments = self.segments()
+                inode, upto = self._active_inode, self._active_upto
+                next_seq = self._next_seq()
+                if seq > next_seq:
+                    raise ValueError(f"Cursor {cursor!r} is ahead of the log")
+                rows, position = [], (seq, offset)
+                for segment in segments:
+                    segment_seq = segment.seq if segment.seq is not None else next_seq
+                    if segment_seq < seq:
+                        continue
+                    start = offset if segment_seq == seq else 0
+                    try:
+                        lines, stop = read_lines(segment.path, start, limit - len(rows),
+                                                 end=upto if segment is self.active else None)
+                    except FileNotFoundError:
+                        lines, stop = [], start
+                    rows += parse_lines(lines, self.fieldnames)
+                    position = (segment_seq, stop)
+                    if len(rows) >= limit:
+                        break
+                if self._active_unchanged(inode):
+                    return rows, f"{position[0]}:{position[1]}"
+
+    def summary(self, bucket="hour"):
+        # Whole-log aggregates: sealed segments are merged from their footers
+        # once per set of segments, the active file's stats are kept current
+        # by tailing it, so a summary costs no row scans
+        width = BUCKETS[bucket]
+        with self._lock:
+            segments = self.segments()
+            seqs = tuple(segment.seq for segment in self.sealed)
+            if self._sealed_total[0] != seqs:
+                sealed_total = SegmentStats()
+                for segment in self.sealed:
+                    sealed_total.merge(segment.stats)
+                self._sealed_total = (seqs, sealed_total)
+            total = SegmentStats()
+            total.merge(self._sealed_total[1])
+            total.merge(self.active.stats)
+            first = min((s.stats.min_ts for s in segments if s.stats.rows), default=None)
+            last = max((s.stats.max_ts for s in segments if s.stats.rows), default=None)
+        rewards, events = {}, {}
+        for hour, actions in total.hourly_rewards.items():
+            for action, (count, reward_sum, rewarded) in actions.items():
+                merged = rewards.setdefault((hour[:width], action), [0, 0.0, 0])
+                merged[0] += count
+                merged[1] += reward_sum
+                merged[2] += rewarded
+        for hour, counts in total.hourly_events.items():
+            for event_type, count in counts.items():
+                events[(hour[:width], event_type)] = events.get((hour[:width], event_type), 0) + count
+        return {
+            "rows": total.rows,
+            "first_event": first,
+            "last_event": last,
+            "counts_per_action": total.action_counts,
+            "mean_reward_per_action": total.mean_rewards(),
+            "counts_per_event_type": total.event_counts,
+            "reward_per_action_over_time": [
+                {"bucket": key, "action": action, "count": count, "mean_reward": _mean(reward_sum, rewarded)}
+                for (key, action), (count, reward_sum, rewarded) in sorted(rewards.items())
+            ],
+            "events_per_type_over_time": [
+                {"bucket": key, "event_type": event_type, "count": count}
+                for (key, event_type), count in sorted(events.items())
+            ],
+        }
+
+    def history(self, candidate_id, limit=None):
+        rows = []
+        for segment in reversed(self.segments()):
+            if limit and len(rows) >= limit:
+                break
+            if not segment.stats.may_match(candidate_id=candidate_id):
+                continue
+            try:
+                rows = segment.candidate_index().read_rows(
+                    candidate_id, self.fieldnames, limit - len(rows) if limit else None) + rows
+            except FileNotFoundError:
+                continue
+        return rows
+
+    def _scan(self, segment, candidate_id=None):
+        if candidate_id is not None:
+            return segment.candidate_index().read_rows(candidate_id, self.fieldnames)
+        with open(segment.path, 'r', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def query(self, start=None, end=None, candidate_id=None, action=None, event_type=None, limit=1000):
+        # Most recent `limit` matching rows, in log order
+        filters = dict(start=start, end=end, candidate_id=candidate_id, action=action, event_type=event_type)
+        rows = []
+        scanned = skipped = 0
+        for segment in reversed(self.segments()):
+            if len(rows) >= limit:
+                break
+            if not segment.stats.may_match(**filters):
+                skipped += 1
+                continue
+            scanned += 1
+            try:
+                matched = [row for row in self._scan(segment, candidate_id) if row_matches(row, **filters)]
+            except FileNotFoundError:
+                continue
+            rows = matched[-(limit - len(rows)):] + rows
+        return {"rows": rows, "segments_scanned": scanned, "segments_skipped": skipped}
+
+    def aggregate(self, start=None, end=None, candidate_id=None, action=None, event_type=None):
+        filters = dict(start=start, end=end, candidate_id=candidate_id, action=action, event_type=event_type)
+        total = SegmentStats()
+        scanned = from_footer = skipped = 0
+        for segment in self.segments():
+            stats = segment.stats
+            if not stats.may_match(**filters):
+                skipped += 1
+                continue
+            if candidate_id is None and action is None and event_type is None and stats.within(start, end):
+                # Whole segment qualifies: answer from its footer alone
+                from_footer += 1
+                total.merge(stats)
+                continue
+            scanned += 1
+            try:
+                for row in self._scan(segment, candidate_id):
+                    if row_matches(row, **filters):
+                        total.add([row[name] for name in self.fieldnames])
+            except FileNotFoundError:
+                continue
+        return {
+            "rows": total.rows,
+            "mean_reward_per_action": total.mean_rewards(),
+            "counts_per_action": total.action_counts,
+            "counts_per_event_type": total.event_counts,
+            "segments_scanned": scanned,
+            "segments_from_footer": from_footer,
+            "segments_skipped": skipped,
+        }
@@ -1,38 +1,244 @@
-import json
 import csv
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from config import (REWARD_LOG_BATCH_SIZE, REWARD_LOG_FLUSH_INTERVAL, REWARD_LOG_FSYNC,
+                    REWARD_LOG_SEGMENT_BYTES, REWARD_LOG_SEGMENT_SECONDS)
+from app.core import file_lock
+from app.core.telemetry import counter, gauge, histogram
+from app.feedback.log_segments import LogSegments
+
+LOG_HEADER = ["timestamp", "candidate_id", "state", "action", "reward", "feedback"]
+# Queue marker asking the writer thread to seal the active segment
+ROTATE = object()
+
+FLUSH_SECONDS = histogram("hr_ai_reward_log_flush_seconds", "Time to write and flush one batch of log rows.")
+ROWS_WRITTEN = counter("hr_ai_reward_log_rows_total", "Reward log rows written by this process.")
+
+def _one_line(feedback):
+    # Keep one row per physical line so the log can be read backwards
+    return str(feedback).replace("\r", " ").replace("\n", " ")
 
 class RewardLogger:
-    def __init__(self):
-        self.log_file = Path("data/reward_log.csv")
+    def __init__(self, log_file="data/reward_log.csv", batch_size=REWARD_LOG_BATCH_SIZE,
+                 flush_interval=REWARD_LOG_FLUSH_INTERVAL, fsync=REWARD_LOG_FSYNC,
+                 segment_bytes=REWARD_LOG_SEGMENT_BYTES, segment_seconds=REWARD_LOG_SEGMENT_SECONDS):
+        self.log_file = Path(log_file)
         self.log_file.parent.mkdir(exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._rotate_requested = False
+        self._file = None
+        self._writer = None
+        self._lock_fd = None
         self._init_log_file()
-    
+        self.segments = LogSegments(self.log_file, LOG_HEADER)
+
     def _init_log_file(self):
         if not self.log_file.exists():
             with open(self.log_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(["timestamp", "candidate_id", "state", "action", "reward", "feedback"])
-    
+                writer.writerow(LOG_HEADER)
+
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="reward-log-writer", daemon=True)
+                    self._thread.start()
+
     def log_reward(self, candidate_id, state, action, reward, feedback=""):
-        with open(self.log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                datetime.now().isoformat(),
-                candidate_id,
-                state,
-                action,
-                reward,
-                feedback
-            ])
-    
-    def get_recent_logs(self, limit=10):
-        logs = []
+        # Only enqueues; the writer thread does the file I/O off the request path
+        self._ensure_writer()
+        self._queue.put([datetime.now().isoformat(), candidate_id, state, action, reward, _one_line(feedback)])
+
+    def log_rewards(self, rows):
+        # rows: iterable of (candidate_id, state, action, reward, feedback)
+        self._ensure_writer()
+        timestamp = datetime.now().isoformat()
+        self._queue.put([[timestamp, *row[:4], _one_line(row[4] if len(row) > 4 else "")] for row in rows])
+
+    @contextmanager
+    def _file_lock(self):
+        # Serialises appends and rotation across worker processes sharing the log
+        if self._lock_fd is None:
+            self._lock_fd = file_lock.open_fd(self.log_file.with_suffix(".lock"))
+        file_lock.lockf(self._lock_fd, file_lock.LOCK_EX)
+        try:
+            yield
+        finally:
+            file_lock.lockf(self._lock_fd, file_lock.LOCK_UN)
+
+    def _open(self):
+        self._init_log_file()
+        self._file = open(self.log_file, 'a', newline='')
+        self._writer = csv.writer(self._file)
+
+    def _reopen_if_rotated(self):
+        # Another process may have sealed the file we hold open
         try:
-            with open(self.log_file, 'r') as f:
-                reader = csv.DictReader(f)
-                logs = list(reader)[-limit:]
+            rotated = os.stat(self.log_file).st_ino != os.fstat(self._file.fileno()).st_ino
         except FileNotFoundError:
-            pass
-        return logs
\ No newline at end of file
+            rotated = True
+        if rotated:
+            self._file.close()
+            self._open()
+        return rotated
+
+    def _run(self):
+        with self._file_lock():
+            self._open()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    if self._should_rotate():
+                        self._rotate()
+                    continue
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = self._write_batch(batch)
+                if self._should_rotate():
+                    self._rotate()
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch):
+        stop = False
+        rows = []
+        for item in batch:
+            if item is None:
+                stop = True
+            elif item is ROTATE:
+                self._rotate_requested = True
+            elif item and isinstance(item[0], list):
+                rows.extend(item)
+            else:
+                rows.append(item)
+        if rows:
+            with FLUSH_SECONDS.time(), self._file_lock():
+                self._reopen_if_rotated()
+                self._writer.writerows(rows)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            ROWS_WRITTEN.inc(amount=len(rows))
+        return stop
+
+    def _should_rotate(self):
+        stats = self.segments.active_stats()
+        if stats.rows == 0:
+            self._rotate_requested = False
+            return False
+        if self._rotate_requested:
+            return True
+        if self.segment_bytes and os.path.getsize(self.log_file) >= self.segment_bytes:
+            return True
+        if self.segment_seconds:
+            try:
+                age = (datetime.now() - datetime.fromisoformat(stats.min_ts)).total_seconds()
+            except ValueError:
+                # A mangled timestamp must not kill the writer thread. The
+                # active file was started when the last segment was sealed.
+                sealed = self.segments.segments()[:-1]
+                try:
+                    age = time.time() - os.path.getmtime(sealed[-1].path) if sealed else 0
+                except FileNotFoundError:
+                    age = 0
+            return age >= self.segment_seconds
+        return False
+
+    def _rotate(self):
+        # Seal the active file as the next segment and start a fresh one,
+        # unless another process got there first
+        with self._file_lock():
+            if self._file is not None and self._reopen_if_rotated():
+                self._rotate_requested = False
+                return
+            if not self._should_rotate():
+                return
+            self._rotate_requested = False
+            if self._file is not None:
+                self._file.close()
+            self.segments.rotate()
+            self._open()
+
+    def rotate(self):
+        # Forces a rollover of whatever has been written so far
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(ROTATE)
+            self._queue.join()
+        else:
+            with self._file_lock():
+                self.segments.rotate()
+                self._init_log_file()
+
+    def flush(self):
+        # Blocks until everything logged so far is on disk
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def get_recent_logs(self, limit=10):
+        self.flush()
+        return self.segments.tail(limit)
+
+    def get_recent_logs_with_cursor(self, limit=10):
+        self.flush()
+        return self.segments.recent(limit)
+
+    def get_logs_since(self, cursor, limit=1000):
+        self.flush()
+        return self.segments.read_since(cursor, limit)
+
+    def summary(self, bucket="hour"):
+        self.flush()
+        return self.segments.summary(bucket)
+
+    def version(self):
+        self.flush()
+        return self.segments.version()
+
+    def get_candidate_history(self, candidate_id, limit=None):
+        self.flush()
+        return self.segments.history(candidate_id, limit)
+
+    def query(self, **filters):
+        self.flush()
+        return self.segments.query(**filters)
+
+    def aggregate(self, **filters):
+        self.flush()
+        return self.segments.aggregate(**filters)
+
+# Shared instance so every router appends through the same writer thread
+reward_logger = RewardLogger()
+gauge("hr_ai_reward_log_queue_depth", "Log rows waiting for the writer thread.", fn=reward_logger.queue_depth)
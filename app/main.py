@@ -1,16 +1,107 @@
-from fastapi import FastAPI
-from app.routers import candidate, feedback, trigger
+import time
+from contextlib import asynccontextmanager
+import numpy as np
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from config import (METRICS_ENABLED, RL_CHECKPOINT_DIR, RL_CHECKPOINT_INTERVAL, RL_CHECKPOINT_KEEP,
+                    RL_CHECKPOINT_MMAP, RL_SHARED, RL_SHARED_PATH, RL_SHARED_CAPACITY, RL_SHARED_FLUSH_INTERVAL)
+from app.routers import candidate, feedback, metrics, trigger
 from app.core.rl_model import RLModel
+from app.core.q_table import encode_state
+from app.core.shared_rl import SharedRLModel
+from app.core.checkpoint import RLCheckpointer, list_checkpoints
+from app.core.candidate_store import candidate_store
+from app.core.match_engine import match_engine
+from app.core.match_cache import match_cache
+from app.core.profiler import profiler
+from app.core.telemetry import MetricsMiddleware, counter, gauge
+from app.feedback.reward_logger import reward_logger
+from app.agents.outbound import outbound_queue
 
-app = FastAPI(title="HR-AI Core Autonomy Upgrade")
+def preload():
+    # Loads everything a worker needs before serving. The production launcher
+    # calls this once before forking so workers share it copy-on-write.
+    # Load candidates once so the JSON parse stays out of the request path
+    candidate_store.load()
+    # Resume from the latest Q-table checkpoint instead of starting cold
+    if RL_SHARED:
+        # Restored by the process that creates the shared table, or by the
+        # first to start after a newer checkpoint was written
+        rl_model.open(initialize=lambda: checkpointer.restore_latest(mmap=False),
+                      latest_version=checkpointer.latest_version)
+    else:
+        checkpointer.restore_latest(mmap=RL_CHECKPOINT_MMAP)
+    app.state.preloaded = True
+
+def warmup(rounds=50):
+    # Runs the match and feedback hot paths once without side effects (no
+    # Q-table writes, no log rows) so caches and code paths are hot before
+    # the first request. Returns the seconds taken.
+    start = time.perf_counter()
+    candidates = candidate_store.all()[:rounds]
+    jobs = [" ".join(c.get("skills", [])) or "python" for c in candidates] or ["python"]
+    for candidate, job in zip(candidates, jobs):
+        for method in ("overlap", "tfidf"):
+            skills_match = match_engine.score_candidate(candidate["id"], job, method)
+            rl_model.get_q_values(rl_model.get_state(candidate["id"], int(skills_match * 10), 5))
+    match_engine.top_k(jobs[0], 10, "tfidf")
+    feedback.sentiment_model.analyze_batch(["great communication", "not experienced enough", "good fit"])
+    feedback.Feedback.model_validate({"candidate_id": 1, "action": "accept", "reward": 1.0})
+    feedback.HRFeedback.model_validate({"candidate_id": 1, "feedback_score": 4, "comment": "good",
+                                        "actual_outcome": "accept"})
+    scratch = RLModel(capacity=64)
+    keys = encode_state(np.arange(32, dtype=np.int64), 5, 5)
+    scratch.update_q_values_batch(keys, np.zeros(32, dtype=np.int64), np.ones(32))
+    app.openapi()
+    return time.perf_counter() - start
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not app.state.preloaded:
+        preload()
+    # With a shared table only the leader worker writes checkpoints
+    leader = rl_model.try_lead() if RL_SHARED else True
+    if leader:
+        checkpointer.start()
+    outbound_queue.start()
+    # Builds the score columns of known JDs in the background
+    match_cache.start()
+    if profiler is not None:
+        profiler.install_signal_handler()
+    yield
+    match_cache.stop()
+    # Flush queued work before the final checkpoint
+    outbound_queue.stop()
+    reward_logger.close()
+    if RL_SHARED:
+        rl_model.close()
+    if leader:
+        checkpointer.stop()
+        match_engine.save()
+    candidate_store.close()
+
+app = FastAPI(title="HR-AI Core Autonomy Upgrade", lifespan=lifespan)
 
 # Initialize RL Model
-rl_model = RLModel()
+rl_model = SharedRLModel(RL_SHARED_PATH, RL_SHARED_CAPACITY, RL_SHARED_FLUSH_INTERVAL) if RL_SHARED else RLModel()
+checkpointer = RLCheckpointer(rl_model, RL_CHECKPOINT_DIR, RL_CHECKPOINT_INTERVAL, RL_CHECKPOINT_KEEP)
 app.state.rl_model = rl_model
+app.state.checkpointer = checkpointer
+app.state.candidate_store = candidate_store
+app.state.preloaded = False
+
+gauge("hr_ai_q_table_states", "States in the Q-table.", fn=lambda: len(rl_model.q_table))
+gauge("hr_ai_q_table_bytes", "Memory held by the Q-table arrays.", fn=lambda: rl_model.q_table.nbytes)
+counter("hr_ai_q_updates_total", "Q-value updates applied (all workers when the table is shared).",
+        fn=lambda: rl_model.update_count)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(candidate.router)
 app.include_router(feedback.router)
 app.include_router(trigger.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
@@ -18,4 +109,27 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "healthy", "components": ["rl_model", "agents", "routers"]}
\ No newline at end of file
+    # Cheap live state of each component; GET /metrics has the full picture
+    return {"status": "healthy", "components": {
+        "candidate_store": {"candidates": len(candidate_store)},
+        "rl_model": {"states": len(rl_model.q_table), "updates": rl_model.update_count, "shared": RL_SHARED},
+        "reward_logger": {"queue_depth": reward_logger.queue_depth()},
+        "match_cache": {"columns": match_cache.stats()["columns"]},
+        "routers": ["candidate", "feedback", "trigger", "metrics"],
+    }}
+
+@app.get("/rl/checkpoints")
+def rl_checkpoints():
+    return {"serving": rl_model.checkpoint_version, "superseded_by": checkpointer.superseded_by,
+            "checkpoints": [version for version, _ in list_checkpoints(RL_CHECKPOINT_DIR)]}
+
+@app.post("/rl/checkpoints/promote")
+def promote_checkpoint(version: Optional[int] = None):
+    # Serves a checkpoint written elsewhere (by default the latest, e.g. from
+    # the replay trainer) without a restart; online updates since the
+    # current table was saved are replaced, the reward log still has them
+    try:
+        checkpointer.promote(version, mmap=RL_CHECKPOINT_MMAP and not RL_SHARED)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"serving": rl_model.checkpoint_version, "states": len(rl_model.q_table)}
\ No newline at end of file
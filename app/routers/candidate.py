@@ -1,45 +1,137 @@
-from fastapi import APIRouter, Request
-from pydantic import BaseModel
-from app.utils.helpers import load_json, save_json, validate_candidate_data
+import hashlib
+import io
+import json
+import tempfile
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from config import DEDUPE_POLICY
+from app.utils.helpers import CandidateId, etag_matches, validate_candidate_data
+from app.core.candidate_store import candidate_store
+from app.core.candidate_import import import_candidates
+from app.core.dedupe import resolve_duplicates
 from app.core.sentiment_model import SentimentModel
+from app.core.match_engine import match_engine
+from app.core.match_cache import match_cache
 
 router = APIRouter(prefix="/candidate", tags=["Candidate"])
-sentiment_model = SentimentModel()
+sentiment_model = SentimentModel(match_engine)
 
 class Candidate(BaseModel):
-    id: int
+    id: CandidateId
     name: str
     skills: list[str]
     match_score: float = 0.0
 
+# Candidates serialized per chunk when streaming NDJSON
+STREAM_CHUNK = 1000
+# Import uploads are buffered in memory up to this size, then spill to disk
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+DuplicatePolicy = Literal["off", "flag", "reject", "merge"]
+
 class JobMatch(BaseModel):
-    candidate_id: int
+    candidate_id: CandidateId
+    job_requirements: str
+    method: Literal["overlap", "tfidf"] = "overlap"
+
+class JobRank(BaseModel):
     job_requirements: str
+    k: int = Field(10, ge=1, le=1000)
+    method: Literal["overlap", "tfidf"] = "overlap"
 
 @router.post("/add")
-def add_candidate(candidate: Candidate):
-    candidates = load_json("data/candidates.json")
-    candidate_dict = candidate.dict()
-    candidates.append(candidate_dict)
-    save_json(candidates, "data/candidates.json")
-    return {"status": "Candidate added", "data": candidate}
+def add_candidate(candidate: Candidate, on_duplicate: Optional[DuplicatePolicy] = None):
+    # A near-duplicate of an existing candidate (same person under a new id)
+    # is added and listed under "duplicates" (flag), refused with 409
+    # (reject) or folded into the existing record (merge); the default
+    # comes from DEDUPE_POLICY
+    records, (outcome,) = resolve_duplicates([candidate.dict()], on_duplicate or DEDUPE_POLICY)
+    if outcome is not None and outcome["action"] == "rejected":
+        raise HTTPException(status_code=409, detail={"error": "Likely duplicate candidate",
+                                                     "duplicates": outcome["duplicates"]})
+    candidate_store.add_many(records)
+    if outcome is None:
+        return {"status": "Candidate added", "data": candidate}
+    if outcome["action"] == "merged":
+        return {"status": "Candidate merged", "merged_into": outcome["merged_into"], "data": records[0],
+                "duplicates": outcome["duplicates"]}
+    return {"status": "Candidate added", "data": candidate, "duplicates": outcome["duplicates"]}
+
+def _project(candidates, fields):
+    if not fields:
+        return candidates
+    return [{field: c[field] for field in fields if field in c} for c in candidates]
+
+@router.post("/import")
+async def import_candidate_file(request: Request, format: Optional[Literal["csv", "ndjson"]] = None,
+                                chunk_size: int = Query(50_000, ge=1, le=1_000_000),
+                                on_duplicate: Optional[DuplicatePolicy] = None):
+    # Body is the raw CSV or NDJSON file (format from ?format= or the
+    # Content-Type). It is spooled rather than held in memory, then imported
+    # in chunks off the event loop.
+    if format is None:
+        format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        lines = io.TextIOWrapper(body, encoding="utf-8", newline="")
+        try:
+            return await run_in_threadpool(import_candidates, lines, format, None, chunk_size, None,
+                                           on_duplicate or DEDUPE_POLICY)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/list")
-def list_candidates():
-    return load_json("data/candidates.json")
+def list_candidates(request: Request, cursor: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=10_000),
+                    fields: Optional[str] = None, format: Literal["json", "ndjson"] = "json",
+                    if_none_match: Optional[str] = Header(None)):
+    # Without a limit this is the whole list, as before. With one, the page
+    # ends where the X-Next-Cursor header (and a Link rel="next") says to
+    # resume. The ETag follows the store version and the normalized query
+    # (page, fields and format), so an unchanged list costs a 304.
+    fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    ndjson = format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+    representation = hashlib.blake2b(json.dumps([cursor, limit, fields, ndjson]).encode(), digest_size=8).hexdigest()
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept"}
+    etag = f'"{candidate_store.version}-{representation}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, **headers})
+    try:
+        # The body is built from this snapshot even when streamed, so a
+        # write arriving meanwhile cannot make it disagree with the ETag
+        version, page, next_cursor = candidate_store.versioned_page(cursor, limit)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown cursor {cursor}")
+    headers["ETag"] = f'"{version}-{representation}"'
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    if ndjson:
+        def stream():
+            for start in range(0, len(page), STREAM_CHUNK):
+                yield "".join(json.dumps(c) + "\n" for c in _project(page[start:start + STREAM_CHUNK], fields))
+        return StreamingResponse(stream(), media_type="application/x-ndjson", headers=headers)
+
+    # Serialized directly; the list is plain JSON already and large pages
+    # are much slower through response-model encoding
+    return Response(json.dumps(_project(page, fields)), media_type="application/json", headers=headers)
 
 @router.post("/match")
 def match_candidate(match_request: JobMatch, request: Request):
     rl_model = request.app.state.rl_model
-    candidates = load_json("data/candidates.json")
-    
-    candidate = next((c for c in candidates if c["id"] == match_request.candidate_id), None)
+    candidate = candidate_store.get(match_request.candidate_id)
     if not candidate:
         return {"error": "Candidate not found"}
     
-    skills_match = sentiment_model.calculate_match_score(
-        " ".join(candidate["skills"]), 
-        match_request.job_requirements
+    skills_match = match_cache.score(
+        match_request.candidate_id,
+        match_request.job_requirements,
+        match_request.method
     )
     
     recommendation = rl_model.get_recommendation(
@@ -52,4 +144,26 @@ def match_candidate(match_request: JobMatch, request: Request):
         "candidate_id": match_request.candidate_id,
         "skills_match": skills_match,
         "recommendation": recommendation
-    }
\ No newline at end of file
+    }
+
+@router.post("/rank")
+def rank_candidates(rank_request: JobRank, request: Request):
+    rl_model = request.app.state.rl_model
+    ranked = match_cache.top_k(rank_request.job_requirements, rank_request.k, rank_request.method)
+    
+    results = []
+    for candidate_id, skills_match in ranked:
+        candidate = candidate_store.get(candidate_id)
+        results.append({
+            "candidate_id": candidate_id,
+            "name": candidate.get("name") if candidate else None,
+            "skills_match": skills_match,
+            "recommendation": rl_model.get_recommendation(candidate_id, int(skills_match * 10), 5)
+        })
+    
+    return {
+        "job_requirements": rank_request.job_requirements,
+        "k": rank_request.k,
+        "method": rank_request.method,
+        "results": results
+    }
@@ -1,25 +1,35 @@
-from fastapi import APIRouter, Request
-from pydantic import BaseModel
-from app.feedback.reward_logger import RewardLogger
+import json
+import time
+from typing import Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from app.feedback.reward_logger import reward_logger
+from app.feedback.batch_ingest import ingest_batch
 from app.core.sentiment_model import SentimentModel
-from app.utils.helpers import calculate_reward
+from app.utils.helpers import CandidateId, calculate_reward
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
-reward_logger = RewardLogger()
 sentiment_model = SentimentModel()
 
 class Feedback(BaseModel):
-    candidate_id: int
+    candidate_id: CandidateId
     action: str
     reward: float
     comment: str = ""
 
 class HRFeedback(BaseModel):
-    candidate_id: int
+    candidate_id: CandidateId
     feedback_score: int
     comment: str
     actual_outcome: str
 
+class FeedbackBatch(BaseModel):
+    # Each row is either a Feedback or an HRFeedback (rows with feedback_score)
+    rows: list[Any]
+
+NDJSON_CHUNK_ROWS = 5000
+
 @router.post("/")
 def post_feedback(feedback: Feedback, request: Request):
     rl_model = request.app.state.rl_model
@@ -52,5 +62,105 @@ def hr_feedback(feedback: HRFeedback, request: Request):
     }
 
 @router.get("/logs")
-def get_feedback_logs():
-    return reward_logger.get_recent_logs()
\ No newline at end of file
+def get_feedback_logs(response: Response, since: Optional[str] = None,
+                      limit: Optional[int] = Query(None, ge=1, le=100_000)):
+    # Without `since`: the most recent rows. With it: the rows logged after
+    # that cursor, oldest first. Either way X-Log-Cursor is where to resume.
+    if since is None:
+        rows, cursor = reward_logger.get_recent_logs_with_cursor(limit or 10)
+    else:
+        try:
+            rows, cursor = reward_logger.get_logs_since(since, limit or 1000)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    response.headers["X-Log-Cursor"] = cursor
+    return rows
+
+@router.get("/query")
+def query_feedback_logs(start: Optional[str] = None, end: Optional[str] = None, candidate_id: Optional[int] = None,
+                        action: Optional[str] = None, event_type: Optional[str] = None,
+                        limit: int = Query(1000, ge=1, le=100_000)):
+    return reward_logger.query(start=start, end=end, candidate_id=candidate_id, action=action,
+                               event_type=event_type, limit=limit)
+
+@router.get("/aggregate")
+def aggregate_feedback_logs(start: Optional[str] = None, end: Optional[str] = None, candidate_id: Optional[int] = None,
+                            action: Optional[str] = None, event_type: Optional[str] = None):
+    return reward_logger.aggregate(start=start, end=end, candidate_id=candidate_id, action=action,
+                                   event_type=event_type)
+
+
+def _validate_rows(rows, actions, offset=0):
+    feedback_rows, hr_rows, errors = [], [], []
+    for index, row in enumerate(rows, offset):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row must be a JSON object")
+            if "feedback_score" in row:
+                hr_rows.append((index, HRFeedback.model_validate(row)))
+            else:
+                feedback = Feedback.model_validate(row)
+                if feedback.action not in actions:
+                    raise ValueError(f"action must be one of {actions}")
+                feedback_rows.append((index, feedback))
+        except (ValidationError, ValueError) as e:
+            errors.append({"index": index, "status": "error",
+                           "error": e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)})
+    return feedback_rows, hr_rows, errors
+
+def _ingest(rows, rl_model, offset=0):
+    feedback_rows, hr_rows, errors = _validate_rows(rows, rl_model.actions, offset)
+    results, updated, timings = ingest_batch(feedback_rows, hr_rows, rl_model, sentiment_model, reward_logger)
+    return sorted(results + errors, key=lambda r: r["index"]), updated, timings
+
+def _summary(results, updated, seconds):
+    return {
+        "rows": len(results),
+        "accepted": updated,
+        "rejected": len(results) - updated,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(len(results) / seconds, 1) if seconds > 0 else 0.0,
+    }
+
+@router.post("/batch")
+def post_feedback_batch(batch: FeedbackBatch, request: Request):
+    start = time.perf_counter()
+    results, updated, timings = _ingest(batch.rows, request.app.state.rl_model)
+    return {**_summary(results, updated, time.perf_counter() - start),
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            "results": results}
+
+@router.post("/batch/ndjson")
+async def post_feedback_ndjson(request: Request):
+    # One JSON object per line; rows are ingested in chunks as the upload arrives
+    rl_model = request.app.state.rl_model
+    start = time.perf_counter()
+    results, updated = [], 0
+    pending, buffer = [], b""
+
+    async def flush(rows):
+        nonlocal updated
+        chunk_results, chunk_updated, _ = await run_in_threadpool(_ingest, rows, rl_model, len(results))
+        results.extend(chunk_results)
+        updated += chunk_updated
+
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    pending.append(json.loads(line))
+                except ValueError:
+                    pending.append(None)
+        if len(pending) >= NDJSON_CHUNK_ROWS:
+            await flush(pending)
+            pending = []
+    if buffer.strip():
+        try:
+            pending.append(json.loads(buffer))
+        except ValueError:
+            pending.append(None)
+    if pending:
+        await flush(pending)
+    return {**_summary(results, updated, time.perf_counter() - start), "results": results}
@@ -0,0 +1,48 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.candidate_store import candidate_store
+from app.core.candidate_stats import candidate_stats
+from app.core.match_cache import match_cache
+from app.core.profiler import profiler
+from app.core.telemetry import CONTENT_TYPE, registry
+from app.feedback.reward_logger import reward_logger
+from app.utils.helpers import etag_matches
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("")
+def prometheus_metrics():
+    # Prometheus text format for the worker that serves the scrape
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+@router.get("/summary")
+def metrics_summary(bucket: Literal["hour", "day"] = "hour", if_none_match: Optional[str] = Header(None)):
+    # Built from aggregates kept up to date as rows are logged and candidates
+    # added; the ETag changes with either (and names the bucket), so pollers
+    # mostly get a 304
+    etag = f'"{reward_logger.version()}.{candidate_store.version}.{bucket}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    summary = reward_logger.summary(bucket)
+    summary["bucket"] = bucket
+    summary["candidates"] = candidate_stats.summary()
+    return JSONResponse(summary, headers=headers)
+
+@router.get("/match-cache")
+def match_cache_stats():
+    # Hit rate and size of the precomputed match scores in this worker
+    return match_cache.stats()
+
+@router.get("/profile")
+def profile_worker(seconds: float = Query(10.0, gt=0), interval: Optional[float] = Query(None, ge=0.001)):
+    # Samples this worker's threads for `seconds` and returns collapsed
+    # stacks for flamegraph.pl or speedscope. Opt-in via PROFILER_ENABLED.
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set PROFILER_ENABLED=1")
+    try:
+        counts = profiler.profile(seconds, interval)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(profiler.collapsed(counts))
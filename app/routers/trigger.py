@@ -1,61 +1,129 @@
-from fastapi import APIRouter, Request
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.agents import email_agent, whatsapp_agent, voice_agent
-from app.feedback.reward_logger import RewardLogger
+from app.agents.outbound import EVENT_ACTIONS, outbound_queue, enqueue_event, run_campaign
+from app.core.candidate_store import candidate_store
+from app.feedback.reward_logger import reward_logger
 from datetime import datetime
 
 router = APIRouter(prefix="/trigger", tags=["Automation"])
-reward_logger = RewardLogger()
 
 class TriggerEvent(BaseModel):
     candidate_id: int
     event_type: str
     metadata: dict = {}
+    idempotency_key: Optional[str] = None
+
+class CandidateFilter(BaseModel):
+    skills: list[str] = []
+    min_match_score: Optional[float] = None
+
+class BulkTrigger(BaseModel):
+    event_type: str
+    candidate_ids: Optional[list[int]] = None
+    filter: Optional[CandidateFilter] = None
 
 class AutomationResult(BaseModel):
     candidate_id: int
     actions_taken: list[str]
+    job_ids: list[str]
     timestamp: str
 
 @router.post("/")
-def trigger_event(event: TriggerEvent, request: Request) -> AutomationResult:
-    actions_taken = []
-    
-    if event.event_type == "shortlisted":
-        email_agent.send_email(event.candidate_id)
-        whatsapp_agent.send_whatsapp(event.candidate_id)
-        actions_taken = ["email_sent", "whatsapp_sent"]
-        
-    elif event.event_type == "rejected":
-        email_agent.send_email(event.candidate_id)
-        actions_taken = ["rejection_email_sent"]
-        
-    elif event.event_type == "onboarding_completed":
-        voice_agent.trigger_voice_call(event.candidate_id)
-        actions_taken = ["voice_call_triggered"]
-        
-    elif event.event_type == "interview_scheduled":
-        email_agent.send_email(event.candidate_id)
-        whatsapp_agent.send_whatsapp(event.candidate_id)
-        actions_taken = ["interview_notification_sent"]
-    
-    # Log automation event
-    reward_logger.log_reward(
-        event.candidate_id, 
-        f"automation_{event.event_type}", 
-        "triggered", 
-        1.0, 
-        f"Actions: {', '.join(actions_taken)}"
-    )
-    
+def trigger_event(event: TriggerEvent, request: Request,
+                  idempotency_key: Optional[str] = Header(None)) -> AutomationResult:
+    # Sends are queued and delivered by the outbound workers; poll /trigger/jobs/{id} for the outcome
+    key = idempotency_key or event.idempotency_key
+    jobs = enqueue_event(event.candidate_id, event.event_type, key)
+    actions_taken = list(dict.fromkeys(job["action"] for job, _ in jobs))
+
+    # Log automation event (once per idempotency key)
+    if not jobs or any(created for _, created in jobs):
+        reward_logger.log_reward(
+            event.candidate_id,
+            f"automation_{event.event_type}",
+            "triggered",
+            1.0,
+            f"Actions: {', '.join(actions_taken)}"
+        )
+
     return AutomationResult(
         candidate_id=event.candidate_id,
         actions_taken=actions_taken,
+        job_ids=[job["id"] for job, _ in jobs],
         timestamp=datetime.now().isoformat()
     )
 
+def resolve_candidates(candidate_ids=None, candidate_filter=None):
+    # One pass over the store; returns (matching ids, ids that were not found)
+    if candidate_ids is not None:
+        candidate_ids = list(dict.fromkeys(candidate_ids))
+        candidates = [candidate_store.get(candidate_id) for candidate_id in candidate_ids]
+        missing = [cid for cid, candidate in zip(candidate_ids, candidates) if candidate is None]
+        candidates = [candidate for candidate in candidates if candidate is not None]
+    else:
+        candidates, missing = candidate_store.all(), []
+    if candidate_filter is not None:
+        skills = {skill.lower() for skill in candidate_filter.skills}
+        min_score = candidate_filter.min_match_score
+        candidates = [
+            candidate for candidate in candidates
+            if (not skills or skills.intersection(skill.lower() for skill in candidate.get("skills", [])))
+            and (min_score is None or candidate.get("match_score", 0.0) >= min_score)
+        ]
+    return [candidate["id"] for candidate in candidates], missing
+
+@router.post("/bulk")
+def trigger_bulk(bulk: BulkTrigger):
+    # Streams NDJSON progress records while the campaign runs
+    if bulk.event_type not in EVENT_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown event type: {bulk.event_type}")
+    if bulk.candidate_ids is None and bulk.filter is None:
+        raise HTTPException(status_code=400, detail="Provide candidate_ids or filter")
+    candidate_ids, missing = resolve_candidates(bulk.candidate_ids, bulk.filter)
+
+    def log_batch(channel, action, delivered_ids):
+        # Written per delivered batch (one row per candidate and action), from
+        # the campaign threads, so a client that disconnects mid-stream still
+        # leaves a complete automation log
+        reward_logger.log_rewards([
+            (candidate_id, f"automation_{bulk.event_type}", "triggered", 1.0, f"Actions: {action}")
+            for candidate_id in delivered_ids
+        ])
+
+    def stream():
+        yield json.dumps({"type": "start", "event_type": bulk.event_type, "candidates": len(candidate_ids),
+                          "not_found": missing}) + "\n"
+        for event in run_campaign(bulk.event_type, candidate_ids, on_batch=log_batch):
+            if event["type"] == "done":
+                event["rows_logged"] = event["messages_sent"]
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get("/jobs")
+def list_jobs(status: Optional[str] = None, channel: Optional[str] = None, limit: int = 100):
+    return {"counts": outbound_queue.counts(), "jobs": outbound_queue.list(status, channel, limit)}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = outbound_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/{job_id}/retry")
+def retry_job(job_id: str):
+    job = outbound_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "dead":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, only dead jobs can be retried")
+    return outbound_queue.retry(job_id)
+
 @router.get("/history/{candidate_id}")
 def get_automation_history(candidate_id: int):
-    logs = reward_logger.get_recent_logs(50)
-    candidate_logs = [log for log in logs if int(log.get("candidate_id", 0)) == candidate_id]
-    return {"candidate_id": candidate_id, "automation_history": candidate_logs}
\ No newline at end of file
+    candidate_logs = reward_logger.get_candidate_history(candidate_id)
+    return {"candidate_id": candidate_id, "automation_history": candidate_logs}
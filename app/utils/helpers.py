@@ -1,6 +1,15 @@
 import json
+import os
 from datetime import datetime
 from pathlib import Path
+from typing import Annotated
+import numpy as np
+from pydantic import Field
+from app.core.q_table import MAX_CANDIDATE_ID
+
+# Candidate ids as request models accept them: they are packed into Q-table
+# state keys, which bounds their range
+CandidateId = Annotated[int, Field(ge=0, le=MAX_CANDIDATE_ID)]
 
 def load_json(file_path):
     try:
@@ -9,10 +18,21 @@ def load_json(file_path):
     except FileNotFoundError:
         return []
 
-def save_json(data, file_path):
-    Path(file_path).parent.mkdir(exist_ok=True)
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+def save_json(data, file_path, one_per_line=False):
+    path = Path(file_path)
+    path.parent.mkdir(exist_ok=True)
+    # Write to a temp file and rename so a crash never leaves a truncated file
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        if one_per_line:
+            # A list with one item per line: still readable, and much faster
+            # for large lists since indent=2 bypasses the C encoder
+            f.write("[\n" + ",\n".join(json.dumps(item) for item in data) + "\n]\n")
+        else:
+            json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 def calculate_reward(feedback_score, action_taken, actual_outcome):
     if action_taken == actual_outcome:
@@ -25,4 +45,38 @@ def format_timestamp():
 
 def validate_candidate_data(candidate):
     required_fields = ["id", "name", "skills"]
-    return all(field in candidate for field in required_fields)
\ No newline at end of file
+    return all(field in candidate for field in required_fields)
+
+def validate_candidates(ids, names, skills, match_scores):
+    # Column-wise validate_candidate_data for bulk imports. Takes one list per
+    # field (skills already split into lists, scores as floats or NaN) and
+    # returns (valid mask, int64 ids, {reason: mask}); a row is reported under
+    # the first check it fails.
+    id_text = np.char.strip(np.asarray([str(i) if i is not None else "" for i in ids], dtype=str))
+    # Digits only, short enough to parse as int64, and within the Q-table's id range
+    id_ok = np.char.isdigit(id_text) & (np.char.str_len(id_text) <= 18)
+    id_ok[id_ok] = id_text[id_ok].astype(np.int64) <= MAX_CANDIDATE_ID
+    name_text = np.char.strip(np.asarray([n if isinstance(n, str) else "" for n in names], dtype=str))
+    skill_counts = np.fromiter((len(s) for s in skills), dtype=np.int64, count=len(skills))
+    scores = np.asarray(match_scores, dtype=np.float64)
+    checks = {
+        "invalid_id": ~id_ok,
+        "missing_name": np.char.str_len(name_text) == 0,
+        "missing_skills": skill_counts == 0,
+        "invalid_match_score": ~np.isfinite(scores),
+    }
+    valid = np.ones(len(id_text), dtype=bool)
+    reasons = {}
+    for reason, failed in checks.items():
+        reasons[reason] = failed & valid
+        valid &= ~failed
+    parsed = np.zeros(len(id_text), dtype=np.int64)
+    parsed[valid] = id_text[valid].astype(np.int64)
+    return valid, parsed, reasons
+
+def etag_matches(if_none_match, etag):
+    # True if an If-None-Match header value covers `etag` (weak tags compare equal)
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
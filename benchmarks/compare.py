@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/load-base.json benchmarks/results/load-new.json
+    python -m benchmarks.compare base.json new.json --metric p99_ms --threshold 0.2
+
+Works with the output of benchmarks.micro and benchmarks.load. A benchmark
+regresses when its latency metric grows, or its throughput drops, by more
+than --threshold (a fraction). Exits with status 1 if any did.
+"""
+
+import argparse
+import json
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base, new, metric="p95_ms", threshold=0.1):
+    # Rows of (name, base value, new value, relative change, regressed)
+    rows = []
+    for name in base["results"].keys() & new["results"].keys():
+        for key, lower_is_better in ((metric, True), ("ops_per_sec", False)):
+            old, cur = base["results"][name].get(key), new["results"][name].get(key)
+            if not old or cur is None:
+                continue
+            change = (cur - old) / old
+            regressed = change > threshold if lower_is_better else change < -threshold
+            rows.append((f"{name}.{key}", old, cur, change, regressed))
+    return sorted(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms", "mean_ms"))
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    for key in ("kind", "mode", "scale", "cpu_count"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {new['meta'].get(key)})")
+    rows = compare(base, new, args.metric, args.threshold)
+    for name, old, cur, change, regressed in rows:
+        print(f"{name:<40} {old:>12.4f} {cur:>12.4f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} "
+          f"({base['meta'].get('commit')} -> {new['meta'].get('commit')})")
+    raise SystemExit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
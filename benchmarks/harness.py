@@ -0,0 +1,111 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+# Relative --out paths are taken from where the benchmark was started
+LAUNCH_DIR = Path.cwd()
+SCALES = {"k": 1_000, "m": 1_000_000}
+
+def parse_scale(text):
+    # "1k", "250k", "1m" or a plain number
+    text = str(text).strip().lower().replace("_", "")
+    if text and text[-1] in SCALES:
+        return int(float(text[:-1]) * SCALES[text[-1]])
+    return int(text)
+
+def scratch_workspace(root=None):
+    # Points every data and model path at a throwaway directory and sends
+    # outbound messages through the stub transport. Must run before the app
+    # is imported, since modules read config at import time.
+    root = Path(root or tempfile.mkdtemp(prefix="hr-ai-bench-"))
+    (root / "data").mkdir(parents=True, exist_ok=True)
+    (root / "feedback").mkdir(exist_ok=True)
+    os.environ.setdefault("OUTBOUND_TRANSPORT", "stub")
+    os.environ.setdefault("OUTBOUND_STUB_LATENCY", "0.001")
+    os.environ.setdefault("RL_CHECKPOINT_INTERVAL", "3600")
+    os.environ["RL_SHARED"] = "0"
+    os.chdir(root)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    import config
+    config.DATA_DIR = root / "feedback"
+    config.CVS_PATH = config.DATA_DIR / "cvs.csv"
+    config.JDS_PATH = config.DATA_DIR / "jds.csv"
+    config.MODELS_DIR = root / "models"
+    config.TFIDF_MODEL_PATH = config.MODELS_DIR / "tfidf_model.pkl"
+    config.RL_CHECKPOINT_DIR = config.MODELS_DIR / "q_table"
+    return root
+
+def summarize(samples_ns, wall_seconds=None):
+    # Latency percentiles in ms; ops/sec from wall time when the samples
+    # overlapped (concurrent requests), from their sum otherwise
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    if not len(samples):
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    seconds = wall_seconds if wall_seconds is not None else samples.sum() / 1e3
+    return {"count": int(len(samples)), "mean_ms": round(float(samples.mean()), 4),
+            "p50_ms": round(float(p50), 4), "p95_ms": round(float(p95), 4), "p99_ms": round(float(p99), 4),
+            "max_ms": round(float(samples.max()), 4),
+            "ops_per_sec": round(len(samples) / seconds, 1) if seconds > 0 else 0.0}
+
+def peak_rss_bytes(pid=None):
+    # Peak resident set of this process, or of another one via /proc (Linux);
+    # None where it cannot be read
+    if pid is None:
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return usage if sys.platform == "darwin" else usage * 1024
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        pass
+    return None
+
+def metadata(kind, **extra):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"kind": kind, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), **extra}
+
+def write_results(kind, meta, results, out=None):
+    # {"meta": ..., "results": {name: summary}} so any two runs can be
+    # compared with benchmarks.compare
+    path = Path(out) if out else RESULTS_DIR / f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    if not path.is_absolute():
+        path = LAUNCH_DIR / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    return path
+
+def report(name, summary):
+    print(f"{name:<28} p50 {summary.get('p50_ms', 0):>9.4f}ms  p95 {summary.get('p95_ms', 0):>9.4f}ms  "
+          f"p99 {summary.get('p99_ms', 0):>9.4f}ms  {summary.get('ops_per_sec', 0):>12,.1f} ops/s", flush=True)
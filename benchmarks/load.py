@@ -0,0 +1,275 @@
+"""
+End-to-end load run against every router of the API.
+
+    python -m benchmarks.load --scale 10k                        # in-process (ASGI, no sockets)
+    python -m benchmarks.load --scale 100k --uvicorn --workers 2  # local uvicorn via run_fastapi.py --prod
+    python -m benchmarks.load --url http://localhost:5000         # a server that is already running
+
+In-process and --uvicorn runs use a scratch directory seeded with --scale
+synthetic candidates, known job descriptions and reward log rows; outbound
+messages go through the stub transport. Each endpoint is driven with
+--requests requests at --concurrency in flight, and p50/p95/p99 latency,
+throughput, errors and peak RSS are written to a JSON file (see
+benchmarks.compare).
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.harness import (REPO_ROOT, metadata, parse_scale, peak_rss_bytes, report, scratch_workspace,
+                                summarize, write_results)
+from benchmarks import synthetic
+
+# Requests per endpoint are scaled by this for the heavier ones
+HEAVY = 0.1
+READY_TIMEOUT = 600
+
+def seed(scale, seed_value, n_jds=20, log_rows=None):
+    # Writes the pool as a compacted store snapshot, the JDs the match cache
+    # prebuilds, and a reward log for the read endpoints
+    from app.feedback.reward_logger import LOG_HEADER
+    from app.utils.helpers import save_json
+    import config
+    save_json(list(synthetic.candidates(scale, seed_value)), "data/candidates.json", one_per_line=True)
+    jds = synthetic.job_descriptions(n_jds, seed_value)
+    synthetic.write_job_descriptions_csv(config.JDS_PATH, jds)
+    with open("data/reward_log.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        writer.writerows(synthetic.log_rows(scale if log_rows is None else log_rows, scale, seed_value))
+    return jds
+
+class Workload:
+    # Request builders per endpoint; ids and texts come from the same
+    # seeded generators that filled the scratch directory
+    def __init__(self, scale, jds, seed_value):
+        self.scale = scale
+        self.jds = jds
+        self.rng = random.Random(seed_value + 10)
+        self.feedback = synthetic.feedback_rows(10**9, scale, seed_value)
+        self.events = synthetic.trigger_events(10**9, scale, seed_value)
+        self.next_id = scale + 1
+        self.job_ids = []
+
+    def candidate_id(self):
+        return self.rng.randint(1, self.scale)
+
+    def new_ids(self, n):
+        start, self.next_id = self.next_id, self.next_id + n
+        return start
+
+    def ops(self):
+        # (name, relative request count, async fn(client) -> response)
+        rng = self.rng
+
+        def add(c):
+            start = self.new_ids(1)
+            candidate = next(synthetic.candidates(1, start, start))
+            return c.post("/candidate/add", json=candidate)
+
+        def import_csv(c):
+            start = self.new_ids(100)
+            return c.post("/candidate/import", content=synthetic.candidates_csv(synthetic.candidates(100, start, start)),
+                          headers={"Content-Type": "text/csv"})
+
+        async def trigger(c):
+            response = await c.post("/trigger/", json=next(self.events))
+            if response.status_code == 200:
+                self.job_ids.extend(response.json()["job_ids"])
+            return response
+
+        async def bulk(c):
+            ids = [self.candidate_id() for _ in range(10)]
+            async with c.stream("POST", "/trigger/bulk", json={"event_type": "interview_scheduled",
+                                                                "candidate_ids": ids}) as response:
+                async for _ in response.aiter_lines():
+                    pass
+            return response
+
+        def feedback(c):
+            row = next(self.feedback)
+            while "feedback_score" in row:
+                row = next(self.feedback)
+            return c.post("/feedback/", json=row)
+
+        def hr_feedback(c):
+            row = next(self.feedback)
+            while "feedback_score" not in row:
+                row = next(self.feedback)
+            return c.post("/feedback/hr_feedback", json=row)
+
+        return [
+            ("root", 1, lambda c: c.get("/")),
+            ("health", 1, lambda c: c.get("/health")),
+            ("candidate_add", 1, add),
+            ("candidate_import_100", HEAVY, import_csv),
+            ("candidate_list_100", 1, lambda c: c.get("/candidate/list", params={"limit": 100})),
+            ("candidate_match", 1, lambda c: c.post("/candidate/match", json={
+                "candidate_id": self.candidate_id(), "job_requirements": rng.choice(self.jds)})),
+            ("candidate_match_tfidf", 1, lambda c: c.post("/candidate/match", json={
+                "candidate_id": self.candidate_id(), "job_requirements": rng.choice(self.jds), "method": "tfidf"})),
+            ("candidate_rank", 1, lambda c: c.post("/candidate/rank", json={
+                "job_requirements": rng.choice(self.jds), "k": 10})),
+            ("feedback_post", 1, feedback),
+            ("feedback_hr", 1, hr_feedback),
+            ("feedback_batch_100", HEAVY, lambda c: c.post("/feedback/batch", json={
+                "rows": [next(self.feedback) for _ in range(100)]})),
+            ("feedback_logs", 1, lambda c: c.get("/feedback/logs", params={"limit": 50})),
+            ("feedback_query", 1, lambda c: c.get("/feedback/query", params={
+                "candidate_id": self.candidate_id(), "limit": 100})),
+            ("feedback_aggregate", HEAVY, lambda c: c.get("/feedback/aggregate")),
+            ("trigger_event", 1, trigger),
+            ("trigger_bulk_10", HEAVY, bulk),
+            ("trigger_jobs", 1, lambda c: c.get("/trigger/jobs", params={"limit": 20})),
+            ("trigger_job", 1, lambda c: c.get(f"/trigger/jobs/{rng.choice(self.job_ids or ['none'])}")),
+            ("trigger_history", 1, lambda c: c.get(f"/trigger/history/{self.candidate_id()}")),
+            ("metrics_summary", 1, lambda c: c.get("/metrics/summary")),
+            ("metrics_match_cache", 1, lambda c: c.get("/metrics/match-cache")),
+        ]
+
+async def drive(client, name, fn, requests, concurrency):
+    samples, errors = [], 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        clock = time.perf_counter_ns
+        while remaining > 0:
+            remaining -= 1
+            start = clock()
+            response = await fn(client)
+            samples.append(clock() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    summary = summarize(samples, time.perf_counter() - start)
+    summary["errors"] = errors
+    report(name, summary)
+    return summary
+
+async def run(client, workload, requests, concurrency, only=None):
+    results = {}
+    total, start = 0, time.perf_counter()
+    for name, weight, fn in workload.ops():
+        if only and name not in only:
+            continue
+        count = max(5, int(requests * weight))
+        results[name] = await drive(client, name, fn, count, concurrency)
+        total += count
+    elapsed = time.perf_counter() - start
+    return results, {"total_requests": total, "seconds": round(elapsed, 3), "requests_per_sec": round(total / elapsed, 1)}
+
+async def run_in_process(args, scale):
+    jds = seed(scale, args.seed)
+    from app.main import app
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup = time.perf_counter() - start
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results, totals = await run(client, Workload(scale, jds, args.seed), args.requests, args.concurrency,
+                                        args.only)
+    return results, {**totals, "startup_seconds": round(startup, 3), "peak_rss_bytes": peak_rss_bytes()}
+
+def _process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        pass
+    return pids
+
+async def run_uvicorn(args, scale, workdir):
+    jds = seed(scale, args.seed)
+    command = [sys.executable, "-m", "benchmarks.load", "--serve", "--workdir", str(workdir),
+               "--port", str(args.port), "--workers", str(args.workers)]
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=REPO_ROOT)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=None,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            while True:
+                if server.poll() is not None:
+                    raise SystemExit(f"server exited with status {server.returncode}")
+                if time.perf_counter() - start > READY_TIMEOUT:
+                    raise SystemExit("server did not become ready")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.2)
+            startup = time.perf_counter() - start
+            results, totals = await run(client, Workload(scale, jds, args.seed), args.requests, args.concurrency,
+                                        args.only)
+            rss = [peak_rss_bytes(pid) for pid in _process_tree(server.pid)]
+    finally:
+        server.terminate()
+        server.wait()
+    return results, {**totals, "startup_seconds": round(startup, 3),
+                     "peak_rss_bytes": sum(r for r in rss if r), "peak_rss_bytes_per_process": rss}
+
+async def run_url(args, scale):
+    async with httpx.AsyncClient(base_url=args.url, timeout=None,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        jds = synthetic.job_descriptions(20, args.seed)
+        results, totals = await run(client, Workload(scale, jds, args.seed), args.requests, args.concurrency,
+                                    args.only)
+    return results, totals
+
+def serve(args):
+    # Server side of --uvicorn: the scratch paths must be set in this
+    # process before the app is imported
+    scratch_workspace(args.workdir)
+    import run_fastapi
+    run_fastapi.run_prod(run_fastapi.parse_args(["--prod", "--host", "127.0.0.1", "--port", str(args.port),
+                                                 "--workers", str(args.workers), "--log-level", "warning"]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="Seeded candidates and reward log rows (1k .. 1m)")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per endpoint (heavy ones get fewer)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="Run only these endpoints")
+    parser.add_argument("--uvicorn", action="store_true", help="Run against a local uvicorn instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes with --uvicorn")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--url", help="Run against this server (nothing is seeded)")
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temp dir)")
+    parser.add_argument("--out", help="Results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+    scale = parse_scale(args.scale)
+    if args.url:
+        mode, workdir = "url", None
+        results, totals = asyncio.run(run_url(args, scale))
+    else:
+        workdir = scratch_workspace(args.workdir)
+        if args.uvicorn:
+            mode = "uvicorn"
+            results, totals = asyncio.run(run_uvicorn(args, scale, workdir))
+        else:
+            mode = "in-process"
+            results, totals = asyncio.run(run_in_process(args, scale))
+    meta = metadata("load", mode=mode, scale=scale, requests=args.requests, concurrency=args.concurrency,
+                    workers=args.workers if mode == "uvicorn" else None, url=args.url, seed=args.seed,
+                    workdir=str(workdir) if workdir else None, **totals)
+    path = write_results("load", meta, results, args.out)
+    rss = f"peak RSS {totals['peak_rss_bytes'] / 2**20:,.1f} MiB; " if totals.get("peak_rss_bytes") else ""
+    print(f"[Bench] {totals['total_requests']:,} requests in {totals['seconds']:.2f}s "
+          f"({totals['requests_per_sec']:,.1f} req/s); {rss}results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Micro-benchmarks for the per-request hot paths, on synthetic data.
+
+    python -m benchmarks.micro --scale 100k
+    python -m benchmarks.micro --scale 1m --calls 20000 --out benchmarks/results/micro-1m.json
+
+Times single calls of SentimentModel.calculate_match_score/analyze_feedback,
+RLModel.update_q_value/get_recommendation, DuplicateIndex.find,
+RewardLogger.log_reward/get_recent_logs and helpers.load_json against a
+pool, Q-table and reward log of --scale entries, in a scratch directory.
+Writes p50/p95/p99 per call and peak RSS to a JSON file (see
+benchmarks.compare).
+"""
+
+import argparse
+import csv
+import random
+import time
+from benchmarks.harness import metadata, parse_scale, peak_rss_bytes, report, scratch_workspace, summarize, \
+    write_results
+
+def timed(fn, args_list):
+    samples = []
+    clock = time.perf_counter_ns
+    for args in args_list:
+        start = clock()
+        fn(*args)
+        samples.append(clock() - start)
+    return samples
+
+def run(scale, calls, seed):
+    from app.core.dedupe import DuplicateIndex
+    from app.core.match_engine import MatchEngine
+    from app.core.rl_model import RLModel
+    from app.core.sentiment_model import SentimentModel
+    from app.feedback.reward_logger import LOG_HEADER, RewardLogger
+    from app.utils.helpers import load_json, save_json
+    from benchmarks import synthetic
+
+    rng = random.Random(seed)
+    results = {}
+
+    def record(name, samples):
+        results[name] = summarize(samples)
+        report(name, results[name])
+
+    start = time.perf_counter()
+    pool = list(synthetic.candidates(scale, seed))
+    engine = MatchEngine(model_path="models/tfidf_model.pkl")
+    engine.rebuild(pool)
+    print(f"[Bench] {scale:,} candidates generated and indexed in {time.perf_counter() - start:.2f}s", flush=True)
+
+    model = SentimentModel(engine)
+    jds = synthetic.job_descriptions(100, seed)
+    pairs = [(" ".join(rng.choice(pool)["skills"]), rng.choice(jds)) for _ in range(calls)]
+    record("calculate_match_score", timed(model.calculate_match_score, pairs))
+    record("calculate_match_score_tfidf",
+           timed(model.calculate_match_score, [(skills, jd, "tfidf") for skills, jd in pairs[:max(1, calls // 10)]]))
+    # Half repeated comments (cache hits), half unique ones
+    texts = synthetic.comments(calls, seed)
+    texts = [texts[i] if i % 2 else f"{texts[i]} #{i}" for i in range(calls)]
+    record("analyze_feedback", timed(model.analyze_feedback, [(text,) for text in texts]))
+
+    start = time.perf_counter()
+    index = DuplicateIndex()
+    index.rebuild(pool)
+    print(f"[Bench] duplicate index built in {time.perf_counter() - start:.2f}s", flush=True)
+    # Existing candidates submitted again under new ids
+    resubmitted = [dict(rng.choice(pool), id=scale + 1 + i) for i in range(calls)]
+    record("dedupe_find", timed(index.find, [(candidate,) for candidate in resubmitted]))
+    del index
+
+    rl_model = RLModel()
+    for candidate_id in range(1, scale + 1):
+        state = rl_model.get_state(candidate_id, candidate_id % 11, 5)
+        rl_model.update_q_value(state, candidate_id % 3, 1.0, state)
+    ids = [rng.randint(1, scale) for _ in range(calls)]
+    states = [rl_model.get_state(candidate_id, candidate_id % 11, 5) for candidate_id in ids]
+    record("update_q_value", timed(rl_model.update_q_value, [(state, 0, 0.5, state) for state in states]))
+    record("get_recommendation", timed(rl_model.get_recommendation, [(cid, cid % 11, 5) for cid in ids]))
+
+    with open("data/bench_reward_log.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        writer.writerows(synthetic.log_rows(scale, scale, seed))
+    logger = RewardLogger("data/bench_reward_log.csv")
+    record("log_reward", timed(logger.log_reward,
+                               [(cid, f"{cid}_5_5", "accept", 1.0, "good fit") for cid in ids]))
+    logger.flush()
+    record("get_recent_logs", timed(logger.get_recent_logs, [(10,)] * min(calls, 2000)))
+    logger.close()
+
+    save_json(pool, "data/bench_candidates.json", one_per_line=True)
+    del pool, engine
+    repeats = max(3, min(50, 5_000_000 // scale))
+    record("load_json", timed(load_json, [("data/bench_candidates.json",)] * repeats))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="Candidates, Q-table states and log rows (1k .. 1m)")
+    parser.add_argument("--calls", type=int, default=10_000, help="Timed calls per function")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temp dir)")
+    parser.add_argument("--out", help="Results file (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    scale = parse_scale(args.scale)
+    workdir = scratch_workspace(args.workdir)
+    results = run(scale, args.calls, args.seed)
+    meta = metadata("micro", scale=scale, calls=args.calls, seed=args.seed, workdir=str(workdir),
+                    peak_rss_bytes=peak_rss_bytes())
+    path = write_results("micro", meta, results, args.out)
+    rss = f"peak RSS {meta['peak_rss_bytes'] / 2**20:,.1f} MiB; " if meta["peak_rss_bytes"] else ""
+    print(f"[Bench] {rss}results written to {path}")
+
+if __name__ == "__main__":
+    main()
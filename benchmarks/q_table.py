@@ -0,0 +1,96 @@
+"""
+Q-table benchmark: array-backed RLModel vs the original dict-of-lists table.
+
+    python -m benchmarks.q_table --states 1000000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from app.core.rl_model import RLModel
+
+class DictRLModel:
+    # The original string-keyed implementation, kept here for comparison
+    def __init__(self):
+        self.q_table = {}
+        self.learning_rate = 0.1
+        self.discount_factor = 0.9
+        self.epsilon = 0.1
+        self.actions = ["accept", "reject", "reconsider"]
+
+    def get_state(self, candidate_id, skills_match, experience_level):
+        return f"{candidate_id}_{skills_match}_{experience_level}"
+
+    def choose_action(self, state):
+        if state not in self.q_table:
+            self.q_table[state] = [0.0] * len(self.actions)
+        if random.random() < self.epsilon:
+            return random.randint(0, len(self.actions) - 1)
+        return self.q_table[state].index(max(self.q_table[state]))
+
+    def update_q_value(self, state, action, reward, next_state):
+        if state not in self.q_table:
+            self.q_table[state] = [0.0] * len(self.actions)
+        if next_state not in self.q_table:
+            self.q_table[next_state] = [0.0] * len(self.actions)
+        current_q = self.q_table[state][action]
+        max_next_q = max(self.q_table[next_state])
+        new_q = current_q + self.learning_rate * (reward + self.discount_factor * max_next_q - current_q)
+        self.q_table[state][action] = new_q
+
+    def get_recommendation(self, candidate_id, skills_match, experience_level):
+        state = self.get_state(candidate_id, skills_match, experience_level)
+        return self.actions[self.choose_action(state)]
+
+def fill(model, n_states):
+    for candidate_id in range(n_states):
+        state = model.get_state(candidate_id, candidate_id % 11, 5)
+        model.update_q_value(state, candidate_id % 3, 1.0, state)
+
+def run(model_factory, n_states, n_calls):
+    tracemalloc.start()
+    model = model_factory()
+    fill(model, n_states)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+
+    model = model_factory()
+    start = time.perf_counter()
+    fill(model, n_states)
+    fill_seconds = time.perf_counter() - start
+
+    ids = [random.randrange(n_states) for _ in range(n_calls)]
+    start = time.perf_counter()
+    for candidate_id in ids:
+        state = model.get_state(candidate_id, candidate_id % 11, 5)
+        model.update_q_value(state, 0, 0.5, state)
+    update_us = (time.perf_counter() - start) / n_calls * 1e6
+
+    start = time.perf_counter()
+    for candidate_id in ids:
+        model.get_recommendation(candidate_id, candidate_id % 11, 5)
+    recommend_us = (time.perf_counter() - start) / n_calls * 1e6
+
+    return {
+        "states": n_states,
+        "fill_seconds": round(fill_seconds, 3),
+        "bytes_per_state": round(retained / n_states, 1),
+        "peak_bytes_per_state": round(peak / n_states, 1),
+        "update_q_value_us": round(update_us, 3),
+        "get_recommendation_us": round(recommend_us, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for name, factory in [("dict", DictRLModel), ("array", RLModel)]:
+        print(name, run(factory, args.states, args.calls))
+
+if __name__ == "__main__":
+    main()
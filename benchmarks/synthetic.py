@@ -0,0 +1,84 @@
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+
+SKILLS = ["python", "java", "sql", "aws", "docker", "kubernetes", "react", "node", "go", "rust", "spark",
+          "airflow", "terraform", "linux", "pandas", "numpy", "fastapi", "django", "flask", "postgres",
+          "redis", "kafka", "graphql", "typescript", "css", "html", "scala", "tableau", "excel", "figma",
+          "ml", "nlp", "pytorch", "tensorflow", "statistics", "leadership", "communication", "agile",
+          "scrum", "sales", "marketing", "finance", "accounting", "recruiting", "negotiation", "support"]
+COMMENT_WORDS = ["excellent", "great", "good", "outstanding", "skilled", "experienced", "poor", "bad", "weak",
+                 "inexperienced", "lacking", "insufficient", "not", "never", "very", "communication",
+                 "technical", "interview", "culture", "fit", "team", "answers", "portfolio", "references"]
+ACTIONS = ["accept", "reject", "reconsider"]
+OUTCOMES = ["accept", "reject"]
+EVENT_TYPES = ["shortlisted", "rejected", "onboarding_completed", "interview_scheduled"]
+
+# Seeded generators for candidate pools, job descriptions, feedback streams
+# and trigger events. Skill popularity is skewed like real pools: a few
+# skills are on most CVs, most are rare.
+
+def _skill_weights():
+    return [1.0 / (rank + 1) for rank in range(len(SKILLS))]
+
+def candidates(n, seed=0, start_id=1):
+    rng = random.Random(seed)
+    weights = _skill_weights()
+    for candidate_id in range(start_id, start_id + n):
+        skills = list(dict.fromkeys(rng.choices(SKILLS, weights, k=rng.randint(2, 8))))
+        yield {"id": candidate_id, "name": f"Candidate {candidate_id}", "skills": skills,
+               "match_score": round(rng.random(), 3)}
+
+def job_descriptions(n, seed=0):
+    rng = random.Random(seed + 1)
+    return [" ".join(rng.sample(SKILLS, rng.randint(2, 6))) for _ in range(n)]
+
+def comments(n, seed=0):
+    rng = random.Random(seed + 2)
+    return [" ".join(rng.choices(COMMENT_WORDS, k=rng.randint(3, 12))) for _ in range(n)]
+
+def feedback_rows(n, n_candidates, seed=0):
+    # Mixed stream of system feedback and HR feedback rows, as /feedback/batch takes them
+    rng = random.Random(seed + 3)
+    texts = comments(min(n, 5000) or 1, seed)
+    for _ in range(n):
+        candidate_id = rng.randint(1, n_candidates)
+        if rng.random() < 0.5:
+            yield {"candidate_id": candidate_id, "action": rng.choice(ACTIONS),
+                   "reward": round(rng.uniform(-1, 1), 2), "comment": rng.choice(texts)}
+        else:
+            yield {"candidate_id": candidate_id, "feedback_score": rng.randint(1, 5),
+                   "comment": rng.choice(texts), "actual_outcome": rng.choice(OUTCOMES)}
+
+def log_rows(n, n_candidates, seed=0, start=None):
+    # Reward log rows ([timestamp, candidate_id, state, action, reward, feedback]) spread over the last days
+    rng = random.Random(seed + 4)
+    start = start or datetime.now() - timedelta(days=7)
+    step = timedelta(days=7) / max(n, 1)
+    texts = comments(min(n, 5000) or 1, seed)
+    for i in range(n):
+        candidate_id = rng.randint(1, n_candidates)
+        yield [(start + step * i).isoformat(), candidate_id, f"{candidate_id}_5_5", rng.choice(ACTIONS),
+               round(rng.uniform(-1, 1), 2), rng.choice(texts)]
+
+def trigger_events(n, n_candidates, seed=0):
+    rng = random.Random(seed + 5)
+    for _ in range(n):
+        yield {"candidate_id": rng.randint(1, n_candidates), "event_type": rng.choice(EVENT_TYPES)}
+
+def candidates_csv(rows):
+    # The CSV candidate_import and POST /candidate/import take
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "name", "skills", "match_score"])
+    for c in rows:
+        writer.writerow([c["id"], c["name"], ";".join(c["skills"]), c["match_score"]])
+    return buffer.getvalue()
+
+def write_job_descriptions_csv(path, jds):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "requirements"])
+        for i, jd in enumerate(jds):
+            writer.writerow([i, f"Job {i}", jd])
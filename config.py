@@ -1,3 +1,4 @@
+import hashlib
 import os
 from pathlib import Path
 
@@ -30,6 +31,84 @@ SYSTEM_LOG_PATH = DATA_DIR / "system_log.json"
 MODELS_DIR = PROJECT_ROOT / "models"
 SENTIMENT_MODEL_PATH = MODELS_DIR / "sentiment_model.pkl"
 TFIDF_MODEL_PATH = MODELS_DIR / "tfidf_model.pkl"
+RL_CHECKPOINT_DIR = MODELS_DIR / "q_table"
+
+# RL checkpointing
+RL_CHECKPOINT_INTERVAL = float(os.getenv("RL_CHECKPOINT_INTERVAL", "60"))
+RL_CHECKPOINT_KEEP = int(os.getenv("RL_CHECKPOINT_KEEP", "3"))
+RL_CHECKPOINT_MMAP = os.getenv("RL_CHECKPOINT_MMAP", "1") == "1"
+
+# Shared-memory Q-table for multi-worker serving. The default file is per
+# checkout and port, so two deployments on one host never share a table
+RL_SHARED = os.getenv("RL_SHARED", "0") == "1"
+def rl_shared_path(port):
+    name = f"hr_ai_q_table-{hashlib.sha1(str(PROJECT_ROOT).encode()).hexdigest()[:8]}-{port}"
+    return f"/dev/shm/{name}" if os.path.isdir("/dev/shm") else str(MODELS_DIR / f"{name}.shm")
+
+RL_SHARED_PATH = os.getenv("RL_SHARED_PATH") or rl_shared_path(os.getenv("SERVER_PORT", "5000"))
+RL_SHARED_CAPACITY = int(os.getenv("RL_SHARED_CAPACITY", str(1 << 20)))
+RL_SHARED_FLUSH_INTERVAL = float(os.getenv("RL_SHARED_FLUSH_INTERVAL", "0.01"))
+
+# Reward log writer
+REWARD_LOG_BATCH_SIZE = int(os.getenv("REWARD_LOG_BATCH_SIZE", "500"))
+REWARD_LOG_FLUSH_INTERVAL = float(os.getenv("REWARD_LOG_FLUSH_INTERVAL", "0.5"))
+REWARD_LOG_FSYNC = os.getenv("REWARD_LOG_FSYNC", "0") == "1"
+REWARD_LOG_SEGMENT_BYTES = int(os.getenv("REWARD_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+REWARD_LOG_SEGMENT_SECONDS = int(os.getenv("REWARD_LOG_SEGMENT_SECONDS", "86400"))
+
+# Outbound message queue
+def _per_channel(spec, cast=int):
+    return {channel.strip(): cast(value) for channel, value in (item.split("=") for item in spec.split(",") if item)}
+
+OUTBOUND_QUEUE_PATH = os.getenv("OUTBOUND_QUEUE_PATH", "data/outbound_jobs.db")
+OUTBOUND_WORKERS = _per_channel(os.getenv("OUTBOUND_WORKERS", "email=4,whatsapp=4,voice=2"))
+# Bulk campaigns: recipients per provider call and messages/sec per channel
+OUTBOUND_BATCH_SIZES = _per_channel(os.getenv("OUTBOUND_BATCH_SIZES", "email=500,whatsapp=100,voice=20"))
+OUTBOUND_RATE_LIMITS = _per_channel(os.getenv("OUTBOUND_RATE_LIMITS", "email=1000,whatsapp=200,voice=10"), float)
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "5"))
+OUTBOUND_BACKOFF_BASE = float(os.getenv("OUTBOUND_BACKOFF_BASE", "1.0"))
+OUTBOUND_BACKOFF_MAX = float(os.getenv("OUTBOUND_BACKOFF_MAX", "60"))
+# A job left running longer than this (its worker process died) is handed out again
+OUTBOUND_LEASE_SECONDS = float(os.getenv("OUTBOUND_LEASE_SECONDS", "300"))
+OUTBOUND_TRANSPORT = os.getenv("OUTBOUND_TRANSPORT", "agents")
+OUTBOUND_STUB_LATENCY = float(os.getenv("OUTBOUND_STUB_LATENCY", "0.05"))
+OUTBOUND_STUB_FAILURE_RATE = float(os.getenv("OUTBOUND_STUB_FAILURE_RATE", "0.0"))
+
+# Match cache: score columns for the JDs in JDS_PATH (and ad-hoc JDs that
+# miss MATCH_CACHE_PROMOTE_MISSES times) are built in the background by
+# MATCH_CACHE_WORKERS spawned processes (0 = in the builder thread; the prod
+# launcher picks 0 when it runs several workers), LRU-bounded in bytes
+MATCH_CACHE_MAX_BYTES = int(os.getenv("MATCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+MATCH_CACHE_WORKERS = int(os.getenv("MATCH_CACHE_WORKERS", "2"))
+MATCH_CACHE_METHODS = tuple(m.strip() for m in os.getenv("MATCH_CACHE_METHODS", "overlap,tfidf").split(",") if m.strip())
+MATCH_CACHE_REFRESH_INTERVAL = float(os.getenv("MATCH_CACHE_REFRESH_INTERVAL", "30"))
+MATCH_CACHE_PROMOTE_MISSES = int(os.getenv("MATCH_CACHE_PROMOTE_MISSES", "3"))
+
+# Near-duplicate candidates (app/core/dedupe.py): what /candidate/add and the
+# bulk import do with a candidate whose name and skills overlap an existing
+# one by DEDUPE_THRESHOLD (Jaccard) or more: off, flag, reject or merge.
+# DEDUPE_BANDS x DEDUPE_ROWS MinHash functions back the LSH index.
+DEDUPE_POLICY = os.getenv("DEDUPE_POLICY", "flag")
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.8"))
+DEDUPE_BANDS = int(os.getenv("DEDUPE_BANDS", "16"))
+DEDUPE_ROWS = int(os.getenv("DEDUPE_ROWS", "5"))
+
+# Instrumentation: per-route latency middleware and GET /metrics (Prometheus
+# text). The sampling profiler (GET /metrics/profile, or SIGUSR2 to a worker,
+# which writes PROFILER_DIR/profile-<pid>-<time>.collapsed) is opt-in.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_DIR = os.getenv("PROFILER_DIR", "data/profiles")
+
+# Server launcher (run_fastapi.py): dev runs one reloading process, prod
+# preloads once and forks SERVER_WORKERS workers (0 = one per core)
+SERVER_MODE = os.getenv("SERVER_MODE", "dev")
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "5000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+SERVER_WARMUP = os.getenv("SERVER_WARMUP", "1") == "1"
 
 # Environment variables - Gemini integration removed for simplicity
 
@@ -2,11 +2,67 @@ import streamlit as st
 import requests
 import pandas as pd
 import json
+import threading
+from collections import deque
 from datetime import datetime
 
 st.set_page_config(page_title="HR-AI Dashboard", layout="wide")
 
 API_BASE = "http://localhost:5000"
+# Seconds a fetched response is shared by every dashboard session before the
+# API is asked again, and how many log rows the log tables keep
+CACHE_TTL = 5
+LOG_ROWS = 200
+
+@st.cache_resource
+def http():
+    # One pooled session for every session and rerun
+    return requests.Session()
+
+@st.cache_resource
+def etag_cache():
+    return {}
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def get_json(path, params=()):
+    # Returns (body, headers). Once the TTL runs out the cached body is
+    # revalidated with If-None-Match, so an unchanged resource costs a 304.
+    key = (path, params)
+    cached = etag_cache().get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = http().get(f"{API_BASE}{path}", params=dict(params), headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached[1], cached[2]
+    response.raise_for_status()
+    body, response_headers = response.json(), dict(response.headers)
+    if "ETag" in response.headers:
+        etag_cache()[key] = (response.headers["ETag"], body, response_headers)
+    return body, response_headers
+
+@st.cache_resource
+def log_feed():
+    # Rows shown in the log tables, shared by every session and extended
+    # with "since cursor" delta fetches instead of refetching the log
+    return {"cursor": None, "rows": deque(maxlen=LOG_ROWS), "lock": threading.Lock()}
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def recent_logs():
+    feed = log_feed()
+    with feed["lock"]:
+        if feed["cursor"] is not None:
+            response = http().get(f"{API_BASE}/feedback/logs", params={"since": feed["cursor"], "limit": LOG_ROWS},
+                                  timeout=10)
+            # A full page means we fell too far behind; start over from the tail
+            if response.status_code == 200 and len(response.json()) < LOG_ROWS:
+                feed["rows"].extend(response.json())
+                feed["cursor"] = response.headers["X-Log-Cursor"]
+                return list(feed["rows"])
+        response = http().get(f"{API_BASE}/feedback/logs", params={"limit": LOG_ROWS}, timeout=10)
+        response.raise_for_status()
+        feed["rows"].clear()
+        feed["rows"].extend(response.json())
+        feed["cursor"] = response.headers["X-Log-Cursor"]
+        return list(feed["rows"])
 
 st.title("🚀 HR-AI Core Dashboard")
 
@@ -17,24 +73,45 @@ page = st.sidebar.selectbox("Choose Page", ["Overview", "Candidates", "Feedback"
 if page == "Overview":
     st.header("System Overview")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("System Status", "Active", "🟢")
-    with col2:
-        st.metric("RL Model", "Learning", "📈")
-    with col3:
-        st.metric("Automation", "Enabled", "⚡")
-    
+    bucket = st.sidebar.selectbox("Time bucket", ["hour", "day"])
+    try:
+        summary, _ = get_json("/metrics/summary", (("bucket", bucket),))
+    except:
+        summary = None
+        st.warning("Could not connect to API")
+
+    if summary:
+        col1, col2, col3, col4 = st.columns(4)
+        rewards = summary["mean_reward_per_action"]
+        counts = summary["counts_per_action"]
+        with col1:
+            st.metric("Candidates", summary["candidates"]["total"])
+        with col2:
+            st.metric("Logged Events", summary["rows"])
+        with col3:
+            mean = sum(rewards[a] * counts[a] for a in rewards) / max(1, sum(counts.values()))
+            st.metric("Mean Reward", f"{mean:.2f}")
+        with col4:
+            st.metric("Last Event", (summary["last_event"] or "-")[:19])
+
+        if summary["reward_per_action_over_time"]:
+            st.subheader("Mean Reward per Action")
+            df = pd.DataFrame(summary["reward_per_action_over_time"])
+            st.line_chart(df.pivot(index="bucket", columns="action", values="mean_reward"))
+        if summary["counts_per_event_type"]:
+            st.subheader("Events per Type")
+            st.bar_chart(pd.Series(summary["counts_per_event_type"], name="events"))
+        if summary["candidates"]["top_skills"]:
+            st.subheader("Top Candidate Skills")
+            st.bar_chart(pd.Series(summary["candidates"]["top_skills"], name="candidates"))
+
     # Recent logs
     try:
-        response = requests.get(f"{API_BASE}/feedback/logs")
-        if response.status_code == 200:
-            logs = response.json()
-            if logs:
-                st.subheader("Recent Activity")
-                df = pd.DataFrame(logs)
-                st.dataframe(df)
+        logs = recent_logs()
+        if logs:
+            st.subheader("Recent Activity")
+            df = pd.DataFrame(logs[-10:])
+            st.dataframe(df)
     except:
         st.warning("Could not connect to API")
 
@@ -56,25 +133,56 @@ elif page == "Candidates":
                 }
                 
                 try:
-                    response = requests.post(f"{API_BASE}/candidate/add", json=candidate_data)
+                    response = http().post(f"{API_BASE}/candidate/add", json=candidate_data)
                     if response.status_code == 200:
+                        # Show the new candidate now rather than after the TTL
+                        get_json.clear()
                         st.success("Candidate added successfully!")
+                        duplicates = response.json().get("duplicates")
+                        if duplicates:
+                            st.warning("Possible duplicate of candidate(s) " +
+                                       ", ".join(str(d["id"]) for d in duplicates))
                     else:
                         st.error("Failed to add candidate")
                 except:
                     st.error("Could not connect to API")
     
-    # List candidates
+    # List candidates, one page at a time
+    page_size = st.sidebar.selectbox("Candidates per page", [25, 50, 100, 500], index=2)
+    if st.session_state.get("candidate_page_size") != page_size:
+        # Cursors of earlier pages, so Previous can go back
+        st.session_state.candidate_page_size = page_size
+        st.session_state.candidate_cursors = [None]
+    cursors = st.session_state.candidate_cursors
+    params = {"limit": page_size}
+    if cursors[-1] is not None:
+        params["cursor"] = cursors[-1]
+    page_data = None
     try:
-        response = requests.get(f"{API_BASE}/candidate/list")
-        if response.status_code == 200:
-            candidates = response.json()
-            if candidates:
-                st.subheader("Current Candidates")
-                df = pd.DataFrame(candidates)
-                st.dataframe(df)
+        page_data = get_json("/candidate/list", tuple(params.items()))
+    except requests.HTTPError as e:
+        if e.response.status_code == 400:
+            # The page we were on no longer exists; start over
+            st.session_state.candidate_cursors = [None]
     except:
         st.warning("Could not load candidates")
+    # Outside the try: st.rerun works by raising
+    if page_data is not None:
+        candidates, headers = page_data
+        next_cursor = headers.get("X-Next-Cursor")
+        if candidates:
+            st.subheader(f"Current Candidates (page {len(cursors)})")
+            df = pd.DataFrame(candidates)
+            st.dataframe(df)
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Previous page", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("Next page", disabled=next_cursor is None):
+                cursors.append(int(next_cursor))
+                st.rerun()
 
 elif page == "Feedback":
     st.header("HR Feedback System")
@@ -97,8 +205,9 @@ elif page == "Feedback":
             }
             
             try:
-                response = requests.post(f"{API_BASE}/feedback/hr_feedback", json=feedback_data)
+                response = http().post(f"{API_BASE}/feedback/hr_feedback", json=feedback_data)
                 if response.status_code == 200:
+                    recent_logs.clear()
                     result = response.json()
                     st.success("Feedback submitted!")
                     st.json(result)
@@ -110,12 +219,10 @@ elif page == "Feedback":
     with col2:
         st.subheader("Feedback Logs")
         try:
-            response = requests.get(f"{API_BASE}/feedback/logs")
-            if response.status_code == 200:
-                logs = response.json()
-                if logs:
-                    df = pd.DataFrame(logs)
-                    st.dataframe(df)
+            logs = recent_logs()
+            if logs:
+                df = pd.DataFrame(logs)
+                st.dataframe(df)
         except:
             st.warning("Could not load feedback logs")
 
@@ -139,7 +246,7 @@ elif page == "Automation":
             }
             
             try:
-                response = requests.post(f"{API_BASE}/trigger/", json=event_data)
+                response = http().post(f"{API_BASE}/trigger/", json=event_data)
                 if response.status_code == 200:
                     result = response.json()
                     st.success("Automation triggered!")
@@ -155,7 +262,7 @@ elif page == "Automation":
         
         if st.button("Load History"):
             try:
-                response = requests.get(f"{API_BASE}/trigger/history/{history_candidate_id}")
+                response = http().get(f"{API_BASE}/trigger/history/{history_candidate_id}")
                 if response.status_code == 200:
                     history = response.json()
                     if history.get("automation_history"):
@@ -1,6 +1,7 @@
 #!/bin/bash
+# Pass --prod (or set SERVER_MODE=prod) for preforked workers; see run_fastapi.py --help
 echo "Starting HR-AI Core System..."
-echo "API will be available at: http://localhost:8000"
-echo "API Docs will be available at: http://localhost:8000/docs"
+echo "API will be available at: http://localhost:${SERVER_PORT:-5000}"
+echo "API Docs will be available at: http://localhost:${SERVER_PORT:-5000}/docs"
 echo "To start dashboard, run: streamlit run dashboard/app.py"
-uvicorn app.main:app --reload
\ No newline at end of file
+exec python run_fastapi.py "$@"
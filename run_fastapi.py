@@ -2,25 +2,172 @@
 """
 FastAPI Server Launcher for HR AI System
 Run this instead of app.py to use FastAPI
+
+Dev mode (default) runs a single auto-reloading process. Prod mode loads
+candidates, the Q-table and the match index once, warms up the hot paths,
+then forks the workers so they share that memory copy-on-write. Workers
+shut down gracefully on SIGTERM/SIGINT, flushing the reward log and writing
+a final checkpoint.
+
+    python run_fastapi.py --prod --workers 8
+    SERVER_MODE=prod SERVER_WORKERS=8 python run_fastapi.py
 """
 
-import uvicorn
-import sys
+import time
+
+LAUNCHED_AT = time.perf_counter()
+
+import argparse
+import asyncio
 import os
+import select
+import signal
+import sys
+
+import uvicorn
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-if __name__ == "__main__":
+import config
+
+# A worker that dies sooner than this after starting is respawned with a delay
+RESPAWN_BACKOFF = 1.0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("dev", "prod"), default=config.SERVER_MODE)
+    parser.add_argument("--prod", dest="mode", action="store_const", const="prod", help="Same as --mode prod")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS,
+                        help="Worker processes in prod mode (0 = one per core)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", default=config.SERVER_WARMUP)
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+def run_dev(args):
     print("Starting HR AI System with FastAPI...")
-    print("API Documentation: http://localhost:5000/docs")
-    print("Alternative docs: http://localhost:5000/redoc")
-    print("Health check: http://localhost:5000/health")
-    
+    print(f"API Documentation: http://localhost:{args.port}/docs")
+    print(f"Alternative docs: http://localhost:{args.port}/redoc")
+    print(f"Health check: http://localhost:{args.port}/health")
+
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=5000,
+        host=args.host,
+        port=args.port,
         reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+        log_level=args.log_level
+    )
+
+def serve_worker(server_config, sock, ready_fd):
+    # Runs in the forked child; signals readiness on the pipe once uvicorn is
+    # listening (after the app's lifespan startup has finished)
+    server = uvicorn.Server(server_config)
+
+    async def serve():
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.01)
+        if server.started:
+            os.write(ready_fd, b"1")
+        await task
+
+    asyncio.run(serve())
+
+def spawn_worker(server_config, sock, ready_fd):
+    pid = os.fork()
+    if pid:
+        return pid
+    # Own process group, so a terminal Ctrl-C reaches only the launcher,
+    # which then stops every worker exactly once
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 1
+    try:
+        serve_worker(server_config, sock, ready_fd)
+        code = 0
+    finally:
+        os._exit(code)
+
+def run_prod(args):
+    workers = args.workers or os.cpu_count() or 1
+    if not hasattr(os, "fork"):
+        # Windows: no fork and no cross-process file locks, so one worker
+        if workers > 1:
+            print(f"Forked workers are not supported on this platform; running 1 worker instead of {workers}")
+        workers = 1
+    if workers > 1 and "RL_SHARED" not in os.environ:
+        # Workers must learn into one Q-table, not one copy each
+        config.RL_SHARED = True
+    if not os.getenv("RL_SHARED_PATH"):
+        config.RL_SHARED_PATH = config.rl_shared_path(args.port)
+    if workers > 1 and "MATCH_CACHE_WORKERS" not in os.environ:
+        # Each worker builds its own match cache; a scoring pool per worker
+        # would only compete with the other workers for the same cores
+        config.MATCH_CACHE_WORKERS = 0
+
+    from app import main
+
+    start = time.perf_counter()
+    main.preload()
+    preload_seconds = time.perf_counter() - start
+    warmup_seconds = main.warmup() if args.warmup else 0.0
+
+    server_config = uvicorn.Config(main.app, host=args.host, port=args.port, log_level=args.log_level)
+    if not hasattr(os, "fork"):
+        print(f"HR AI System starting on http://{args.host}:{args.port} (preload {preload_seconds:.2f}s, "
+              f"warmup {warmup_seconds:.2f}s)", flush=True)
+        uvicorn.Server(server_config).run()
+        return
+    sock = server_config.bind_socket()
+    ready_r, ready_w = os.pipe()
+
+    children = {}
+    shutting_down = False
+
+    def stop(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[spawn_worker(server_config, sock, ready_w)] = time.monotonic()
+
+    ready = 0
+    reported = False
+    while children:
+        if select.select([ready_r], [], [], 0.1)[0]:
+            ready += len(os.read(ready_r, workers))
+        if ready >= workers and not reported:
+            reported = True
+            print(f"HR AI System ready on http://{args.host}:{args.port} with {workers} workers "
+                  f"(preload {preload_seconds:.2f}s, warmup {warmup_seconds:.2f}s, "
+                  f"cold start to ready {time.perf_counter() - LAUNCHED_AT:.2f}s)", flush=True)
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+            started_at = children.pop(pid, None)
+            if started_at is None or shutting_down:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting", flush=True)
+            if time.monotonic() - started_at < RESPAWN_BACKOFF:
+                time.sleep(RESPAWN_BACKOFF)
+            children[spawn_worker(server_config, sock, ready_w)] = time.monotonic()
+    sock.close()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.mode == "prod":
+        run_prod(args)
+    else:
+        run_dev(args)
@@ -0,0 +1,78 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.candidate_store import CandidateStore
+from app.routers import candidate
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CandidateStore(str(tmp_path / "candidates.json"))
+    store.load()
+    store.add_many([{"id": i, "name": f"Candidate {i}", "skills": ["python"], "match_score": 0.0}
+                    for i in range(1, 26)])
+    monkeypatch.setattr(candidate, "candidate_store", store)
+    yield store
+    store.close()
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(candidate.router)
+    return TestClient(app)
+
+def test_pages_follow_the_cursor_to_the_end(client):
+    seen, cursor = [], None
+    while True:
+        response = client.get("/candidate/list", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [c["id"] for c in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        assert f"cursor={cursor}" in response.headers["Link"]
+    assert seen == list(range(1, 26))
+    assert client.get("/candidate/list", params={"cursor": 999}).status_code == 400
+
+def test_ndjson_and_projection(client):
+    response = client.get("/candidate/list", params={"format": "ndjson", "fields": "id,name", "limit": 3})
+    assert response.text.splitlines()[0] == '{"id": 1, "name": "Candidate 1"}'
+    assert len(response.text.splitlines()) == 3
+
+def test_not_modified_until_the_store_changes(client, store):
+    first = client.get("/candidate/list", params={"limit": 5})
+    etag = first.headers["ETag"]
+    assert first.headers["Vary"] == "Accept"
+    again = client.get("/candidate/list", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag
+    assert client.get("/candidate/list", params={"limit": 5}, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    store.add({"id": 100, "name": "New", "skills": ["go"], "match_score": 0.0})
+    changed = client.get("/candidate/list", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+@pytest.mark.parametrize("params, headers", [
+    ({"limit": 10}, {}),
+    ({"limit": 5, "cursor": 5}, {}),
+    ({"limit": 5, "fields": "id"}, {}),
+    ({"limit": 5, "format": "ndjson"}, {}),
+    ({"limit": 5}, {"Accept": "application/x-ndjson"}),
+])
+def test_other_representations_get_other_etags(client, params, headers):
+    etag = client.get("/candidate/list", params={"limit": 5}).headers["ETag"]
+    response = client.get("/candidate/list", params=params, headers={"If-None-Match": etag, **headers})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+def test_streamed_body_matches_its_etag_despite_concurrent_writes(client, store, monkeypatch):
+    project = candidate._project
+
+    def write_while_streaming(page, fields):
+        if not store.get(100):
+            store.add({"id": 100, "name": "New", "skills": ["go"], "match_score": 0.0})
+        return project(page, fields)
+
+    monkeypatch.setattr(candidate, "STREAM_CHUNK", 10)
+    monkeypatch.setattr(candidate, "_project", write_while_streaming)
+    response = client.get("/candidate/list", params={"format": "ndjson"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == list(range(1, 26))
+    again = client.get("/candidate/list", params={"format": "ndjson"}, headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 200 and len(again.text.splitlines()) == 26
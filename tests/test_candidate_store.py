@@ -0,0 +1,110 @@
+import json
+import pytest
+from app.core.candidate_store import CandidateStore
+
+def _candidate(i, skills=("python",)):
+    return {"id": i, "name": f"Candidate {i}", "skills": list(skills), "match_score": 0.0}
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "candidates.json")
+
+def _open(path, **kwargs):
+    return CandidateStore(path, sync_interval=0, **kwargs).load()
+
+def test_replay_drops_a_torn_trailing_record(path):
+    store = _open(path)
+    store.add_many([_candidate(i) for i in range(1, 4)])
+    store.close()
+    # Crash mid-append: the last record has no newline and is cut short
+    with open(store.journal_path, 'ab') as f:
+        f.write(json.dumps(_candidate(4)).encode()[:20])
+    reopened = _open(path)
+    assert [c["id"] for c in reopened.all()] == [1, 2, 3]
+    assert store.journal_path.read_bytes().endswith(b"\n")
+    # The next append starts on a clean line and survives another restart
+    reopened.add(_candidate(5))
+    reopened.close()
+    assert [c["id"] for c in _open(path).all()] == [1, 2, 3, 5]
+
+def test_replay_skips_a_corrupt_record_in_the_middle(path):
+    store = _open(path)
+    store.add(_candidate(1))
+    reader = _open(path)
+    # A writer died mid-record and others kept appending after it
+    with open(store.journal_path, 'ab') as f:
+        f.write(json.dumps(_candidate(2)).encode()[:15] + b"\n")
+    store.add_many([_candidate(3), _candidate(4)])
+    assert reader.sync() == 2
+    assert [c["id"] for c in reader.all()] == [1, 3, 4]
+    store.close()
+    reopened = _open(path)
+    assert [c["id"] for c in reopened.all()] == [1, 3, 4]
+    reopened.add(_candidate(5))
+    assert reader.sync() == 1
+    reopened.compact()
+    reopened.close()
+    assert [c["id"] for c in _open(path).all()] == [1, 3, 4, 5]
+
+def test_append_after_a_torn_tail_from_another_writer(path):
+    store, reader = _open(path), _open(path)
+    store.add(_candidate(1))
+    # Torn and never finished: the next append must not be glued onto it
+    with open(store.journal_path, 'ab') as f:
+        f.write(json.dumps(_candidate(2)).encode()[:15])
+    store.add(_candidate(3))
+    assert reader.sync() == 2
+    assert [c["id"] for c in reader.all()] == [1, 3]
+    store.close()
+    assert [c["id"] for c in _open(path).all()] == [1, 3]
+
+def test_interrupted_compaction_is_finished_on_load(path):
+    store = _open(path)
+    store.add_many([_candidate(i) for i in range(1, 4)])
+    store.close()
+    # Rotated but never folded into the snapshot
+    store.journal_path.rename(store.compacting_path)
+    reopened = _open(path)
+    assert [c["id"] for c in reopened.all()] == [1, 2, 3]
+    assert not store.compacting_path.exists()
+    assert [c["id"] for c in json.load(open(path))] == [1, 2, 3]
+
+def test_updates_replace_records_across_compaction(path):
+    store = _open(path, compact_min_records=5)
+    store.add_many([_candidate(i) for i in range(1, 5)])
+    store.add(_candidate(2, ("go",)))
+    store.close()
+    reopened = _open(path)
+    assert len(reopened) == 4
+    assert reopened.get(2)["skills"] == ["go"]
+    assert [c["id"] for c in reopened.all()] == [1, 2, 3, 4]
+
+def test_sync_picks_up_records_from_another_writer(path):
+    reader, writer = _open(path), _open(path)
+    writer.add_many([_candidate(i) for i in range(1, 3)])
+    assert reader.sync() == 2
+    assert reader.get(2)["name"] == "Candidate 2"
+
+def test_sync_after_missed_rotations_passes_only_changes_to_subscribers(path):
+    class Subscriber:
+        def __init__(self):
+            self.rebuilds, self.added = 0, []
+        def rebuild(self, candidates):
+            self.rebuilds += 1
+        def add_many(self, candidates):
+            self.added += [c["id"] for c in candidates]
+
+    reader, writer = _open(path), _open(path)
+    writer.add_many([_candidate(1), _candidate(2)])
+    assert reader.sync() == 2
+    subscriber = reader.subscribe(Subscriber())
+    # Two compactions: the records in between end up only in the snapshot
+    writer.add(_candidate(3))
+    writer.compact()
+    writer.add_many([_candidate(2, ("go",)), _candidate(4)])
+    writer.compact()
+    writer.add(_candidate(5))
+    assert reader.sync() == 4
+    assert subscriber.rebuilds == 1 and sorted(subscriber.added) == [2, 3, 4, 5]
+    assert [c["id"] for c in reader.all()] == [1, 2, 3, 4, 5]
+    assert reader.get(2)["skills"] == ["go"]
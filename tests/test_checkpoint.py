@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from app.core.checkpoint import SUPERSEDED, RLCheckpointer, list_checkpoints, read_checkpoint, write_checkpoint
+from app.core.q_table import encode_state
+from app.core.rl_model import RLModel
+
+def _trained_model(n=200, reward=1.0):
+    model = RLModel(capacity=16)
+    keys = encode_state(np.arange(n, dtype=np.int64), 5, 5)
+    model.update_q_values_batch(keys, np.arange(n) % 3, np.full(n, reward))
+    return model
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_checkpoint_round_trip(tmp_path, mmap):
+    model = _trained_model()
+    path = write_checkpoint(model.q_table, tmp_path / "checkpoint-00000001.bin", 1)
+    q_table, version = read_checkpoint(path, mmap=mmap)
+    assert version == 1 and len(q_table) == len(model.q_table) == 200
+    assert (np.asarray(q_table.keys) == model.q_table.keys).all()
+    assert (np.asarray(q_table.values) == model.q_table.values).all()
+    key = encode_state(7, 5, 5)
+    assert q_table.get(key) == model.q_table.get(key)
+
+def test_write_never_replaces_an_existing_version(tmp_path):
+    model = _trained_model()
+    path = write_checkpoint(model.q_table, tmp_path / "checkpoint-00000001.bin", 1)
+    with pytest.raises(FileExistsError):
+        write_checkpoint(RLModel().q_table, path, 1)
+    assert len(read_checkpoint(path, mmap=False)[0]) == 200
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+def test_restore_latest_and_prune(tmp_path):
+    model = _trained_model()
+    checkpointer = RLCheckpointer(model, tmp_path, keep=2)
+    for _ in range(3):
+        model.update_q_values_batch([encode_state(1, 5, 5)], [0], [1.0])
+        checkpointer.checkpoint()
+    assert [v for v, _ in list_checkpoints(tmp_path)] == [2, 3]
+    assert checkpointer.checkpoint() is None
+    restored = RLModel()
+    RLCheckpointer(restored, tmp_path).restore_latest(mmap=False)
+    assert restored.checkpoint_version == 3
+    assert restored.get_q_values(model.get_state(1, 5, 5)) == model.get_q_values(model.get_state(1, 5, 5))
+
+def test_running_api_does_not_supersede_a_trainer_checkpoint(tmp_path):
+    api = _trained_model(reward=-1.0)
+    api_checkpointer = RLCheckpointer(api, tmp_path)
+    api_checkpointer.checkpoint()
+    trainer = _trained_model(n=300)
+    RLCheckpointer(trainer, tmp_path).checkpoint(force=True)
+    # Periodic and shutdown checkpoints of the API leave the trained table latest
+    api.update_q_values_batch([encode_state(1, 5, 5)], [0], [1.0])
+    superseded = SUPERSEDED._values.get((), 0)
+    assert api_checkpointer.checkpoint() is None
+    assert api_checkpointer.superseded_by == 2
+    assert api_checkpointer.checkpoint() is None
+    assert SUPERSEDED._values.get((), 0) == superseded + 1
+    assert [v for v, _ in list_checkpoints(tmp_path)] == [1, 2]
+    api_checkpointer.promote()
+    assert api.checkpoint_version == 2 and len(api.q_table) == 300
+    assert api_checkpointer.superseded_by is None
+    api.update_q_values_batch([encode_state(1, 5, 5)], [0], [1.0])
+    assert api_checkpointer.checkpoint().name == "checkpoint-00000003.bin"
+    with pytest.raises(FileNotFoundError):
+        api_checkpointer.promote(99)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from app.core.candidate_store import CandidateStore
+from app.core.dedupe import DuplicateIndex, merge_records, resolve_duplicates
+
+POOL = [
+    {"id": 1, "name": "Jane Doe", "skills": ["Python", "SQL", "Docker", "AWS"], "match_score": 0.4},
+    {"id": 2, "name": "John Smith", "skills": ["Java", "Spring", "Kafka"], "match_score": 0.2},
+    {"id": 3, "name": "Amélie Martin", "skills": ["React", "TypeScript", "CSS"], "match_score": 0.1},
+]
+
+@pytest.fixture
+def index():
+    index = DuplicateIndex(threshold=0.8)
+    index.rebuild(POOL)
+    return index
+
+def test_finds_near_duplicates_of_indexed_and_earlier_batch_rows(index):
+    batch = [
+        {"id": 10, "name": "jane  doe", "skills": ["python", "sql", "docker", "aws"]},
+        {"id": 11, "name": "Amelie Martin", "skills": ["react", "typescript", "css"]},
+        {"id": 12, "name": "Someone Else", "skills": ["Rust", "Go"]},
+        {"id": 13, "name": "Someone Else", "skills": ["rust", "go"]},
+    ]
+    found = index.find_many(batch)
+    assert [match[0] for match in found[0]] == [1]
+    assert [match[0] for match in found[1]] == [3]
+    assert found[2] == []
+    assert [match[0] for match in found[3]] == [12]
+    # A candidate never matches its own id
+    assert index.find(POOL[0]) == []
+
+def test_clusters_group_duplicates_under_the_lowest_id(index):
+    index.add_many([{"id": 7, "name": "Jane Doe", "skills": ["python", "sql", "docker", "aws"]}])
+    assert index.clusters() == [{"canonical": 1, "members": [1, 7]}]
+
+def test_clusters_link_duplicates_that_are_not_neighbours_in_a_bucket():
+    index = DuplicateIndex(threshold=0.8)
+    # One bucket for everything, with a dissimilar row between the duplicates
+    index.hasher.band_keys = lambda feature_sets: np.zeros((len(feature_sets), 1), dtype=np.uint64)
+    index.rebuild(POOL[:2] + [{"id": 8, "name": "Jane Doe", "skills": ["python", "sql", "docker", "aws"]}])
+    assert index.clusters() == [{"canonical": 1, "members": [1, 8]}]
+
+@pytest.mark.parametrize("policy, written, action", [
+    ("off", [10], None), ("flag", [10], "flagged"), ("reject", [], "rejected"), ("merge", [1], "merged"),
+])
+def test_policies(tmp_path, index, policy, written, action):
+    store = CandidateStore(str(tmp_path / "candidates.json"), sync_interval=0).load()
+    store.add_many(POOL)
+    duplicate = {"id": 10, "name": "Jane Doe", "skills": ["PYTHON", "sql", "docker", "aws", "Kubernetes"],
+                 "match_score": 0.9}
+    index.threshold = 0.6
+    writes, outcomes = resolve_duplicates([duplicate], policy, index=index, store=store)
+    assert [c["id"] for c in writes] == written
+    assert (outcomes[0] or {}).get("action") == action
+    if policy == "merge":
+        assert writes[0]["skills"] == ["Python", "SQL", "Docker", "AWS", "Kubernetes"]
+        assert writes[0]["match_score"] == 0.9 and outcomes[0]["merged_into"] == 1
+    store.close()
+
+def test_merge_keeps_the_older_record_and_unions_skills_ignoring_case():
+    merged = merge_records(POOL[2], {"id": 9, "name": "A. Martin", "skills": ["react", "Node"], "match_score": 0.0})
+    assert merged["id"] == 3 and merged["name"] == "Amélie Martin"
+    assert merged["skills"] == ["React", "TypeScript", "CSS", "Node"]
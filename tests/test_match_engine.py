@@ -0,0 +1,19 @@
+import numpy as np
+from app.core.match_engine import MatchEngine
+
+def test_pooled_score_columns_match_in_thread_scoring(tmp_path):
+    rng = np.random.default_rng(0)
+    skills = [f"skill{i}" for i in range(50)]
+    engine = MatchEngine(model_path=tmp_path / "tfidf.pkl")
+    engine.rebuild([{"id": i, "skills": list(rng.choice(skills, 4, replace=False))} for i in range(2000)])
+    # A re-added candidate retires its old row
+    engine.add_many([{"id": 3, "skills": ["skill1", "rare"]}])
+    jobs = [(" ".join(rng.choice(skills, 3)), method) for method in ("overlap", "tfidf") for _ in range(2)]
+    jobs += [("skill1 rare", "tfidf"), ("unknown tokens", "tfidf"), ("", "overlap")]
+    expected, state = engine.score_columns(jobs)
+    pooled, pooled_state = engine.score_columns(jobs, workers=2)
+    assert pooled_state == state
+    for column, reference in zip(pooled, expected):
+        assert len(column) == 2001 and np.allclose(column, reference)
+    full, _ = engine.score_rows("skill1 rare", "tfidf")
+    assert np.allclose(engine.score_rows("skill1 rare", "tfidf", 1500)[0], full[1500:])
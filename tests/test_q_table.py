@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from app.core.q_table import MAX_CANDIDATE_ID, QTable, State, decode_state, encode_state, state_key
+from app.utils.helpers import validate_candidates
+
+def test_state_key_round_trip():
+    for state in (State(0, 0, 0), State(7, 10, 5), State(MAX_CANDIDATE_ID, 255, 255)):
+        assert decode_state(state_key(state)) == state
+        assert state_key(str(state)) == state_key(state)
+
+@pytest.mark.parametrize("candidate_id", [-1, MAX_CANDIDATE_ID + 1, 2**48 + 7, 10**15])
+def test_out_of_range_ids_are_rejected(candidate_id):
+    with pytest.raises(ValueError):
+        encode_state(candidate_id, 5, 5)
+    with pytest.raises(ValueError):
+        encode_state(np.array([7, candidate_id], dtype=np.int64), 5, 5)
+
+def test_vectorised_encoding_matches_scalar():
+    ids = np.array([0, 7, 123456, MAX_CANDIDATE_ID], dtype=np.int64)
+    assert encode_state(ids, 5, 5).tolist() == [encode_state(int(i), 5, 5) for i in ids]
+
+def test_validate_candidates_rejects_ids_beyond_the_key_range():
+    ids = ["1", str(MAX_CANDIDATE_ID), str(MAX_CANDIDATE_ID + 1), "999999999999999999"]
+    valid, parsed, reasons = validate_candidates(ids, ["a"] * 4, [["python"]] * 4, [0.0] * 4)
+    assert valid.tolist() == [True, True, False, False]
+    assert reasons["invalid_id"].tolist() == [False, False, True, True]
+
+def test_resize_keeps_every_key_and_value():
+    table = QTable(3, capacity=16)
+    keys = [encode_state(i, i % 11, 5) for i in range(1000)]
+    for key in keys:
+        table.set_value(table.slot(key), 1, float(key % 97))
+    assert len(table) == 1000 and table.capacity >= 1000 / table.max_load
+    for key in keys:
+        slot = table.find(key)
+        assert slot >= 0 and table.get_value(slot, 1) == float(key % 97)
+    assert table.find(encode_state(5000, 5, 5)) == -1
+
+def test_find_many_and_slot_many_match_scalar_probes():
+    rng = np.random.default_rng(0)
+    scalar, batch = QTable(3, capacity=16), QTable(3, capacity=16)
+    inserted = rng.choice(1 << 40, size=3000, replace=False).astype(np.int64)
+    for key in inserted.tolist():
+        scalar.slot(key)
+    # Duplicates within a batch get one slot
+    slots = batch.slot_many(np.concatenate([inserted, inserted[:100]]))
+    assert len(batch) == len(scalar) == 3000
+    assert (slots[3000:] == slots[:100]).all()
+    probe = np.concatenate([inserted, rng.choice(1 << 40, size=500).astype(np.int64) | (1 << 41)])
+    for table in (scalar, batch):
+        found = table.find_many(probe)
+        assert found.tolist() == [table.find(key) for key in probe.tolist()]
+        assert (found[:3000] >= 0).all() and (found[3000:] == -1).all()
+        assert (table.keys[found[:3000]] == inserted).all()
+
+def test_copy_is_independent():
+    table = QTable(3)
+    slot = table.slot(encode_state(1, 5, 5))
+    table.set_value(slot, 0, 1.5)
+    clone = table.copy()
+    table.set_value(slot, 0, 2.5)
+    assert clone.get(encode_state(1, 5, 5))[0] == 1.5
@@ -0,0 +1,67 @@
+import pytest
+from app.feedback.reward_logger import RewardLogger
+
+@pytest.fixture
+def logger(tmp_path):
+    logger = RewardLogger(tmp_path / "reward_log.csv", flush_interval=0.01)
+    yield logger
+    logger.close()
+
+def _log(logger, *candidate_ids):
+    logger.log_rewards([(candidate_id, "7_5_5", "accept", 1.0, f"row {candidate_id}") for candidate_id in candidate_ids])
+    logger.flush()
+
+def _ids(rows):
+    return [int(row["candidate_id"]) for row in rows]
+
+def test_read_since_continues_across_rotations(logger):
+    _log(logger, 1, 2, 3)
+    rows, cursor = logger.get_recent_logs_with_cursor(2)
+    assert _ids(rows) == [2, 3]
+    _log(logger, 4, 5)
+    logger.rotate()
+    _log(logger, 6)
+    logger.rotate()
+    # Nothing to seal: no empty segment is created
+    logger.rotate()
+    _log(logger, 7, 8)
+    assert len(logger.segments.segments()) == 3
+    # Paged, with a page boundary inside a sealed segment
+    rows, cursor = logger.get_logs_since(cursor, limit=3)
+    assert _ids(rows) == [4, 5, 6]
+    rows, cursor = logger.get_logs_since(cursor, limit=10)
+    assert _ids(rows) == [7, 8]
+    assert logger.get_logs_since(cursor) == ([], cursor)
+    # A cursor taken before a rotation still resumes after it
+    logger.rotate()
+    _log(logger, 9)
+    assert _ids(logger.get_logs_since(cursor)[0]) == [9]
+
+def test_read_since_from_the_start_and_bad_cursors(logger):
+    _log(logger, 1)
+    logger.rotate()
+    _log(logger, 2)
+    assert _ids(logger.get_logs_since("0:0")[0]) == [1, 2]
+    for cursor in ("nonsense", "1", "99:0"):
+        with pytest.raises(ValueError):
+            logger.get_logs_since(cursor)
+
+def test_rows_are_kept_whole_across_rotations(logger):
+    _log(logger, *range(1, 51))
+    logger.rotate()
+    _log(logger, *range(51, 101))
+    assert _ids(logger.get_logs_since("0:0", limit=1000)[0]) == list(range(1, 101))
+    assert len(logger.get_candidate_history(51)) == 1
+
+def test_a_hand_edited_row_neither_stops_the_writer_nor_skews_the_mean(tmp_path):
+    path = tmp_path / "reward_log.csv"
+    path.write_text("timestamp,candidate_id,state,action,reward,feedback\n"
+                    "01/02/2026 10:00,1,7_5_5,accept,n/a,hand-edited\n")
+    logger = RewardLogger(path, flush_interval=0.01, segment_seconds=3600)
+    _log(logger, 2, 3)
+    _log(logger, 4)
+    assert logger._thread.is_alive()
+    totals = logger.segments.aggregate()
+    assert totals["counts_per_action"] == {"accept": 4}
+    assert totals["mean_reward_per_action"] == {"accept": 1.0}
+    logger.close()
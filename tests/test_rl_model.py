@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from app.core.q_table import decode_state, encode_state
+from app.core.rl_model import RLModel
+
+def _sequential(keys, actions, rewards, next_keys):
+    model = RLModel()
+    for key, action, reward, next_key in zip(keys, actions, rewards, next_keys):
+        state = decode_state(key)
+        model.update_q_value(state, action, reward, state if next_key == key else decode_state(next_key))
+    return model
+
+@pytest.mark.parametrize("n_states", [1, 3, 50, 5000])
+def test_batch_update_matches_sequential_updates(n_states):
+    rng = np.random.default_rng(n_states)
+    keys = encode_state(rng.integers(0, n_states, 2000).astype(np.int64), 5, 5)
+    actions, rewards = rng.integers(0, 3, 2000), rng.normal(size=2000)
+    batch = RLModel()
+    batch.update_q_values_batch(keys, actions, rewards)
+    sequential = _sequential(keys.tolist(), actions.tolist(), rewards.tolist(), keys.tolist())
+    assert batch.update_count == sequential.update_count == 2000
+    for key in set(keys.tolist()):
+        assert batch.q_table.get(key) == pytest.approx(sequential.q_table.get(key), abs=1e-5)
+
+def test_repeated_rows_of_one_state_are_applied_in_order():
+    key = encode_state(1, 5, 5)
+    batch = RLModel()
+    batch.update_q_values_batch([key] * 3, [0, 1, 0], [1.0, -0.5, 3.0])
+    sequential = _sequential([key] * 3, [0, 1, 0], [1.0, -0.5, 3.0], [key] * 3)
+    assert batch.q_table.get(key) == pytest.approx(sequential.q_table.get(key), abs=1e-6)
@@ -0,0 +1,42 @@
+import numpy as np
+from app.core.checkpoint import RLCheckpointer
+from app.core.q_table import encode_state
+from app.core.rl_model import RLModel
+from app.core.shared_rl import DROPPED_UPDATES, SharedRLModel
+
+def _start(path, directory):
+    # What preload() does for one worker
+    model = SharedRLModel(path, capacity=1024)
+    checkpointer = RLCheckpointer(model, directory)
+    model.open(initialize=lambda: checkpointer.restore_latest(mmap=False),
+               latest_version=checkpointer.latest_version)
+    return model, checkpointer
+
+def test_restart_reloads_a_newer_checkpoint(tmp_path):
+    shm, directory = tmp_path / "q_table.shm", tmp_path / "checkpoints"
+    state = RLModel().get_state(1, 5, 5)
+    model, checkpointer = _start(shm, directory)
+    model.update_q_values_batch([encode_state(1, 5, 5)], [0], [1.0])
+    checkpointer.checkpoint()
+    assert model.checkpoint_version == 1
+    # Unchanged on disk: the shared file (with any later updates) is kept
+    model.update_q_values_batch([encode_state(2, 5, 5)], [0], [1.0])
+    model, checkpointer = _start(shm, directory)
+    assert len(model.q_table) == 2 and model.checkpoint_version == 1
+    # The replay trainer writes a newer table: the next start serves it
+    trainer = RLModel()
+    trainer.update_q_values_batch(encode_state(np.arange(10, dtype=np.int64), 5, 5), np.zeros(10), np.full(10, -1.0))
+    RLCheckpointer(trainer, directory).checkpoint(force=True)
+    model, checkpointer = _start(shm, directory)
+    assert model.checkpoint_version == 2 and len(model.q_table) == 10
+    assert model.get_q_values(state) == trainer.get_q_values(state)
+
+def test_updates_that_do_not_fit_are_counted_and_reported_once(tmp_path, caplog):
+    model, _ = _start(tmp_path / "q_table.shm", tmp_path / "checkpoints")
+    before = DROPPED_UPDATES._values.get((), 0)
+    for start in (0, 2000):
+        keys = encode_state(np.arange(start, start + 2000, dtype=np.int64), 5, 5)
+        model.update_q_values_batch(keys, np.zeros(2000), np.ones(2000))
+    assert len(model.q_table) < 1024 and model.dropped > 2000
+    assert DROPPED_UPDATES._values.get((), 0) - before == model.dropped
+    assert len([record for record in caplog.records if "is full" in record.message]) == 1